@@ -0,0 +1,34 @@
+# Compares the runtime of the typecheck backends of runYourProgram.
+#
+# Usage: python3 benchmarks/compareBackends.py [FILE] [--repeat N]
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+scriptDir = os.path.dirname(os.path.abspath(__file__))
+runYourProgram = os.path.join(scriptDir, '..', 'code', 'wypp', 'runYourProgram.py')
+
+def timeRun(file: str, extraArgs: list[str]) -> float:
+    cmd = [sys.executable, runYourProgram, '--quiet', '--no-clear'] + extraArgs + [file]
+    start = time.perf_counter()
+    subprocess.run(cmd, check=True)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare typecheck backends')
+    parser.add_argument('file', nargs='?', default=os.path.join(scriptDir, 'recursion.py'))
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    configs = [
+        ('no typechecking', ['--no-typechecking']),
+        ('decorator', ['--typecheck-backend', 'decorator']),
+        ('monitoring', ['--typecheck-backend', 'monitoring']),
+    ]
+    for (name, extraArgs) in configs:
+        times = [timeRun(args.file, extraArgs) for _ in range(args.repeat)]
+        print(f'{name:20} min {min(times):.3f}s, max {max(times):.3f}s')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+# Benchmark for the memory used by record instances and for the construction rate of
+# records. Compares records with __slots__ (the default) and records with a __dict__,
+# each with and without type checking.
+#
+# Usage: python3 benchmarks/recordMemory.py [--instances N]
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+scriptDir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(scriptDir, '..', 'code'))
+
+from wypp import records, stacktrace
+
+class Point:
+    x: float
+    y: float
+
+def mkRecord(mutable: bool):
+    cls = type('Point', (), {'__annotations__': Point.__annotations__, '__module__': __name__})
+    return records.record(cls, mutable=mutable, globals=globals())
+
+def bytesPerInstance(cls, n: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    (before, _) = tracemalloc.get_traced_memory()
+    xs = [cls(1.0, 2.0) for _ in range(n)]
+    (after, _) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # do not count the list holding the instances
+    return (after - before - sys.getsizeof(xs)) / n
+
+def constructionsPerSecond(cls, n: int) -> float:
+    start = time.perf_counter()
+    for i in range(n):
+        cls(i, 2.0)
+    return n / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark memory and construction of records')
+    parser.add_argument('--instances', type=int, default=200000)
+    args = parser.parse_args()
+    stacktrace.installReturnTracking()
+    configs = []
+    for checked in [False, True]:
+        records.init(checked)
+        for slots in [True, False]:
+            records._useSlots = slots
+            for mutable in [False, True]:
+                name = f'{"checked" if checked else "unchecked"}, ' \
+                       f'{"slots" if slots else "dict"}, {"mutable" if mutable else "frozen"}'
+                configs.append((name, mkRecord(mutable)))
+    records._useSlots = True
+    for (name, cls) in configs:
+        size = bytesPerInstance(cls, args.instances)
+        rate = constructionsPerSecond(cls, args.instances)
+        print(f'{name:28} {size:6.1f} bytes/instance, {rate / 1000:8.1f} k constructions/s')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+# Deep recursion workload for comparing the typecheck backends, see compareBackends.py
+from wypp import *
+import sys
+
+@record
+class Node:
+    value: int
+    next: Optional['Node']
+
+def mkList(n: int) -> Optional['Node']:
+    res: Optional['Node'] = None
+    for i in range(n):
+        res = Node(i, res)
+    return res
+
+def length(l: Optional['Node']) -> int:
+    if l is None:
+        return 0
+    return 1 + length(l.next)
+
+def sumList(l: Optional['Node'], acc: int) -> int:
+    if l is None:
+        return acc
+    return sumList(l.next, acc + l.value)
+
+def fib(n: int) -> int:
+    if n < 2:
+        return n
+    return fib(n - 1) + fib(n - 2)
+
+sys.setrecursionlimit(20000)
+depth = 2000
+l = mkList(depth)
+for _ in range(50):
+    length(l)
+    sumList(l, 0)
+fib(22)
@@ -0,0 +1,75 @@
+# Microbenchmark for calls of typechecked functions and record construction. Compares the
+# specialized wrappers of wrapTypecheck, the generic wrapper and the full checks of
+# checkArguments and checkReturn.
+#
+# Usage: python3 benchmarks/wrappedCalls.py [--calls N]
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from typing import Optional
+
+scriptDir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(scriptDir, '..', 'code'))
+
+from wypp import records, stacktrace, typecheck
+from wypp.myTypeguard import Namespaces
+
+def add(x: int, y: float, label: Optional[str] = None) -> float:
+    return x + y
+
+class Point:
+    x: int
+    y: float
+    label: Optional[str] = None
+
+def wrap(f):
+    cfg = typecheck.CheckCfg('function', Namespaces(globals(), {}))
+    return typecheck.wrapTypecheck(cfg)(f)
+
+def mkRecord():
+    cls = type('Point', (), {'__annotations__': Point.__annotations__, 'label': None,
+                             '__module__': __name__})
+    return records.record(cls, globals=globals())
+
+def measure(f, calls: int) -> tuple[float, float]:
+    """Returns nanoseconds per call and transient bytes allocated per call"""
+    start = time.perf_counter()
+    for i in range(calls):
+        f(i, 1.0)
+        f(i, 2.0, label='x')
+    t = time.perf_counter() - start
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    (before, _) = tracemalloc.get_traced_memory()
+    for i in range(1000):
+        f(1, 1.0)
+        f(1, 2.0, label='x')
+    (_, peak) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (t * 1e9 / (2 * calls), (peak - before) / 2000)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark calls of typechecked functions')
+    parser.add_argument('--calls', type=int, default=200000)
+    args = parser.parse_args()
+    stacktrace.installReturnTracking()
+    records.init(True)
+    specialized = (wrap(add), mkRecord())
+    typecheck._specializeWrappers = False
+    generic = (wrap(add), mkRecord())
+    typecheck._specializeWrappers = True
+    records.init(False)
+    unchecked = (add, mkRecord())
+    configs = [('unchecked', unchecked, True), ('specialized', specialized, True),
+               ('generic', generic, True), ('full checks', generic, False)]
+    for (i, what) in enumerate(['function', 'record']):
+        print(f'{what}:')
+        for (name, fs, quick) in configs:
+            typecheck._quickChecks = quick
+            (ns, bytesPerCall) = measure(fs[i], args.calls)
+            print(f'  {name:12} {ns:8.0f} ns/call, {bytesPerCall:8.1f} transient bytes/call')
+
+if __name__ == '__main__':
+    main()
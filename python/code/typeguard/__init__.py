@@ -3,24 +3,23 @@ from typing import Any
 
 from ._checkers import TypeCheckerCallable as TypeCheckerCallable
 from ._checkers import TypeCheckLookupCallback as TypeCheckLookupCallback
+from ._checkers import TypePredicateCallable as TypePredicateCallable
 from ._checkers import check_type_internal as check_type_internal
 from ._checkers import checker_lookup_functions as checker_lookup_functions
 from ._checkers import load_plugins as load_plugins
+from ._checkers import matches_type_internal as matches_type_internal
+from ._checkers import predicate_for_checker as predicate_for_checker
 from ._config import CollectionCheckStrategy as CollectionCheckStrategy
 from ._config import ForwardRefPolicy as ForwardRefPolicy
 from ._config import TypeCheckConfiguration as TypeCheckConfiguration
-from ._decorators import typechecked as typechecked
-from ._decorators import typeguard_ignore as typeguard_ignore
 from ._exceptions import InstrumentationWarning as InstrumentationWarning
 from ._exceptions import TypeCheckError as TypeCheckError
 from ._exceptions import TypeCheckWarning as TypeCheckWarning
 from ._exceptions import TypeHintWarning as TypeHintWarning
 from ._functions import TypeCheckFailCallback as TypeCheckFailCallback
 from ._functions import check_type as check_type
+from ._functions import matches_type as matches_type
 from ._functions import warn_on_error as warn_on_error
-from ._importhook import ImportHookManager as ImportHookManager
-from ._importhook import TypeguardFinder as TypeguardFinder
-from ._importhook import install_import_hook as install_import_hook
 from ._memo import TypeCheckMemo as TypeCheckMemo
 from ._suppression import suppress_type_checks as suppress_type_checks
 from ._utils import Unset as Unset
@@ -34,15 +33,36 @@ for value in list(locals().values()):
 config: TypeCheckConfiguration
 
 
+# The instrumentation machinery is imported on first use, it takes long to import and
+# wypp only needs check_type.
+_lazy_imports = {
+    "typechecked": "._decorators",
+    "typeguard_ignore": "._decorators",
+    "ImportHookManager": "._importhook",
+    "TypeguardFinder": "._importhook",
+    "install_import_hook": "._importhook",
+}
+
+
 def __getattr__(name: str) -> Any:
     if name == "config":
         from ._config import global_config
 
         return global_config
 
+    if name in _lazy_imports:
+        from importlib import import_module
+
+        value = getattr(import_module(_lazy_imports[name], __name__), name)
+        value.__module__ = __name__
+        globals()[name] = value
+        return value
+
     raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
-# Automatically load checker lookup functions unless explicitly disabled
-if "TYPEGUARD_DISABLE_PLUGIN_AUTOLOAD" not in os.environ:
+# Checker lookup functions from entry points are only loaded if explicitly enabled.
+# Scanning the entry points of all installed distributions slows down the startup of
+# every wypp program, and wypp does not use typeguard plugins.
+if "TYPEGUARD_ENABLE_PLUGIN_AUTOLOAD" in os.environ:
     load_plugins()
@@ -1,11 +1,13 @@
 from __future__ import annotations
 
+import builtins
 import collections.abc
 import inspect
 import sys
 import types
 import typing
 import warnings
+import weakref
 from collections.abc import Mapping, MutableMapping, Sequence
 from enum import Enum
 from inspect import Parameter, isclass, isfunction
@@ -31,15 +33,6 @@ from typing import (
     TypeVar,
     Union,
 )
-from unittest.mock import Mock
-
-import typing_extensions
-
-# Must use this because typing.is_typeddict does not recognize
-# TypedDict from typing_extensions, and as of version 4.12.0
-# typing_extensions.TypedDict is different from typing.TypedDict
-# on all versions.
-from typing_extensions import is_typeddict
 
 from ._config import ForwardRefPolicy
 from ._exceptions import TypeCheckError, TypeHintWarning
@@ -65,12 +58,39 @@ else:
     )
 
 if sys.version_info >= (3, 10):
-    from importlib.metadata import entry_points
     from typing import ParamSpec
 else:
-    from importlib_metadata import entry_points
     from typing_extensions import ParamSpec
 
+
+# unittest.mock and typing_extensions take long to import, so they are not imported
+# eagerly. Their types can only occur in values and annotations after some other module
+# imported them.
+def _loaded_module(name: str) -> types.ModuleType | None:
+    return sys.modules.get(name)
+
+
+def _is_mock(value: Any) -> bool:
+    mock = _loaded_module("unittest.mock")
+    return mock is not None and isinstance(value, mock.Mock)
+
+
+def is_typeddict(tp: Any) -> bool:
+    # typing.is_typeddict does not recognize TypedDict from typing_extensions, and as
+    # of version 4.12.0 typing_extensions.TypedDict is different from typing.TypedDict
+    # on all versions.
+    if typing.is_typeddict(tp):
+        return True
+    typing_extensions = _loaded_module("typing_extensions")
+    return typing_extensions is not None and typing_extensions.is_typeddict(tp)
+
+
+def _is_special_form(typ: object, name: str) -> bool:
+    if typ is getattr(typing, name, None):
+        return True
+    typing_extensions = _loaded_module("typing_extensions")
+    return typing_extensions is not None and typ is getattr(typing_extensions, name, None)
+
 TypeCheckerCallable: TypeAlias = Callable[
     [Any, Any, Tuple[Any, ...], TypeCheckMemo], Any
 ]
@@ -221,7 +241,7 @@ def check_mapping(
         key_type, value_type = args
         if key_type is not Any or value_type is not Any:
             samples = memo.config.collection_check_strategy.iterate_samples(
-                value.items()
+                value.items(), memo.config.collection_sample_size
             )
             for k, v in samples:
                 try:
@@ -295,7 +315,9 @@ def check_list(
         raise TypeCheckError("is not a list")
 
     if args and args != (Any,):
-        samples = memo.config.collection_check_strategy.iterate_samples(value)
+        samples = memo.config.collection_check_strategy.iterate_samples(
+            value, memo.config.collection_sample_size
+        )
         for i, v in enumerate(samples):
             try:
                 check_type_internal(v, args[0], memo)
@@ -314,7 +336,9 @@ def check_sequence(
         raise TypeCheckError("is not a sequence")
 
     if args and args != (Any,):
-        samples = memo.config.collection_check_strategy.iterate_samples(value)
+        samples = memo.config.collection_check_strategy.iterate_samples(
+            value, memo.config.collection_sample_size
+        )
         for i, v in enumerate(samples):
             try:
                 check_type_internal(v, args[0], memo)
@@ -336,7 +360,9 @@ def check_set(
         raise TypeCheckError("is not a set")
 
     if args and args != (Any,):
-        samples = memo.config.collection_check_strategy.iterate_samples(value)
+        samples = memo.config.collection_check_strategy.iterate_samples(
+            value, memo.config.collection_sample_size
+        )
         for v in samples:
             try:
                 check_type_internal(v, args[0], memo)
@@ -378,7 +404,9 @@ def check_tuple(
 
     if use_ellipsis:
         element_type = tuple_params[0]
-        samples = memo.config.collection_check_strategy.iterate_samples(value)
+        samples = memo.config.collection_check_strategy.iterate_samples(
+            value, memo.config.collection_sample_size
+        )
         for i, element in enumerate(samples):
             try:
                 check_type_internal(element, element_type, memo)
@@ -473,7 +501,7 @@ def check_class(
 
     if expected_class is Any:
         return
-    elif expected_class is typing_extensions.Self:
+    elif _is_special_form(expected_class, "Self"):
         check_self(value, get_origin(expected_class), get_args(expected_class), memo)
     elif getattr(expected_class, "_is_protocol", False):
         check_protocol(value, expected_class, (), memo)
@@ -555,7 +583,28 @@ def check_typevar(
 
 
 def _is_literal_type(typ: object) -> bool:
-    return typ is typing.Literal or typ is typing_extensions.Literal
+    return _is_special_form(typ, "Literal")
+
+
+def _get_literal_args(literal_args: tuple[Any, ...]) -> tuple[Any, ...]:
+    retval: list[Any] = []
+    for arg in literal_args:
+        if _is_literal_type(get_origin(arg)):
+            retval.extend(_get_literal_args(arg.__args__))
+        elif arg is None or isinstance(arg, (int, str, bytes, bool, Enum)):
+            retval.append(arg)
+        else:
+            raise TypeError(f"Illegal literal value: {arg}")  # TypeError here is deliberate
+
+    return tuple(retval)
+
+
+def _is_literal_arg(value: Any, final_args: tuple[Any, ...]) -> bool:
+    try:
+        index = final_args.index(value)
+    except ValueError:
+        return False
+    return type(final_args[index]) is type(value)
 
 
 def check_literal(
@@ -564,28 +613,9 @@ def check_literal(
     args: tuple[Any, ...],
     memo: TypeCheckMemo,
 ) -> None:
-    def get_literal_args(literal_args: tuple[Any, ...]) -> tuple[Any, ...]:
-        retval: list[Any] = []
-        for arg in literal_args:
-            if _is_literal_type(get_origin(arg)):
-                retval.extend(get_literal_args(arg.__args__))
-            elif arg is None or isinstance(arg, (int, str, bytes, bool, Enum)):
-                retval.append(arg)
-            else:
-                raise TypeError(
-                    f"Illegal literal value: {arg}"
-                )  # TypeError here is deliberate
-
-        return tuple(retval)
-
-    final_args = tuple(get_literal_args(args))
-    try:
-        index = final_args.index(value)
-    except ValueError:
-        pass
-    else:
-        if type(final_args[index]) is type(value):
-            return
+    final_args = _get_literal_args(args)
+    if _is_literal_arg(value, final_args):
+        return
 
     formatted_args = ", ".join(repr(arg) for arg in final_args)
     raise TypeCheckError(f"is not any of ({formatted_args})") from None
@@ -796,14 +826,65 @@ def check_signature_compatible(subject: type, protocol: type, attrname: str) ->
             )
 
 
+# Class-level parts of protocol checks. The members of a protocol and the compatibility of
+# the method signatures of a class with a protocol only depend on the classes, so they are
+# computed once per protocol and once per (class, protocol). Entries are dropped when the
+# classes are garbage collected.
+_protocol_infos: weakref.WeakKeyDictionary[type, tuple[tuple[str, ...], dict[str, Any]]] = (
+    weakref.WeakKeyDictionary()
+)
+_signature_checks: weakref.WeakKeyDictionary[
+    type, weakref.WeakKeyDictionary[type, dict[str, str | None]]
+] = weakref.WeakKeyDictionary()
+
+
+def get_protocol_info(protocol: type) -> tuple[tuple[str, ...], dict[str, Any]]:
+    """
+    Return the sorted members of the protocol and the annotations of its attributes.
+    """
+    info = _protocol_infos.get(protocol)
+    if info is None:
+        annotations = typing.get_type_hints(protocol)
+        if sys.version_info >= (3, 13):
+            from typing import get_protocol_members
+        else:
+            from typing_extensions import get_protocol_members
+
+        info = (tuple(sorted(get_protocol_members(protocol))), annotations)
+        _protocol_infos[protocol] = info
+    return info
+
+
+def protocol_signature_error(subject: type, protocol: type, attrname: str) -> str | None:
+    """
+    Return why the method ``attrname`` of ``subject`` is not compatible with the
+    protocol, or ``None`` if it is compatible.
+    """
+    by_protocol = _signature_checks.get(subject)
+    if by_protocol is None:
+        by_protocol = weakref.WeakKeyDictionary()
+        _signature_checks[subject] = by_protocol
+    results = by_protocol.get(protocol)
+    if results is None:
+        results = {}
+        by_protocol[protocol] = results
+    if attrname not in results:
+        try:
+            check_signature_compatible(subject, protocol, attrname)
+            results[attrname] = None
+        except TypeCheckError as exc:
+            results[attrname] = str(exc)
+    return results[attrname]
+
+
 def check_protocol(
     value: Any,
     origin_type: Any,
     args: tuple[Any, ...],
     memo: TypeCheckMemo,
 ) -> None:
-    origin_annotations = typing.get_type_hints(origin_type)
-    for attrname in sorted(typing_extensions.get_protocol_members(origin_type)):
+    members, origin_annotations = get_protocol_info(origin_type)
+    for attrname in members:
         if (annotation := origin_annotations.get(attrname)) is not None:
             try:
                 subject_member = getattr(value, attrname)
@@ -838,13 +919,12 @@ def check_protocol(
             # TODO: implement assignability checks for parameter and return value
             #  annotations
             subject = value if isclass(value) else value.__class__
-            try:
-                check_signature_compatible(subject, origin_type, attrname)
-            except TypeCheckError as exc:
+            error = protocol_signature_error(subject, origin_type, attrname)
+            if error is not None:
                 raise TypeCheckError(
                     f"is not compatible with the {origin_type.__qualname__} "
-                    f"protocol because its {attrname!r} method {exc}"
-                ) from None
+                    f"protocol because its {attrname!r} method {error}"
+                )
 
 
 def check_byteslike(
@@ -885,9 +965,115 @@ def check_paramspec(
 ) -> None:
     pass  # No-op for now
 
+# Resolved string annotations and forward references, keyed by the annotation and the
+# identity of the namespaces. Only successful resolutions are cached, so a name that is
+# defined later in a module is resolved as soon as it exists. An entry also records the
+# objects bound to the names the annotation refers to and is only used while these names
+# are bound to the same objects. Redefining a class (for example in the REPL) is noticed,
+# assigning a new value to an attribute of a module referred to by an annotation is not.
+MAX_RESOLVED_ANNOTATIONS = 1024
+
+
+class _ResolvedAnnotation:
+    __slots__ = "globalns", "localns", "bindings", "value"
+
+    def __init__(
+        self,
+        globalns: dict | None,
+        localns: dict | None,
+        bindings: tuple[tuple[str, Any], ...],
+        value: Any,
+    ):
+        self.globalns = globalns
+        self.localns = localns
+        self.bindings = bindings
+        self.value = value
+
+
+_resolved_annotations: dict[tuple[str, str, int, int], _ResolvedAnnotation] = {}
+
+
+def _lookup_name(name: str, globalns: dict | None, localns: dict | None) -> Any:
+    if localns and name in localns:
+        return localns[name]
+    if globalns and name in globalns:
+        return globalns[name]
+    return builtins.__dict__.get(name, _missing)
+
+
+def _annotation_names(s: str, depth: int = 0) -> set[str] | None:
+    """
+    The names an annotation refers to, including those in nested string annotations such
+    as ``list['Node']``. None if the annotation is not a valid expression.
+    """
+    try:
+        code = compile(s, "<annotation>", "eval")
+    except SyntaxError:
+        return None
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, str) and depth < 10:
+            names |= _annotation_names(const, depth + 1) or set()
+    return names
+
+
+def _resolve_cached(
+    kind: str,
+    s: str,
+    globalns: dict | None,
+    localns: dict | None,
+    resolve: Callable[[], Any],
+) -> Any:
+    key = (kind, s, id(globalns), id(localns))
+    entry = _resolved_annotations.get(key)
+    if (
+        entry is not None
+        and entry.globalns is globalns
+        and entry.localns is localns
+        and all(
+            _lookup_name(name, globalns, localns) is obj for (name, obj) in entry.bindings
+        )
+    ):
+        return entry.value
+
+    value = resolve()
+    names = _annotation_names(s)
+    if names is not None:
+        if len(_resolved_annotations) >= MAX_RESOLVED_ANNOTATIONS:
+            _resolved_annotations.clear()
+        bindings = tuple((name, _lookup_name(name, globalns, localns)) for name in names)
+        _resolved_annotations[key] = _ResolvedAnnotation(
+            globalns, localns, bindings, value
+        )
+    return value
+
+
+def clear_resolved_annotations() -> None:
+    _resolved_annotations.clear()
+
+
 def resolve_annotation_str(s: str, globalns: dict, localns: dict):
-    Tmp = type("_Tmp", (), {"__annotations__": {"x": s}})
-    return typing.get_type_hints(Tmp, globalns=globalns, localns=localns)["x"]
+    def resolve() -> Any:
+        Tmp = type("_Tmp", (), {"__annotations__": {"x": s}})
+        return typing.get_type_hints(Tmp, globalns=globalns, localns=localns)["x"]
+
+    return _resolve_cached("str", s, globalns, localns, resolve)
+
+
+def resolve_forwardref(forwardref: ForwardRef, memo: TypeCheckMemo) -> Any:
+    """
+    Like :func:`evaluate_forwardref`, with the results cached per namespace.
+    """
+    if getattr(forwardref, "__forward_module__", None) is not None:
+        # evaluated in the namespace of the module, not in the namespace of the memo
+        return evaluate_forwardref(forwardref, memo)
+    return _resolve_cached(
+        "ref",
+        forwardref.__forward_arg__,
+        memo.globals,
+        memo.locals,
+        lambda: evaluate_forwardref(forwardref, memo),
+    )
 
 def resolve_alias_chains(tp: Any):
     # 1) Follow PEP 695 alias chains (type My = ... -> TypeAliasType)
@@ -898,31 +1084,25 @@ def resolve_alias_chains(tp: Any):
         tp = tp.__value__  # evaluated lazily in its defining module
     return tp
 
-def check_type_internal(
+def _resolve_annotation(
     value: Any,
     annotation: Any,
     memo: TypeCheckMemo,
-) -> None:
+) -> tuple[Any, tuple[Any, ...], tuple[Any, ...]] | None:
     """
-    Check that the given object is compatible with the given type annotation.
-
-    This function should only be used by type checker callables. Applications should use
-    :func:`~.check_type` instead.
-
-    :param value: the value to check
-    :param annotation: the type annotation to check against
-    :param memo: a memo object containing configuration and information necessary for
-        looking up forward references
+    Resolve the annotation into the origin type, its arguments and the extras of
+    ``Annotated``. Returns ``None`` if the value is known to match without further
+    checks.
     """
     ty = type(value)
     if ty == annotation or (value is None and annotation is type(None)):
         # some early exits for better performance
-        return
+        return None
     annotation = resolve_alias_chains(annotation)
 
     if isinstance(annotation, ForwardRef):
         try:
-            annotation = evaluate_forwardref(annotation, memo)
+            annotation = resolve_forwardref(annotation, memo)
         except NameError:
             if memo.config.forward_ref_policy is ForwardRefPolicy.ERROR:
                 raise
@@ -932,16 +1112,16 @@ def check_type_internal(
                     TypeHintWarning,
                     stacklevel=get_stacklevel(),
                 )
-            return
+            return None
     if isinstance(annotation, str):
         annotation = resolve_annotation_str(annotation, memo.globals, memo.locals)
 
-    if annotation is Any or annotation is SubclassableAny or isinstance(value, Mock):
-        return
+    if annotation is Any or annotation is SubclassableAny or _is_mock(value):
+        return None
 
     # Skip type checks if value is an instance of a class that inherits from Any
     if not isclass(value) and SubclassableAny in type(value).__bases__:
-        return
+        return None
 
     extras: tuple[Any, ...]
     origin_type = get_origin(annotation)
@@ -963,6 +1143,39 @@ def check_type_internal(
         origin_type = annotation
         args = ()
 
+    return origin_type, args, extras
+
+
+def _warn_string_origin(origin_type: str) -> None:
+    warnings.warn(
+        f"Skipping type check against {origin_type!r}; this looks like a "
+        f"string-form forward reference imported from another module",
+        TypeHintWarning,
+        stacklevel=get_stacklevel(),
+    )
+
+
+def check_type_internal(
+    value: Any,
+    annotation: Any,
+    memo: TypeCheckMemo,
+) -> None:
+    """
+    Check that the given object is compatible with the given type annotation.
+
+    This function should only be used by type checker callables. Applications should use
+    :func:`~.check_type` instead.
+
+    :param value: the value to check
+    :param annotation: the type annotation to check against
+    :param memo: a memo object containing configuration and information necessary for
+        looking up forward references
+    """
+    resolved = _resolve_annotation(value, annotation, memo)
+    if resolved is None:
+        return
+    origin_type, args, extras = resolved
+
     for lookup_func in checker_lookup_functions:
         checker = lookup_func(origin_type, args, extras)
         if checker:
@@ -973,12 +1186,7 @@ def check_type_internal(
         if not isinstance(value, origin_type):
             raise TypeCheckError(f"is not an instance of {qualified_name(origin_type)}")
     elif type(origin_type) is str:  # noqa: E721
-        warnings.warn(
-            f"Skipping type check against {origin_type!r}; this looks like a "
-            f"string-form forward reference imported from another module",
-            TypeHintWarning,
-            stacklevel=get_stacklevel(),
-        )
+        _warn_string_origin(origin_type)
 
 
 # Equality checks are applied to these
@@ -1013,13 +1221,7 @@ origin_type_checkers = {
     type: check_class,
     Type: check_class,
     Union: check_union,
-    # On some versions of Python, these may simply be re-exports from "typing",
-    # but exactly which Python versions is subject to change.
-    # It's best to err on the safe side and just always specify these.
-    typing_extensions.Literal: check_literal,
-    typing_extensions.LiteralString: check_literal_string,
-    typing_extensions.Self: check_self,
-    typing_extensions.TypeGuard: check_typeguard,
+    typing.Literal: check_literal,
 }
 if sys.version_info >= (3, 10):
     origin_type_checkers[types.UnionType] = check_uniontype
@@ -1029,11 +1231,37 @@ if sys.version_info >= (3, 11):
         {typing.LiteralString: check_literal_string, typing.Self: check_self}
     )
 
+_typing_extensions_checkers_added = False
+
+
+def _add_typing_extensions_checkers() -> bool:
+    """
+    Adds the checkers for the special forms of typing_extensions once it is loaded.
+    On some versions of Python, these may simply be re-exports from "typing",
+    but exactly which Python versions is subject to change.
+    """
+    global _typing_extensions_checkers_added
+    typing_extensions = _loaded_module("typing_extensions")
+    if _typing_extensions_checkers_added or typing_extensions is None:
+        return False
+    _typing_extensions_checkers_added = True
+    origin_type_checkers.update(
+        {
+            typing_extensions.Literal: check_literal,
+            typing_extensions.LiteralString: check_literal_string,
+            typing_extensions.Self: check_self,
+            typing_extensions.TypeGuard: check_typeguard,
+        }
+    )
+    return True
+
 
 def builtin_checker_lookup(
     origin_type: Any, args: tuple[Any, ...], extras: tuple[Any, ...]
 ) -> TypeCheckerCallable | None:
     checker = origin_type_checkers.get(origin_type)
+    if checker is None and _add_typing_extensions_checkers():
+        checker = origin_type_checkers.get(origin_type)
     if checker is not None:
         return checker
     elif is_typeddict(origin_type):
@@ -1068,6 +1296,343 @@ def builtin_checker_lookup(
 checker_lookup_functions.append(builtin_checker_lookup)
 
 
+# Boolean predicates
+#
+# matches_type_internal decides the same question as check_type_internal but returns a
+# bool instead of raising TypeCheckError. The predicates of the built-in checkers do
+# not allocate exceptions or format messages, so a value that matches one alternative
+# of a union does not pay for the alternatives it does not match. The exception API is
+# only needed to explain a mismatch. Checkers without a predicate (such as those of
+# plugins) are wrapped by predicate_for_checker.
+
+TypePredicateCallable: TypeAlias = Callable[
+    [Any, Any, Tuple[Any, ...], TypeCheckMemo], bool
+]
+
+
+def matches_mapping(
+    value: Any,
+    origin_type: Any,
+    args: tuple[Any, ...],
+    memo: TypeCheckMemo,
+) -> bool:
+    if origin_type is Dict or origin_type is dict:
+        if not isinstance(value, dict):
+            return False
+    if origin_type is MutableMapping or origin_type is collections.abc.MutableMapping:
+        if not isinstance(value, collections.abc.MutableMapping):
+            return False
+    elif not isinstance(value, collections.abc.Mapping):
+        return False
+
+    if args:
+        key_type, value_type = args
+        if key_type is not Any or value_type is not Any:
+            samples = memo.config.collection_check_strategy.iterate_samples(
+                value.items(), memo.config.collection_sample_size
+            )
+            for k, v in samples:
+                if not matches_type_internal(k, key_type, memo):
+                    return False
+                if not matches_type_internal(v, value_type, memo):
+                    return False
+    return True
+
+
+def _matches_items(
+    value: Any,
+    args: tuple[Any, ...],
+    memo: TypeCheckMemo,
+) -> bool:
+    if args and args != (Any,):
+        samples = memo.config.collection_check_strategy.iterate_samples(
+            value, memo.config.collection_sample_size
+        )
+        for v in samples:
+            if not matches_type_internal(v, args[0], memo):
+                return False
+    return True
+
+
+def matches_list(
+    value: Any,
+    origin_type: Any,
+    args: tuple[Any, ...],
+    memo: TypeCheckMemo,
+) -> bool:
+    return isinstance(value, list) and _matches_items(value, args, memo)
+
+
+def matches_sequence(
+    value: Any,
+    origin_type: Any,
+    args: tuple[Any, ...],
+    memo: TypeCheckMemo,
+) -> bool:
+    return isinstance(value, collections.abc.Sequence) and _matches_items(
+        value, args, memo
+    )
+
+
+def matches_set(
+    value: Any,
+    origin_type: Any,
+    args: tuple[Any, ...],
+    memo: TypeCheckMemo,
+) -> bool:
+    if origin_type is frozenset:
+        if not isinstance(value, frozenset):
+            return False
+    elif not isinstance(value, AbstractSet):
+        return False
+    return _matches_items(value, args, memo)
+
+
+def matches_tuple(
+    value: Any,
+    origin_type: Any,
+    args: tuple[Any, ...],
+    memo: TypeCheckMemo,
+) -> bool:
+    # Specialized check for NamedTuples
+    if field_types := getattr(origin_type, "__annotations__", None):
+        if not isinstance(value, origin_type):
+            return False
+
+        for name, field_type in field_types.items():
+            if not matches_type_internal(getattr(value, name), field_type, memo):
+                return False
+
+        return True
+    elif not isinstance(value, tuple):
+        return False
+
+    if args:
+        use_ellipsis = args[-1] is Ellipsis
+        tuple_params = args[: -1 if use_ellipsis else None]
+    else:
+        # Unparametrized Tuple or plain tuple
+        return True
+
+    if use_ellipsis:
+        return _matches_items(value, tuple_params, memo)
+    elif tuple_params == ((),):
+        return value == ()
+    elif len(value) != len(tuple_params):
+        return False
+    else:
+        for element, element_type in zip(value, tuple_params):
+            if not matches_type_internal(element, element_type, memo):
+                return False
+        return True
+
+
+def matches_union(
+    value: Any,
+    origin_type: Any,
+    args: tuple[Any, ...],
+    memo: TypeCheckMemo,
+) -> bool:
+    for type_ in args:
+        if matches_type_internal(value, type_, memo):
+            return True
+    return False
+
+
+def matches_uniontype(
+    value: Any,
+    origin_type: Any,
+    args: tuple[Any, ...],
+    memo: TypeCheckMemo,
+) -> bool:
+    if not args:
+        return isinstance(value, types.UnionType)
+    return matches_union(value, origin_type, args, memo)
+
+
+def matches_newtype(
+    value: Any,
+    origin_type: Any,
+    args: tuple[Any, ...],
+    memo: TypeCheckMemo,
+) -> bool:
+    return matches_type_internal(value, origin_type.__supertype__, memo)
+
+
+def matches_instance(
+    value: Any,
+    origin_type: Any,
+    args: tuple[Any, ...],
+    memo: TypeCheckMemo,
+) -> bool:
+    return isinstance(value, origin_type)
+
+
+def matches_typevar(
+    value: Any,
+    origin_type: TypeVar,
+    args: tuple[Any, ...],
+    memo: TypeCheckMemo,
+) -> bool:
+    if origin_type.__bound__ is not None:
+        return matches_type_internal(value, origin_type.__bound__, memo)
+    elif origin_type.__constraints__:
+        for constraint in origin_type.__constraints__:
+            if matches_type_internal(value, constraint, memo):
+                return True
+        return False
+    return True
+
+
+def matches_literal(
+    value: Any,
+    origin_type: Any,
+    args: tuple[Any, ...],
+    memo: TypeCheckMemo,
+) -> bool:
+    return _is_literal_arg(value, _get_literal_args(args))
+
+
+def matches_literal_string(
+    value: Any,
+    origin_type: Any,
+    args: tuple[Any, ...],
+    memo: TypeCheckMemo,
+) -> bool:
+    return isinstance(value, str)
+
+
+def matches_typeguard(
+    value: Any,
+    origin_type: Any,
+    args: tuple[Any, ...],
+    memo: TypeCheckMemo,
+) -> bool:
+    return isinstance(value, bool)
+
+
+def matches_none(
+    value: Any,
+    origin_type: Any,
+    args: tuple[Any, ...],
+    memo: TypeCheckMemo,
+) -> bool:
+    return value is None
+
+
+def matches_number(
+    value: Any,
+    origin_type: Any,
+    args: tuple[Any, ...],
+    memo: TypeCheckMemo,
+) -> bool:
+    if origin_type is complex:
+        return isinstance(value, (complex, float, int))
+    elif origin_type is float:
+        return isinstance(value, (float, int))
+    return True
+
+
+def matches_byteslike(
+    value: Any,
+    origin_type: Any,
+    args: tuple[Any, ...],
+    memo: TypeCheckMemo,
+) -> bool:
+    return isinstance(value, (bytearray, bytes, memoryview))
+
+
+def matches_paramspec(
+    value: Any,
+    origin_type: Any,
+    args: tuple[Any, ...],
+    memo: TypeCheckMemo,
+) -> bool:
+    return True
+
+
+# Predicates of the built-in checkers. Checkers whose mismatches are rare or expensive
+# to decide anyway (callables, protocols, typed dicts, I/O, classes, Self) are wrapped.
+checker_predicates: dict[TypeCheckerCallable, TypePredicateCallable] = {
+    check_mapping: matches_mapping,
+    check_list: matches_list,
+    check_sequence: matches_sequence,
+    check_set: matches_set,
+    check_tuple: matches_tuple,
+    check_union: matches_union,
+    check_uniontype: matches_uniontype,
+    check_newtype: matches_newtype,
+    check_instance: matches_instance,
+    check_typevar: matches_typevar,
+    check_literal: matches_literal,
+    check_literal_string: matches_literal_string,
+    check_typeguard: matches_typeguard,
+    check_none: matches_none,
+    check_number: matches_number,
+    check_byteslike: matches_byteslike,
+    check_paramspec: matches_paramspec,
+}
+
+
+def predicate_for_checker(checker: TypeCheckerCallable) -> TypePredicateCallable:
+    """
+    Return the predicate corresponding to the given checker. For checkers without a
+    predicate, the predicate calls the checker and turns a :exc:`TypeCheckError` into
+    ``False``.
+    """
+    predicate = checker_predicates.get(checker)
+    if predicate is None:
+
+        def predicate(
+            value: Any,
+            origin_type: Any,
+            args: tuple[Any, ...],
+            memo: TypeCheckMemo,
+        ) -> bool:
+            try:
+                checker(value, origin_type, args, memo)
+            except TypeCheckError:
+                return False
+            return True
+
+        checker_predicates[checker] = predicate
+    return predicate
+
+
+def matches_type_internal(
+    value: Any,
+    annotation: Any,
+    memo: TypeCheckMemo,
+) -> bool:
+    """
+    Return whether the given object is compatible with the given type annotation.
+
+    Behaves like :func:`~.check_type_internal`, except that a mismatch is reported by
+    returning ``False`` instead of raising :exc:`TypeCheckError`. Invalid annotations
+    still raise.
+
+    :param value: the value to check
+    :param annotation: the type annotation to check against
+    :param memo: a memo object containing configuration and information necessary for
+        looking up forward references
+    """
+    resolved = _resolve_annotation(value, annotation, memo)
+    if resolved is None:
+        return True
+    origin_type, args, extras = resolved
+
+    for lookup_func in checker_lookup_functions:
+        checker = lookup_func(origin_type, args, extras)
+        if checker:
+            return predicate_for_checker(checker)(value, origin_type, args, memo)
+
+    if isclass(origin_type):
+        return isinstance(value, origin_type)
+    elif type(origin_type) is str:  # noqa: E721
+        _warn_string_origin(origin_type)
+    return True
+
+
 def load_plugins() -> None:
     """
     Load all type checker lookup functions from entry points.
@@ -1079,6 +1644,11 @@ def load_plugins() -> None:
         ``TYPEGUARD_DISABLE_PLUGIN_AUTOLOAD`` environment variable is present.
     """
 
+    if sys.version_info >= (3, 10):
+        from importlib.metadata import entry_points
+    else:
+        from importlib_metadata import entry_points
+
     for ep in entry_points(group="typeguard.checker_lookup"):
         try:
             plugin = ep.load()
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
-from collections.abc import Iterable
+from collections.abc import Iterable, Sequence
 from dataclasses import dataclass
 from enum import Enum, auto
+from itertools import chain, islice
 from typing import TYPE_CHECKING, TypeVar
 
 if TYPE_CHECKING:
@@ -44,21 +45,49 @@ class CollectionCheckStrategy(Enum):
 
     * ``FIRST_ITEM``: check only the first item
     * ``ALL_ITEMS``: check all items
+    * ``BUDGET``: check only the first ``sample_size`` items
+    * ``STRIDE``: check about ``sample_size`` items evenly spread over the collection
     """
 
     FIRST_ITEM = auto()
     ALL_ITEMS = auto()
+    BUDGET = auto()
+    STRIDE = auto()
 
-    def iterate_samples(self, collection: Iterable[T]) -> Iterable[T]:
+    def iterate_samples(
+        self, collection: Iterable[T], sample_size: int = 100
+    ) -> Iterable[T]:
         if self is CollectionCheckStrategy.FIRST_ITEM:
             try:
                 return [next(iter(collection))]
             except StopIteration:
                 return ()
+        elif self is CollectionCheckStrategy.BUDGET:
+            return islice(collection, sample_size)
+        elif self is CollectionCheckStrategy.STRIDE:
+            return stride_samples(collection, sample_size)
         else:
             return collection
 
 
+def stride_samples(collection: Iterable[T], sample_size: int) -> Iterable[T]:
+    """
+    Every n-th item of the collection such that at most ``sample_size`` items are
+    returned. The last item is always included because appending to a collection is
+    the most common modification.
+    """
+    try:
+        n = len(collection)  # type: ignore[arg-type]
+    except TypeError:
+        return collection
+    if n <= sample_size or sample_size < 2:
+        return collection
+    step = -(-(n - 1) // (sample_size - 1))
+    if isinstance(collection, Sequence):
+        return chain(collection[0 : n - 1 : step], (collection[n - 1],))
+    return islice(collection, 0, n, step)
+
+
 @dataclass
 class TypeCheckConfiguration:
     """
@@ -86,6 +115,13 @@ class TypeCheckConfiguration:
 
          Default: ``FIRST_ITEM``
 
+    .. attribute:: collection_sample_size
+       :type: int
+
+         Number of items checked with the ``BUDGET`` and ``STRIDE`` strategies
+
+         Default: ``100``
+
     .. attribute:: debug_instrumentation
        :type: bool
 
@@ -100,6 +136,7 @@ class TypeCheckConfiguration:
     collection_check_strategy: CollectionCheckStrategy = (
         CollectionCheckStrategy.FIRST_ITEM
     )
+    collection_sample_size: int = 100
     debug_instrumentation: bool = False
 
 
@@ -6,7 +6,7 @@ from collections.abc import Sequence
 from typing import Any, Callable, NoReturn, TypeVar, Union, overload
 
 from . import _suppression
-from ._checkers import BINARY_MAGIC_METHODS, check_type_internal
+from ._checkers import BINARY_MAGIC_METHODS, check_type_internal, matches_type_internal
 from ._config import (
     CollectionCheckStrategy,
     ForwardRefPolicy,
@@ -32,6 +32,7 @@ def check_type(
     forward_ref_policy: ForwardRefPolicy = ...,
     typecheck_fail_callback: TypeCheckFailCallback | None = ...,
     collection_check_strategy: CollectionCheckStrategy = ...,
+    collection_sample_size: int = ...,
     ns: tuple[dict, dict] | None = None,
 ) -> T: ...
 
@@ -44,6 +45,7 @@ def check_type(
     forward_ref_policy: ForwardRefPolicy = ...,
     typecheck_fail_callback: TypeCheckFailCallback | None = ...,
     collection_check_strategy: CollectionCheckStrategy = ...,
+    collection_sample_size: int = ...,
     ns: tuple[dict, dict] | None = None,
 ) -> Any: ...
 
@@ -59,6 +61,7 @@ def check_type(
     collection_check_strategy: CollectionCheckStrategy = (
         TypeCheckConfiguration().collection_check_strategy
     ),
+    collection_sample_size: int = TypeCheckConfiguration().collection_sample_size,
     ns: tuple[dict, dict] | None = None,
 ) -> Any:
     """
@@ -87,6 +90,8 @@ def check_type(
         see :attr`TypeCheckConfiguration.typecheck_fail_callback`
     :param collection_check_strategy:
         see :attr:`TypeCheckConfiguration.collection_check_strategy`
+    :param collection_sample_size:
+        see :attr:`TypeCheckConfiguration.collection_sample_size`
     :return: ``value``, unmodified
     :raises TypeCheckError: if there is a type mismatch
 
@@ -98,6 +103,7 @@ def check_type(
         forward_ref_policy=forward_ref_policy,
         typecheck_fail_callback=typecheck_fail_callback,
         collection_check_strategy=collection_check_strategy,
+        collection_sample_size=collection_sample_size,
     )
 
     if _suppression.type_checks_suppressed or expected_type is Any:
@@ -121,6 +127,55 @@ def check_type(
     return value
 
 
+def matches_type(
+    value: object,
+    expected_type: Any,
+    *,
+    forward_ref_policy: ForwardRefPolicy = TypeCheckConfiguration().forward_ref_policy,
+    collection_check_strategy: CollectionCheckStrategy = (
+        TypeCheckConfiguration().collection_check_strategy
+    ),
+    collection_sample_size: int = TypeCheckConfiguration().collection_sample_size,
+    ns: tuple[dict, dict] | None = None,
+) -> bool:
+    """
+    Return whether ``value`` matches ``expected_type``.
+
+    This is the predicate counterpart of :func:`check_type`: it decides the same
+    question, but a mismatch does not raise :exc:`TypeCheckError`. Use
+    :func:`check_type` to obtain an explanation of the mismatch.
+
+    :param value: value to be checked against ``expected_type``
+    :param expected_type: a class or generic type instance, or a tuple of such things
+    :param forward_ref_policy: see :attr:`TypeCheckConfiguration.forward_ref_policy`
+    :param collection_check_strategy:
+        see :attr:`TypeCheckConfiguration.collection_check_strategy`
+    :param collection_sample_size:
+        see :attr:`TypeCheckConfiguration.collection_sample_size`
+    :return: ``True`` if the value matches
+    :raises TypeError: if ``expected_type`` is not a valid type annotation
+
+    """
+    if type(expected_type) is tuple:
+        expected_type = Union[expected_type]
+
+    if _suppression.type_checks_suppressed or expected_type is Any:
+        return True
+
+    config = TypeCheckConfiguration(
+        forward_ref_policy=forward_ref_policy,
+        collection_check_strategy=collection_check_strategy,
+        collection_sample_size=collection_sample_size,
+    )
+    if ns:
+        memo = TypeCheckMemo(ns[0], ns[1], config=config)
+    else:
+        frame = sys._getframe(1)
+        memo = TypeCheckMemo(frame.f_globals, frame.f_locals, config=config)
+        del frame
+    return matches_type_internal(value, expected_type, memo)
+
+
 def check_argument_types(
     func_name: str,
     arguments: dict[str, tuple[Any, Any]],
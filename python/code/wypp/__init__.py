@@ -7,6 +7,9 @@ from typing import Any, Callable, Generator, Iterable, Iterator, Literal, Mappin
 from . import writeYourProgram as w
 
 check = w.check
+CheckedDict = w.CheckedDict
+CheckedList = w.CheckedList
+CheckedSet = w.CheckedSet
 checkFail = w.checkFail
 floatNegative = w.floatNegative
 floatNonNegative = w.floatNonNegative
@@ -42,6 +45,9 @@ __all__ = [
     'Protocol',
     'Union',
     'check',
+    'CheckedDict',
+    'CheckedList',
+    'CheckedSet',
     'checkFail',
     'dataclass',
     'floatNegative',
@@ -0,0 +1,306 @@
+# Grades many submissions with the same tutor test file, see the --batch option.
+#
+# A submission is either a python file directly inside the batch directory, or a
+# subdirectory of the batch directory containing the main file given on the command line.
+# Each submission runs like `runYourProgram.py --check --test-file TESTFILE SUBMISSION`, but
+# in a child forked from the batch process, so the children start with wypp already
+# imported (see daemon.preload). Up to --jobs children run in parallel. Each child runs in
+# its own process group, which is killed if the child exceeds --timeout and when the child
+# has finished, so that processes started by a submission do not survive it.
+# --memory-limit restricts the address space of a child.
+#
+# The summary is printed to stdout as JSON, --junit additionally writes it as JUnit XML.
+# The output of each submission is contained in the summary, truncated after
+# MAX_OUTPUT_BYTES.
+from dataclasses import dataclass, field
+import json
+import os
+import selectors
+import signal
+import sys
+import time
+from typing import *
+
+from .myLogging import *
+from . import parsecache
+from . import utils
+
+MAX_OUTPUT_BYTES = 1024 * 1024
+
+@dataclass
+class Submission:
+    name: str
+    file: str
+
+@dataclass
+class Result:
+    submission: Submission
+    # ok, failed, crashed or timeout
+    status: str
+    exitCode: Optional[int]
+    seconds: float
+    student: Optional[dict]
+    tutor: Optional[dict]
+    output: str
+
+    def toJson(self) -> dict:
+        return {'name': self.submission.name, 'file': self.submission.file,
+                'status': self.status, 'exitCode': self.exitCode,
+                'seconds': round(self.seconds, 3), 'student': self.student, 'tutor': self.tutor,
+                'output': self.output}
+
+def findSubmissions(batchDir: str, mainFile: Optional[str]) -> list[Submission]:
+    res = []
+    for name in sorted(os.listdir(batchDir)):
+        path = os.path.join(batchDir, name)
+        if os.path.isfile(path) and name.endswith('.py'):
+            res.append(Submission(os.path.splitext(name)[0], path))
+        elif mainFile and os.path.isdir(path):
+            f = os.path.join(path, mainFile)
+            if os.path.isfile(f):
+                res.append(Submission(name, f))
+    return res
+
+def submissionArgs(sub: Submission, testFile: str, extraArgs: list[str]) -> list[str]:
+    return ['--quiet', '--no-clear', '--check', '--test-file', testFile] + extraArgs + [sub.file]
+
+def _runChild(args: list[str], outFd: int, resultFd: int, memoryLimitMb: Optional[int],
+              mainGlobals: dict) -> int:
+    from . import daemon, runCode, runner
+    results: dict = {}
+    def onResults(student: dict, tutor: dict):
+        results['student'] = student
+        results['tutor'] = tutor
+    runCode.setCheckResultsListener(onResults)
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    daemon.setupStdStreams([devnull, outFd, os.dup(outFd)])
+    # Keep stdout and stderr in the same order as on a terminal
+    sys.stdout.reconfigure(line_buffering=True)
+    if memoryLimitMb is not None:
+        import resource
+        limit = memoryLimitMb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    exitCode = 0
+    try:
+        runner.main(mainGlobals, args)
+    except SystemExit as e:
+        exitCode = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except BaseException:
+        import traceback
+        traceback.print_exc()
+        exitCode = 1
+    finally:
+        for f in [sys.stdout, sys.stderr]:
+            try:
+                f.flush()
+            except (OSError, ValueError):
+                pass
+    results['exitCode'] = exitCode
+    os.write(resultFd, json.dumps(results).encode('utf-8'))
+    return exitCode
+
+@dataclass
+class _Running:
+    submission: Submission
+    pid: int
+    resultFd: int
+    # None after the output pipe has been closed
+    outFd: Optional[int]
+    start: float
+    data: bytes = b''
+    output: bytearray = field(default_factory=bytearray)
+    truncated: bool = False
+
+    def addOutput(self, chunk: bytes):
+        room = MAX_OUTPUT_BYTES - len(self.output)
+        if len(chunk) > room:
+            self.truncated = True
+            chunk = chunk[:room]
+        self.output += chunk
+
+def _startChild(sub: Submission, args: list[str], memoryLimitMb: Optional[int],
+                mainGlobals: dict) -> _Running:
+    (outR, outW) = os.pipe()
+    (r, w) = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        exitCode = 1
+        try:
+            os.setpgid(0, 0)
+            os.close(r)
+            os.close(outR)
+            exitCode = _runChild(args, outW, w, memoryLimitMb, mainGlobals)
+        finally:
+            parsecache.dumpStatsFromEnv()
+            os._exit(exitCode)
+    # Also set the group here, otherwise a timeout might come before the child has set it
+    try:
+        os.setpgid(pid, pid)
+    except OSError:
+        pass
+    os.close(w)
+    os.close(outW)
+    return _Running(sub, pid, r, outR, time.perf_counter())
+
+def _killGroup(r: _Running):
+    try:
+        os.killpg(r.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+def _drainOutput(r: _Running):
+    """Reads what is left in the output pipe without waiting for processes still holding it."""
+    assert r.outFd is not None
+    os.set_blocking(r.outFd, False)
+    try:
+        while chunk := os.read(r.outFd, 65536):
+            r.addOutput(chunk)
+    except BlockingIOError:
+        pass
+
+def _finishChild(sel: selectors.BaseSelector, r: _Running, timedOut: bool) -> Result:
+    sel.unregister(r.resultFd)
+    # The child has exited unless it timed out. The group still exists because the child
+    # has not been reaped, so this cannot hit an unrelated group.
+    _killGroup(r)
+    (_, status) = os.waitpid(r.pid, 0)
+    os.close(r.resultFd)
+    seconds = time.perf_counter() - r.start
+    if r.outFd is not None:
+        sel.unregister(r.outFd)
+        _drainOutput(r)
+        os.close(r.outFd)
+        r.outFd = None
+    output = r.output.decode('utf-8', errors='replace')
+    if r.truncated:
+        output += f'\n[output truncated after {MAX_OUTPUT_BYTES} bytes]\n'
+    try:
+        res = json.loads(r.data)
+    except ValueError:
+        res = {}
+    exitCode = res.get('exitCode')
+    if exitCode is None and os.WIFEXITED(status):
+        exitCode = os.WEXITSTATUS(status)
+    student = res.get('student')
+    tutor = res.get('tutor')
+    if timedOut:
+        st = 'timeout'
+    elif student is None:
+        st = 'crashed'
+    elif exitCode == 0:
+        st = 'ok'
+    else:
+        st = 'failed'
+    return Result(r.submission, st, exitCode, seconds, student, tutor, output)
+
+def runBatch(subs: list[Submission], testFile: str, extraArgs: list[str], jobs: int,
+             timeout: Optional[float], memoryLimitMb: Optional[int],
+             mainGlobals: dict) -> list[Result]:
+    from . import daemon
+    daemon.preload()
+    pending = list(reversed(subs))
+    running: dict[int, _Running] = {}
+    results: dict[str, Result] = {}
+    sel = selectors.DefaultSelector()
+    try:
+        while pending or running:
+            while pending and len(running) < jobs:
+                sub = pending.pop()
+                r = _startChild(sub, submissionArgs(sub, testFile, extraArgs), memoryLimitMb,
+                                mainGlobals)
+                running[r.resultFd] = r
+                sel.register(r.resultFd, selectors.EVENT_READ, r)
+                sel.register(r.outFd, selectors.EVENT_READ, r)
+            wait = None
+            if timeout is not None:
+                now = time.perf_counter()
+                wait = max(0.0, min(r.start + timeout for r in running.values()) - now)
+            for (key, _) in sel.select(wait):
+                if sel.get_map().get(key.fd) is not key:
+                    continue # closed by _finishChild during this iteration
+                r = key.data
+                chunk = os.read(key.fd, 65536)
+                if key.fd == r.outFd:
+                    if chunk:
+                        r.addOutput(chunk)
+                    else:
+                        sel.unregister(key.fd)
+                        os.close(key.fd)
+                        r.outFd = None
+                elif chunk:
+                    r.data += chunk
+                else:
+                    del running[key.fd]
+                    results[r.submission.file] = _finishChild(sel, r, False)
+            if timeout is not None:
+                now = time.perf_counter()
+                for r in [r for r in running.values() if now - r.start >= timeout]:
+                    del running[r.resultFd]
+                    results[r.submission.file] = _finishChild(sel, r, True)
+    finally:
+        # The children do not get the SIGINT of the terminal, they are in their own groups
+        for r in running.values():
+            _killGroup(r)
+        sel.close()
+    return [results[s.file] for s in subs]
+
+def summaryJson(testFile: str, results: list[Result]) -> dict:
+    counts = {st: 0 for st in ['ok', 'failed', 'crashed', 'timeout']}
+    for r in results:
+        counts[r.status] += 1
+    return {'testFile': testFile, 'submissions': len(results), **counts,
+            'results': [r.toJson() for r in results]}
+
+def writeJunit(path: str, testFile: str, results: list[Result]):
+    import xml.etree.ElementTree as ET
+    failures = sum(1 for r in results if r.status == 'failed')
+    errors = len(results) - failures - sum(1 for r in results if r.status == 'ok')
+    suite = ET.Element('testsuite', name=testFile, tests=str(len(results)),
+                       failures=str(failures), errors=str(errors),
+                       time=f'{sum(r.seconds for r in results):.3f}')
+    for r in results:
+        case = ET.SubElement(suite, 'testcase', classname='wypp', name=r.submission.name,
+                             time=f'{r.seconds:.3f}')
+        if r.status != 'ok':
+            tag = 'failure' if r.status == 'failed' else 'error'
+            msg = r.status
+            if r.student is not None and r.tutor is not None:
+                msg = f"student: {r.student['failing']}/{r.student['total']} failing, " \
+                      f"tutor: {r.tutor['failing']}/{r.tutor['total']} failing"
+            ET.SubElement(case, tag, message=msg)
+        ET.SubElement(case, 'system-out').text = r.output
+    root = ET.Element('testsuites')
+    root.append(suite)
+    ET.ElementTree(root).write(path, encoding='utf-8', xml_declaration=True)
+
+def main(args, restArgs: list[str], mainGlobals: dict):
+    if not hasattr(os, 'fork'):
+        printStderr('--batch is not supported on this platform')
+        utils.die(1)
+    batchDir = args.batch
+    if not os.path.isdir(batchDir):
+        printStderr(f'Directory {batchDir} does not exist')
+        utils.die(1)
+    if not args.testFile:
+        printStderr('--batch requires --test-file')
+        utils.die(1)
+    subs = findSubmissions(batchDir, args.file)
+    extraArgs = restArgs[:]
+    if not args.checkTypes:
+        extraArgs.append('--no-typechecking')
+    if args.typecheckBackend != 'decorator':
+        extraArgs += ['--typecheck-backend', args.typecheckBackend]
+    if args.lang:
+        extraArgs += ['--lang', args.lang]
+    if args.collectionCheck:
+        extraArgs += ['--collection-check', args.collectionCheck]
+    for d in args.extraDirs or []:
+        extraArgs += ['--extra-dir', d]
+    verbose(f'Grading {len(subs)} submissions in {batchDir} with {args.jobs} jobs')
+    results = runBatch(subs, args.testFile, extraArgs, max(1, args.jobs), args.timeout,
+                       args.memoryLimit, mainGlobals)
+    json.dump(summaryJson(args.testFile, results), sys.stdout, indent=2, ensure_ascii=False)
+    sys.stdout.write('\n')
+    if args.junit:
+        writeJunit(args.junit, args.testFile, results)
+    utils.die(0 if all(r.status == 'ok' for r in results) else 1)
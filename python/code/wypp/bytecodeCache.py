@@ -0,0 +1,154 @@
+# Persistent cache for the code objects of instrumented modules, see
+# instrument.InstrumentingLoader. Files are stored like .pyc files (magic number followed
+# by the marshalled code object) under a key that is the hash of the source code and of
+# everything else that influences the instrumented code.
+#
+# The cache directory is $WYPP_CACHE_DIR, or wypp/bytecode in the user's cache directory.
+# Setting WYPP_CACHE_DIR to the empty string disables the cache.
+#
+# The cache holds at most $WYPP_CACHE_ENTRIES entries and $WYPP_CACHE_BYTES bytes. Using an
+# entry updates its modification time, and the entries used least recently are removed
+# when the cache exceeds a limit. The cache is checked when an entry is stored, but at
+# most once per PRUNE_INTERVAL, so the limits might be exceeded for a short time.
+import hashlib
+import importlib.util
+import marshal
+import os
+import types
+from typing import Optional
+
+from .myLogging import *
+from . import utils
+from . import version
+
+CACHE_DIR_ENV_VAR = 'WYPP_CACHE_DIR'
+MAX_ENTRIES_ENV_VAR = 'WYPP_CACHE_ENTRIES'
+MAX_BYTES_ENV_VAR = 'WYPP_CACHE_BYTES'
+
+# Seconds between checks of the size of the cache
+PRUNE_INTERVAL = 60
+
+# Marker file, its modification time is the time of the last check
+_PRUNE_MARKER = 'last-prune'
+
+_MAGIC = importlib.util.MAGIC_NUMBER
+
+def cacheDir() -> Optional[str]:
+    d = utils.getEnv(CACHE_DIR_ENV_VAR, str, None)
+    if d is not None:
+        return d or None
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'wypp', 'bytecode')
+
+_toolFingerprint: Optional[str] = None
+
+def _getToolFingerprint() -> str:
+    """
+    Identifies the wypp version producing the instrumented code. The modification time of
+    the instrumenting code is included because the version is not always known.
+    """
+    global _toolFingerprint
+    if _toolFingerprint is None:
+        st = os.stat(os.path.join(os.path.dirname(__file__), 'instrument.py'))
+        _toolFingerprint = f'{version.readVersion()}:{st.st_mtime_ns}:{st.st_size}'
+    return _toolFingerprint
+
+def mkKey(source: bytes, path: str, typechecking: bool) -> str:
+    h = hashlib.sha256()
+    h.update(_MAGIC)
+    for s in [_getToolFingerprint(), path, str(typechecking)]:
+        h.update(s.encode('utf-8'))
+        h.update(b'\0')
+    h.update(source)
+    return h.hexdigest()
+
+def _cacheFile(d: str, key: str) -> str:
+    return os.path.join(d, key[:2], key[2:] + '.pyc')
+
+def load(key: str) -> Optional[types.CodeType]:
+    d = cacheDir()
+    if d is None:
+        return None
+    path = _cacheFile(d, key)
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    try:
+        # Mark as recently used
+        os.utime(path)
+    except OSError:
+        pass
+    if data[:len(_MAGIC)] != _MAGIC:
+        return None
+    try:
+        code = marshal.loads(data[len(_MAGIC):])
+    except (EOFError, ValueError, TypeError) as e:
+        debug(f'Invalid entry {key} in bytecode cache: {e}')
+        return None
+    return code if isinstance(code, types.CodeType) else None
+
+def store(key: str, code: types.CodeType):
+    d = cacheDir()
+    if d is None:
+        return
+    import tempfile
+    path = _cacheFile(d, key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first, so that concurrent runs never see partial files
+        (fd, tmp) = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(_MAGIC)
+                f.write(marshal.dumps(code))
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    except OSError as e:
+        debug(f'Could not write {path} to bytecode cache: {e}')
+        return
+    _pruneIfDue(d)
+
+def _pruneIfDue(d: str):
+    import time
+    marker = os.path.join(d, _PRUNE_MARKER)
+    try:
+        if time.time() - os.stat(marker).st_mtime < PRUNE_INTERVAL:
+            return
+    except OSError:
+        pass
+    try:
+        with open(marker, 'wb'):
+            pass
+    except OSError:
+        return
+    prune(d, utils.getEnv(MAX_ENTRIES_ENV_VAR, int, 2000),
+          utils.getEnv(MAX_BYTES_ENV_VAR, int, 256 * 1024 * 1024))
+
+def prune(d: str, maxEntries: int, maxBytes: int):
+    """Removes the least recently used entries until the cache in d is within the limits"""
+    entries = []
+    try:
+        for sub in os.scandir(d):
+            if not sub.is_dir(follow_symlinks=False):
+                continue
+            for entry in os.scandir(sub.path):
+                if entry.name.endswith('.pyc'):
+                    st = entry.stat(follow_symlinks=False)
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+    except OSError as e:
+        debug(f'Could not list bytecode cache {d}: {e}')
+        return
+    entries.sort(reverse=True)
+    (n, size) = (0, 0)
+    for (_, entrySize, path) in entries:
+        n += 1
+        size += entrySize
+        if n > maxEntries or size > maxBytes:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
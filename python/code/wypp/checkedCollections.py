@@ -0,0 +1,180 @@
+# Lists, dicts and sets that check the types of their elements when they are inserted.
+#
+#   xs = CheckedList[Point]([p1, p2])
+#   xs.append(p3)       # checks p3
+#
+# A checked collection carries its element types, so passing CheckedList[Point] to a
+# parameter of type list[Point] is accepted without walking the elements
+# (see myTypeguard.CARRIED_TYPES_ATTR). Plain lists are checked element by element on
+# every call and every return.
+from __future__ import annotations
+from typing import *
+
+from . import errors
+from . import location
+from . import myTypeguard
+from . import renderTy
+from . import stacktrace
+from . import typecheck
+from .utils import _call_with_frames_removed
+
+# The element types of a checked collection class, for example (int,) for CheckedList[int]
+# or (str, int) for CheckedDict[str, int]
+CARRIED_TYPES_ATTR = myTypeguard.CARRIED_TYPES_ATTR
+
+_typeCheckingEnabled = True
+
+def init(enableTypeChecking=True):
+    global _typeCheckingEnabled
+    _typeCheckingEnabled = enableTypeChecking
+
+_specialized: dict[tuple[type, tuple], type] = {}
+
+# Element types are evaluated when subscripting the collection class, so they do not
+# refer to any namespace
+_ns = myTypeguard.Namespaces.empty()
+
+def _specialize(cls: type, tys: tuple) -> type:
+    key = (cls, tys)
+    res = _specialized.get(key)
+    if res is None:
+        name = f'{cls.__name__}[{", ".join(renderTy.renderTy(t) for t in tys)}]'
+        res = type(name, (cls,), {CARRIED_TYPES_ATTR: tys, '__module__': cls.__module__,
+                                  '__qualname__': name})
+        _specialized[key] = res
+    return res
+
+def _checkValue(container: Any, what: Literal['element', 'key', 'value'], ty: Any, v: Any):
+    if not _typeCheckingEnabled or ty is Any:
+        return
+    res = myTypeguard.matchesTy(v, ty, _ns)
+    if not typecheck.handleMatchesTyResult(res, lambda: None):
+        fi = stacktrace.callerOutsideWypp()
+        loc = location.Loc.fromFrameInfo(fi) if fi else None
+        raise errors.WyppTypeError.containerElementError(type(container).__name__, what, ty,
+                                                         v, loc)
+
+def _checkElems(container: Any, ty: Any, xs: Iterable) -> list:
+    xs = list(xs)
+    for x in xs:
+        _checkValue(container, 'element', ty, x)
+    return xs
+
+class CheckedList(list):
+    """A list checking that its elements have the type given as CheckedList[T]."""
+    __wyppCarriedTypes__: tuple = (Any,)
+
+    def __class_getitem__(cls, ty: Any) -> type:
+        return _specialize(cls, (ty,))
+
+    def __init__(self, xs: Iterable = ()):
+        super().__init__(_call_with_frames_removed(_checkElems, self, self.__wyppCarriedTypes__[0], xs))
+
+    def append(self, x: Any):
+        _call_with_frames_removed(_checkValue, self, 'element', self.__wyppCarriedTypes__[0], x)
+        super().append(x)
+
+    def insert(self, i: SupportsIndex, x: Any):
+        _call_with_frames_removed(_checkValue, self, 'element', self.__wyppCarriedTypes__[0], x)
+        super().insert(i, x)
+
+    def extend(self, xs: Iterable):
+        super().extend(_call_with_frames_removed(_checkElems, self, self.__wyppCarriedTypes__[0], xs))
+
+    def __iadd__(self, xs: Iterable) -> Self:
+        self.extend(xs)
+        return self
+
+    def __add__(self, xs: list) -> Self: # type: ignore
+        res = self.copy()
+        res.extend(xs)
+        return res
+
+    def __setitem__(self, i: Any, x: Any):
+        ty = self.__wyppCarriedTypes__[0]
+        if isinstance(i, slice):
+            x = _call_with_frames_removed(_checkElems, self, ty, x)
+        else:
+            _call_with_frames_removed(_checkValue, self, 'element', ty, x)
+        super().__setitem__(i, x)
+
+    def copy(self) -> Self:
+        # The elements are already checked
+        res = type(self)()
+        list.extend(res, self)
+        return res
+
+class CheckedDict(dict):
+    """A dict checking that its keys and values have the types given as CheckedDict[K, V]."""
+    __wyppCarriedTypes__: tuple = (Any, Any)
+
+    def __class_getitem__(cls, tys: tuple[Any, Any]) -> type:
+        return _specialize(cls, tys)
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__()
+        self.update(*args, **kwargs)
+
+    def __setitem__(self, k: Any, v: Any):
+        (keyTy, valTy) = self.__wyppCarriedTypes__
+        _call_with_frames_removed(_checkValue, self, 'key', keyTy, k)
+        _call_with_frames_removed(_checkValue, self, 'value', valTy, v)
+        super().__setitem__(k, v)
+
+    def update(self, *args: Any, **kwargs: Any):
+        for (k, v) in dict(*args, **kwargs).items():
+            self[k] = v
+
+    def setdefault(self, k: Any, default: Any = None) -> Any:
+        if k not in self:
+            self[k] = default
+        return self[k]
+
+    def __ior__(self, other: Any) -> Self: # type: ignore
+        self.update(other)
+        return self
+
+    def __or__(self, other: Any) -> Self: # type: ignore
+        res = self.copy()
+        res.update(other)
+        return res
+
+    def copy(self) -> Self:
+        res = type(self)()
+        dict.update(res, self)
+        return res
+
+class CheckedSet(set):
+    """A set checking that its elements have the type given as CheckedSet[T]."""
+    __wyppCarriedTypes__: tuple = (Any,)
+
+    def __class_getitem__(cls, ty: Any) -> type:
+        return _specialize(cls, (ty,))
+
+    def __init__(self, xs: Iterable = ()):
+        super().__init__(_call_with_frames_removed(_checkElems, self, self.__wyppCarriedTypes__[0], xs))
+
+    def add(self, x: Any):
+        _call_with_frames_removed(_checkValue, self, 'element', self.__wyppCarriedTypes__[0], x)
+        super().add(x)
+
+    def update(self, *xss: Iterable):
+        for xs in xss:
+            super().update(_call_with_frames_removed(_checkElems, self, self.__wyppCarriedTypes__[0], xs))
+
+    def __ior__(self, xs: AbstractSet) -> Self: # type: ignore
+        self.update(xs)
+        return self
+
+    def symmetric_difference_update(self, xs: Iterable):
+        super().symmetric_difference_update(
+            _call_with_frames_removed(_checkElems, self, self.__wyppCarriedTypes__[0], xs))
+
+    def __ixor__(self, xs: AbstractSet) -> Self: # type: ignore
+        self.symmetric_difference_update(xs)
+        return self
+
+    def copy(self) -> Self:
+        res = type(self)()
+        set.update(res, self)
+        return res
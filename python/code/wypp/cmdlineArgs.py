@@ -1,11 +1,17 @@
 import argparse
+import os
 import sys
 
 from .myLogging import *
+from . import startupProfile
 from . import utils
 
-def parseCmdlineArgs(argList):
-    parser = argparse.ArgumentParser(description='Run Your Program!',
+# Stands for --startup-profile given after FILE, NUL cannot occur in real arguments
+_PROGRAM_STARTUP_PROFILE = '\0--startup-profile'
+
+def mkParser() -> argparse.ArgumentParser:
+    # No abbreviations, runYourProgram.py must recognize --startup-profile without the parser
+    parser = argparse.ArgumentParser(description='Run Your Program!', allow_abbrev=False,
                         formatter_class=argparse.RawTextHelpFormatter)
     parser.add_argument('--check-runnable', dest='checkRunnable', action='store_const',
                         const=True, default=False,
@@ -40,16 +46,62 @@ def parseCmdlineArgs(argList):
     parser.add_argument('--no-typechecking', dest='checkTypes', action='store_const',
                         const=False, default=True,
                         help='Do not check type annotations')
+    parser.add_argument('--typecheck-backend', dest='typecheckBackend', type=str,
+                        choices=['decorator', 'monitoring'], default='decorator',
+                        help='How to check type annotations of functions:\n' \
+                            'decorator: wrap each function (default)\n' \
+                            'monitoring: use sys.monitoring, avoids extra stack frames')
+    parser.add_argument('--collection-check', dest='collectionCheck', metavar='STRATEGY',
+                        type=str,
+                        help='How many elements of collections are type checked:\n' \
+                            'all: all elements (default)\n' \
+                            'budget:N: at most N elements per check\n' \
+                            'stride:N: at most N evenly spread elements per collection\n' \
+                            'adaptive:K:N: all elements for the first K checks of a\n' \
+                            '  parameter or return value, then like stride:N\n' \
+                            'Default: $WYPP_COLLECTION_CHECK or all')
+    parser.add_argument('--test-events-fd', dest='testEventsFd', metavar='FD', type=int,
+                        help='Write a JSON line for every check to file descriptor FD')
+    parser.add_argument('--startup-profile', dest='startupProfile', action='store_const',
+                        const=True, default=False,
+                        help='Print how long importing each module takes before FILE runs')
+    parser.add_argument('--daemon', dest='daemon', action='store_const',
+                        const=True, default=False,
+                        help='Start a daemon that runs programs for runViaDaemon.py.\n' \
+                            'The socket is $WYPP_DAEMON_SOCKET, $XDG_RUNTIME_DIR/wypp-daemon.sock\n' \
+                            'or $TMPDIR/wypp-UID/wypp-daemon.sock (TMPDIR defaults to /tmp)')
+    parser.add_argument('--batch', dest='batch', metavar='DIR', type=str,
+                        help='Grade all submissions in DIR with the tests in --test-file.\n' \
+                            'A submission is a python file in DIR or a subdirectory of DIR\n' \
+                            'containing FILE. Prints a JSON summary to stdout.')
+    parser.add_argument('--jobs', dest='jobs', type=int, default=os.cpu_count() or 1,
+                        help='Number of submissions graded in parallel with --batch')
+    parser.add_argument('--timeout', dest='timeout', metavar='SECONDS', type=float,
+                        help='Kill a submission graded with --batch after SECONDS')
+    parser.add_argument('--memory-limit', dest='memoryLimit', metavar='MB', type=int,
+                        help='Limit the memory of a submission graded with --batch')
+    parser.add_argument('--junit', dest='junit', metavar='XMLFILE', type=str,
+                        help='Also write the summary of --batch as JUnit XML')
     parser.add_argument('--repl', action='extend', type=str, nargs='+', default=[], dest='repls',
                         help='Run repl tests in the file given')
     parser.add_argument('file', metavar='FILE',
                         help='The file to run', nargs='?')
+    return parser
+
+def parseCmdlineArgs(argList):
+    parser = mkParser()
     if argList is None:
         argList = sys.argv[1:]
+    # After FILE, --startup-profile belongs to the program, see runYourProgram.py
+    i = startupProfile.fileIndex(argList)
+    if i is not None:
+        argList = argList[:i + 1] + [_PROGRAM_STARTUP_PROFILE if a == '--startup-profile' else a
+                                     for a in argList[i + 1:]]
     try:
         args, restArgs = parser.parse_known_args(argList)
     except SystemExit as ex:
         utils.die(ex.code)
+    restArgs = ['--startup-profile' if a == _PROGRAM_STARTUP_PROFILE else a for a in restArgs]
     if args.file and not args.file.endswith('.py'):
         printStderr(f'ERROR: file {args.file} is not a python file')
         utils.die()
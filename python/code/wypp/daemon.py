@@ -0,0 +1,183 @@
+# A long-running process that runs wypp programs on request, see runViaDaemon.py for the
+# client. The daemon imports wypp and its dependencies once. For every request, it forks a
+# child that runs the program with the arguments of the request, just like
+# runYourProgram.py would do. The child starts with the modules preloaded, but no module of
+# the student has been loaded yet.
+#
+# Protocol: the client connects to the Unix domain socket of the daemon and sends one
+# request as a line of JSON, together with its stdin, stdout and stderr file descriptors
+# (SCM_RIGHTS). The child uses these descriptors as its own standard streams, so the output
+# goes directly to the client. When the program has finished, the child sends a line
+# of JSON with the exit code and closes the connection.
+#
+#   request:  {"args": [...], "cwd": "...", "env": {...}}
+#   response: {"exitCode": 0}
+#
+# The socket lives in a directory that only the current user can access (by default
+# $XDG_RUNTIME_DIR, otherwise wypp-<uid> in the temp directory), because the client
+# hands its environment and file descriptors to whoever listens on the socket.
+#
+# The daemon only works on systems supporting fork and Unix domain sockets.
+import json
+import locale
+import os
+import signal
+import socket
+import stat
+import sys
+from typing import *
+
+from .myLogging import *
+from . import parsecache
+from . import utils
+
+SOCKET_ENV_VAR = 'WYPP_DAEMON_SOCKET'
+
+# Keep in sync with runViaDaemon.py
+def defaultSocketPath() -> str:
+    d = os.environ.get('XDG_RUNTIME_DIR')
+    if not d or not os.path.isdir(d):
+        d = os.path.join(os.environ.get('TMPDIR') or '/tmp', f'wypp-{os.getuid()}')
+    return os.path.join(d, 'wypp-daemon.sock')
+
+# Keep in sync with runViaDaemon.py
+def checkPrivateDir(d: str) -> Optional[str]:
+    """Returns an error message if d is not a directory accessible only by the current user."""
+    try:
+        st = os.lstat(d)
+    except OSError as e:
+        return f'cannot access {d}: {e}'
+    if not stat.S_ISDIR(st.st_mode):
+        return f'{d} is not a directory'
+    if st.st_uid != os.getuid():
+        return f'{d} is not owned by the current user'
+    if st.st_mode & 0o077:
+        return f'{d} is accessible by other users'
+    return None
+
+def socketPath() -> str:
+    return os.environ.get(SOCKET_ENV_VAR) or defaultSocketPath()
+
+def preload():
+    """Imports everything needed to run a program, so that the children do not have to."""
+    import typing_extensions
+    import typeguard
+    from . import exceptionHandler, instrument, interactive, replTester, runCode, \
+        typecheck, writeYourProgram
+    # Compile the regular expressions and the like used by the first type check
+    from .myTypeguard import matchesTy, Namespaces
+    matchesTy([1], list[int], Namespaces.empty())
+
+def serve(path: str, mainGlobals: dict):
+    if not hasattr(os, 'fork') or not hasattr(socket, 'AF_UNIX'):
+        printStderr('The wypp daemon is not supported on this platform')
+        utils.die(1)
+    d = os.path.dirname(os.path.abspath(path))
+    try:
+        os.makedirs(d, mode=0o700, exist_ok=True)
+    except OSError:
+        pass # reported by checkPrivateDir
+    err = checkPrivateDir(d)
+    if err:
+        printStderr(f'Refusing to start the wypp daemon: {err}')
+        utils.die(1)
+    preload()
+    if os.path.exists(path):
+        os.unlink(path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    oldUmask = os.umask(0o077) # only the current user may connect
+    try:
+        server.bind(path)
+    finally:
+        os.umask(oldUmask)
+    server.listen()
+    # Children are reaped automatically
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    # Remove the socket when terminated
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    verbose(f'wypp daemon listening on {path}')
+    try:
+        while True:
+            (conn, _) = server.accept()
+            pid = os.fork()
+            if pid == 0:
+                server.close()
+                signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                exitCode = 1
+                try:
+                    exitCode = handleRequest(conn, mainGlobals)
+                finally:
+                    parsecache.dumpStatsFromEnv()
+                    os._exit(exitCode)
+            conn.close()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        if os.path.exists(path):
+            os.unlink(path)
+
+def _receiveRequest(conn: socket.socket) -> tuple[dict, list[int]]:
+    data = b''
+    fds: list[int] = []
+    while not data.endswith(b'\n'):
+        (chunk, newFds, _, _) = socket.recv_fds(conn, 65536, 3)
+        if not chunk:
+            raise EOFError('connection closed before request was complete')
+        data += chunk
+        fds.extend(newFds)
+    return (json.loads(data), fds)
+
+def setupStdStreams(fds: list[int]):
+    for (i, fd) in enumerate(fds):
+        os.dup2(fd, i)
+        os.close(fd)
+    def reopen(fd: int, mode: str, errors: str):
+        return open(fd, mode, buffering=1 if os.isatty(fd) and mode == 'w' else -1,
+                    encoding=os.environ.get('PYTHONIOENCODING'), errors=errors, closefd=False)
+    sys.stdin = reopen(0, 'r', 'strict')
+    sys.stdout = reopen(1, 'w', 'strict')
+    sys.stderr = reopen(2, 'w', 'backslashreplace')
+
+def handleRequest(conn: socket.socket, mainGlobals: dict) -> int:
+    (req, fds) = _receiveRequest(conn)
+    if len(fds) != 3:
+        raise ValueError(f'Expected 3 file descriptors, got {len(fds)}')
+    os.environ.clear()
+    os.environ.update(req['env'])
+    os.chdir(req['cwd'])
+    try:
+        # Python does this on startup, see PEP 538
+        locale.setlocale(locale.LC_CTYPE, '')
+    except locale.Error:
+        pass
+    setupStdStreams(fds)
+    args = req['args']
+    if '--daemon' in args:
+        printStderr('Cannot start the wypp daemon via the wypp daemon')
+        return 1
+    from . import myLogging
+    myLogging.DEBUG = utils.getEnv('WYPP_DEBUG', bool, False)
+    from . import runner
+    exitCode = 0
+    try:
+        runner.main(mainGlobals, args)
+    except SystemExit as e:
+        exitCode = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except BaseException:
+        import traceback
+        traceback.print_exc()
+        exitCode = 1
+    finally:
+        for f in [sys.stdout, sys.stderr]:
+            try:
+                f.flush()
+            except (OSError, ValueError):
+                pass
+    try:
+        conn.sendall(json.dumps({'exitCode': exitCode}).encode('utf-8') + b'\n')
+        conn.close()
+    except OSError:
+        pass
+    return exitCode
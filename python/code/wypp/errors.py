@@ -286,6 +286,25 @@ class WyppTypeError(TypeError, WyppError):
             lines.append(attrLocR)
         raise WyppTypeError('\n'.join(lines))
 
+    @staticmethod
+    def containerElementError(containerName: str,
+                              what: Literal['element', 'key', 'value'],
+                              ty: Any,
+                              givenValue: Any,
+                              callLoc: Optional[location.Loc]) -> WyppTypeError:
+        lines = []
+        lines.append(renderGiven(givenValue, callLoc))
+        lines.append('')
+        lines.append(i18n.containerElemTy(containerName, what, renderTy(ty)))
+        if shouldReportTyMismatch(ty, type(givenValue)):
+            lines.append(i18n.realArgumentTy(renderTy(type(givenValue))))
+        if callLoc and (callLocR := renderLoc(callLoc)):
+            lines.append('')
+            lines.append(f'## {i18n.tr("File")} {callLoc.filename}')
+            lines.append(f'## {i18n.tr("Problematic call in line")} {callLoc.startLine}:\n')
+            lines.append(callLocR)
+        raise WyppTypeError('\n'.join(lines))
+
 class WyppAttributeError(AttributeError, WyppError):
     def __init__(self, msg: str, extraFrames: list[inspect.FrameInfo] = []):
         WyppError.__init__(self, extraFrames)
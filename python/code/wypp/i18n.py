@@ -110,6 +110,12 @@ DE = {
     'Cannot set attribute to value of type `{ty}`.':
         'Das Attribut kann nicht auf einen Wert vom Typ `{ty}` gesetzt werden.',
     'Problematic assignment in line': 'Fehlerhafte Zuweisung in Zeile',
+    'Collection `{container}` only accepts elements of type `{ty}`.':
+        'Die Collection `{container}` akzeptiert nur Elemente vom Typ `{ty}`.',
+    'Collection `{container}` only accepts keys of type `{ty}`.':
+        'Die Collection `{container}` akzeptiert nur Schlüssel vom Typ `{ty}`.',
+    'Collection `{container}` only accepts values of type `{ty}`.':
+        'Die Collection `{container}` akzeptiert nur Werte vom Typ `{ty}`.',
     'Attribute `{attrName}` of record `{recordName}` declared with type `{ty}`.':
         'Attribut `{attrName}` des Records `{recordName}` deklariert als Typ `{ty}`.',
 
@@ -360,6 +366,18 @@ def recordAttrDeclTy(recordName: str, attrName: str, ty: Any) -> str:
     return tr('Attribute `{attrName}` of record `{recordName}` declared with type `{ty}`.',
               recordName=recordName, attrName=attrName, ty=ty)
 
+def containerElemTy(container: str, what: str, ty: str) -> str:
+    match what:
+        case 'key':
+            return tr('Collection `{container}` only accepts keys of type `{ty}`.',
+                      container=container, ty=ty)
+        case 'value':
+            return tr('Collection `{container}` only accepts values of type `{ty}`.',
+                      container=container, ty=ty)
+        case _:
+            return tr('Collection `{container}` only accepts elements of type `{ty}`.',
+                      container=container, ty=ty)
+
 def unknownKeywordArgument(cn: location.CallableName, name: str) -> str:
     match cn.kind:
         case 'function':
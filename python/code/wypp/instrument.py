@@ -2,7 +2,6 @@ import ast
 from collections.abc import Buffer
 from contextlib import contextmanager
 import importlib
-import importlib.abc
 import importlib.machinery
 from importlib.machinery import ModuleSpec, SourceFileLoader
 from importlib.util import decode_source, spec_from_file_location
@@ -11,6 +10,7 @@ from os import PathLike
 import types
 from typing import *
 
+from . import bytecodeCache
 from . import errors
 from . import location
 from .myLogging import *
@@ -101,20 +101,28 @@ class InstrumentingLoader(SourceFileLoader):
         data: Buffer | str | ast.Module | ast.Expression | ast.Interactive,
         path: Buffer | str | PathLike[str] = "<string>",
     ) -> types.CodeType:
+        if isinstance(path, PathLike):
+            pathStr = str(path)
+        elif isinstance(path, str):
+            pathStr = path
+        else:
+            pathStr = "<input>"
+        # Instrumented code is only used with typechecking enabled
+        cacheKey = None
         if isinstance(data, (ast.Module, ast.Expression, ast.Interactive)):
             tree = data
         else:
             if isinstance(data, str):
                 source = data
+                cacheKey = bytecodeCache.mkKey(data.encode('utf-8'), pathStr, True)
             else:
                 source = decode_source(data)
+                cacheKey = bytecodeCache.mkKey(bytes(data), pathStr, True)
+            code = bytecodeCache.load(cacheKey)
+            if code is not None:
+                debug(f'Using cached instrumented code for {path!r}')
+                return code
             tree = utils._call_with_frames_removed(ast.parse, source, path, "exec")
-        if isinstance(path, PathLike):
-            pathStr = str(path)
-        elif isinstance(path, str):
-            pathStr = path
-        else:
-            pathStr = "<input>"
         tree = transformModule(tree, pathStr)
         ast.fix_missing_locations(tree)
 
@@ -125,9 +133,13 @@ class InstrumentingLoader(SourceFileLoader):
             "----------------------------------------------")
 
         code = utils._call_with_frames_removed(compile, tree, path, "exec", 0, dont_inherit=True)
+        if cacheKey is not None:
+            bytecodeCache.store(cacheKey, code)
         return code
 
-class InstrumentingFinder(importlib.abc.MetaPathFinder):
+# Implements importlib.abc.MetaPathFinder. It does not inherit from it because importing
+# importlib.abc also imports importlib.resources, which slows down startup.
+class InstrumentingFinder:
     def __init__(self, finder, modDir: str, modName: str, extraDirs: list[str]):
         self._origFinder = finder
         self.mainModName = modName
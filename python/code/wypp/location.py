@@ -4,10 +4,7 @@ import ast
 from dataclasses import dataclass
 import dis
 import inspect
-import linecache
-import os
 import sys
-import tokenize
 from typing import *
 
 from . import ansi
@@ -38,42 +35,15 @@ class EncodedBytes:
             b = self.bytes[key]
             return b.decode(self.encoding, errors='replace')
 
-@dataclass
-class EncodedByteLines:
-    bytes: list[bytes]
-    encoding: str
-
-_cache: dict[str, EncodedByteLines] = {}
 def getline(filename, lineno):
     """
     Returns a line of some source file as a bytearray. We use byte arrays because
     location offsets are byte offsets.
     """
-    p = os.path.normpath(os.path.abspath(filename))
-    if p in _cache:
-        lines = _cache[p]
-    else:
-        try:
-            with open(filename, 'rb') as f:
-                byteLines = f.readlines()
-        except Exception:
-            byteLines = []
-        i = 0
-        def nextLine() -> bytes:
-            nonlocal i
-            if i < len(byteLines):
-                x = byteLines[i]
-                i = i + 1
-                return x
-            else:
-                return b''
-        encoding, _ = tokenize.detect_encoding(nextLine)
-        lines = EncodedByteLines(byteLines, encoding)
-    if 1 <= lineno <= len(lines.bytes):
-        x = lines.bytes[lineno - 1].rstrip(b'\n')
-    else:
-        x = b''
-    return EncodedBytes(x, encoding)
+    sf = parsecache.getSource(filename)
+    if sf is None:
+        return EncodedBytes(b'', 'utf-8')
+    return EncodedBytes(sf.line(lineno), sf.encoding)
 
 @dataclass
 class Loc:
@@ -227,7 +197,7 @@ class StdCallableInfo(CallableInfo):
     def name(self):
         return self.__name
 
-    def _findDef(self) -> Optional[ast.FunctionDef | ast.AsyncFunctionDef]:
+    def _findDef(self) -> Optional[parsecache.FunDef]:
         m = FunMatcher(self.__name, self.__lineno)
         match self.kind:
             case 'function':
@@ -262,17 +232,7 @@ class StdCallableInfo(CallableInfo):
         node = self._findDef()
         if not node:
             return None
-        res = None
-        for arg in node.args.args + node.args.kwonlyargs:
-            if arg.arg == paramName:
-                res = arg
-                break
-        if res is None:
-            # Look in vararg and kwarg
-            if node.args.vararg and node.args.vararg.arg == paramName:
-                res = node.args.vararg
-            if node.args.kwarg and node.args.kwarg.arg == paramName:
-                res = node.args.kwarg
+        res = node.param(paramName)
         if res is None:
             return None
         else:
@@ -286,7 +246,7 @@ class StdCallableInfo(CallableInfo):
     def isAsync(self) -> bool:
         if self.__async is None:
             node = self._findDef()
-            self.__async = isinstance(node, ast.AsyncFunctionDef)
+            self.__async = node is not None and node.isAsync
         return self.__async
 
 def classFilename(cls) -> str | None:
@@ -369,3 +329,43 @@ def locationOfArgument(fi: inspect.FrameInfo, idxOrName: int | str) -> Optional[
                             return Loc(loc.filename, callStartLine, callStartCol,
                                             callEndLine, callEndCol)
     return loc
+
+# Number of positional arguments (None if there is a * argument), names of the keyword
+# arguments, and whether there is a ** argument
+CallShape = tuple[Optional[int], list[str], bool]
+
+def callShape(fi: inspect.FrameInfo) -> Optional[CallShape]:
+    """
+    Given a stack frame with a function call, returns the shape of the call. Returns None
+    if the call cannot be parsed.
+    """
+    p = fi.positions
+    if p is None or p.lineno is None or p.col_offset is None or p.end_col_offset is None:
+        return None
+    line = getline(fi.filename, p.lineno)
+    codeOfCall = line[p.col_offset:p.end_col_offset if p.end_lineno == p.lineno else len(line)]
+    try:
+        tree = ast.parse(codeOfCall)
+    except SyntaxError:
+        return None
+    match tree:
+        case ast.Module([ast.Expr(ast.Call(_fun, args, kwArgs))]):
+            nPos = None if any(isinstance(a, ast.Starred) for a in args) else len(args)
+            names = [k.arg for k in kwArgs if k.arg is not None]
+            return (nPos, names, len(names) != len(kwArgs))
+    return None
+    line = getline(fi.filename, p.lineno)
+    codeOfCall = line[p.col_offset:p.end_col_offset if p.end_lineno == p.lineno else len(line)]
+    try:
+        tree = ast.parse(codeOfCall)
+    except SyntaxError:
+        return None
+    match tree:
+        case ast.Module([ast.Expr(ast.Call(_fun, args, kwArgs))]):
+            if any(isinstance(a, ast.Starred) for a in args):
+                return None
+            names = [k.arg for k in kwArgs]
+            if None in names:
+                return None
+            return (len(args), cast(list[str], names))
+    return None
@@ -1,6 +1,12 @@
 # Wrapper module for typeguard. Do not import typeguard directly but always via myTypeguard
 from __future__ import annotations
-from dataclasses import dataclass
+import collections.abc
+import os
+import threading
+from dataclasses import dataclass, field
+from inspect import isclass
+import types
+import weakref
 # We externally adjust the PYTHONPATH so that the typeguard module can be resolved
 import typeguard  # type: ignore
 from typing import *
@@ -11,6 +17,8 @@ from .myLogging import *
 class Namespaces:
     globals: dict
     locals: dict
+    # Compiled checkers for types that must be resolved in this namespace, see getChecker
+    checkers: dict = field(default_factory=dict, compare=False, repr=False)
     @staticmethod
     def empty() -> Namespaces:
         return Namespaces({}, {})
@@ -23,19 +31,701 @@ class MatchesTyFailure:
 
 type MatchesTyResult = bool | MatchesTyFailure
 
-def matchesTy(a: Any, ty: Any, ns: Namespaces) -> MatchesTyResult:
+def matchesTy(a: Any, ty: Any, ns: Namespaces, site: Optional[CheckSite] = None) -> MatchesTyResult:
+    """
+    Checks whether a matches ty. The site is the place performing the check, it is
+    only used by the adaptive collection check strategy.
+    """
+    if _collectionCheckCfg.mode == 'all':
+        return _matchesTy(a, ty, ns, typeguard.CollectionCheckStrategy.ALL_ITEMS)
+    (samples, strategy) = _samplerFor(site, ty)
+    state = _state
+    old = state.samples
+    state.samples = samples
     try:
-        typeguard.check_type(a,
-                             ty,
-                             collection_check_strategy=typeguard.CollectionCheckStrategy.ALL_ITEMS,
-                             ns=(ns.globals, ns.locals))
-        return True
-    except typeguard.TypeCheckError as e:
-        return False
+        return _matchesTy(a, ty, ns, strategy)
+    finally:
+        state.samples = old
+
+def _matchesTy(a: Any, ty: Any, ns: Namespaces, strategy: Any) -> MatchesTyResult:
+    try:
+        if getChecker(ty, ns)(a):
+            return True
+    except Exception as e:
+        debug(f'Exception in compiled checker for type {ty}: {e}')
+    # The compiled checker may reject values that typeguard accepts. It also does not
+    # detect invalid types, so we ask typeguard before reporting a mismatch.
+    try:
+        return _slowMatches(a, ty, ns, strategy)
     except Exception as e:
         debug(f'Exception when checking type, ns={ns}: {e}')
         return MatchesTyFailure(e, ty)
 
+def _slowMatches(a: Any, ty: Any, ns: Namespaces,
+                 strategy: Any = typeguard.CollectionCheckStrategy.ALL_ITEMS) -> bool:
+    # Invalid types raise an exception, mismatches do not
+    return typeguard.matches_type(a,
+                                  ty,
+                                  collection_check_strategy=strategy,
+                                  collection_sample_size=_collectionCheckCfg.sampleSize,
+                                  ns=(ns.globals, ns.locals))
+
+#
+# Collection check strategies
+#
+# By default, all elements of a collection are checked on every check. For programs
+# working with large collections, the number of elements checked can be bounded:
+#
+#   all             check all elements (the default)
+#   budget:N        check at most N elements per check, nested collections included
+#   stride:N        check at most N elements per collection, evenly spread
+#   adaptive:K:N    every site (a parameter or a return type) checks all elements for its
+#                   first K checks, then it behaves like stride:N
+#
+# The strategy is configured by the --collection-check option or the environment variable
+# WYPP_COLLECTION_CHECK.
+#
+COLLECTION_CHECK_ENV_VAR = 'WYPP_COLLECTION_CHECK'
+
+@dataclass(frozen=True)
+class CollectionCheckCfg:
+    mode: Literal['all', 'budget', 'stride', 'adaptive'] = 'all'
+    sampleSize: int = 100
+    fullChecks: int = 10
+
+def parseCollectionCheckCfg(s: str) -> CollectionCheckCfg:
+    parts = s.strip().split(':')
+    try:
+        nums = [int(x) for x in parts[1:]]
+    except ValueError:
+        raise ValueError(f'Invalid collection check strategy: {s}')
+    if any(n < 1 for n in nums):
+        raise ValueError(f'Invalid collection check strategy: {s}')
+    match (parts[0], nums):
+        case ('all', []):
+            return CollectionCheckCfg('all')
+        case ('budget' | 'stride', [n]):
+            return CollectionCheckCfg(parts[0], sampleSize=n)
+        case ('budget' | 'stride', []):
+            return CollectionCheckCfg(parts[0])
+        case ('adaptive', [k, n]):
+            return CollectionCheckCfg('adaptive', sampleSize=n, fullChecks=k)
+        case ('adaptive', [k]):
+            return CollectionCheckCfg('adaptive', fullChecks=k)
+        case ('adaptive', []):
+            return CollectionCheckCfg('adaptive')
+    raise ValueError(f'Invalid collection check strategy: {s}')
+
+def _cfgFromEnv() -> CollectionCheckCfg:
+    s = os.environ.get(COLLECTION_CHECK_ENV_VAR)
+    if s:
+        try:
+            return parseCollectionCheckCfg(s)
+        except ValueError as e:
+            debug(str(e))
+    return CollectionCheckCfg()
+
+_collectionCheckCfg = _cfgFromEnv()
+
+def setCollectionCheckCfg(cfg: CollectionCheckCfg):
+    global _collectionCheckCfg
+    _collectionCheckCfg = cfg
+    _typeSites.clear()
+
+def getCollectionCheckCfg() -> CollectionCheckCfg:
+    return _collectionCheckCfg
+
+class CheckSite:
+    """A place checking values, counts its checks for the adaptive strategy."""
+    __slots__ = ('count',)
+    def __init__(self):
+        self.count = 0
+
+# Sites for checks without an explicit site, for example record attributes
+_typeSites: dict[Any, CheckSite] = {}
+
+def _allItems(xs: Iterable) -> Iterable:
+    return xs
+
+class _CheckState(threading.local):
+    def __init__(self):
+        # Iterates over the elements of a collection that the compiled checkers look at.
+        # Set by matchesTy for the duration of a check. Per thread, because checks in
+        # different threads may use different samplers.
+        self.samples: Callable[[Iterable], Iterable] = _allItems
+
+_state = _CheckState()
+
+def _budget(n: int) -> Callable[[Iterable], Iterable]:
+    left = n
+    def samples(xs: Iterable) -> Iterable:
+        nonlocal left
+        for x in xs:
+            if left <= 0:
+                return
+            left -= 1
+            yield x
+    return samples
+
+def _stride(n: int) -> Callable[[Iterable], Iterable]:
+    def samples(xs: Iterable) -> Iterable:
+        return typeguard._config.stride_samples(xs, n)
+    return samples
+
+def _samplerFor(site: Optional[CheckSite], ty: Any) -> tuple[Callable[[Iterable], Iterable], Any]:
+    cfg = _collectionCheckCfg
+    strategies = typeguard.CollectionCheckStrategy
+    match cfg.mode:
+        case 'budget':
+            return (_budget(cfg.sampleSize), strategies.BUDGET)
+        case 'stride':
+            return (_stride(cfg.sampleSize), strategies.STRIDE)
+        case 'adaptive':
+            if site is None:
+                try:
+                    site = _typeSites.get(ty)
+                    if site is None:
+                        site = CheckSite()
+                        _typeSites[ty] = site
+                except TypeError:
+                    # unhashable type
+                    return (_allItems, strategies.ALL_ITEMS)
+            site.count += 1
+            if site.count <= cfg.fullChecks:
+                return (_allItems, strategies.ALL_ITEMS)
+            return (_stride(cfg.sampleSize), strategies.STRIDE)
+    return (_allItems, strategies.ALL_ITEMS)
+
+#
+# Compiled checkers
+#
+# A checker is a function that decides whether a value matches a type. getChecker
+# resolves a type once into such a function, so that checking a value no longer pays
+# for interpreting the type via typeguard. A checker returning True is authoritative.
+# A checker returning False may be wrong for types not handled here, so matchesTy
+# always consults typeguard before reporting a mismatch.
+#
+type Checker = Callable[[Any], bool]
+
+_NoneType = type(None)
+
+# Checkers for types that do not depend on a namespace
+_checkers: dict[Any, tuple[Checker, bool]] = {}
+
+def getChecker(ty: Any, ns: Namespaces) -> Checker:
+    return _getChecker(ty, ns)[0]
+
+def _getChecker(ty: Any, ns: Namespaces) -> tuple[Checker, bool]:
+    """
+    Returns the checker for ty and whether the checker depends on the namespace ns.
+    Types containing forward references are resolved lazily in ns on first use, so
+    their checkers are cached per namespace.
+    """
+    try:
+        res = _checkers.get(ty)
+        if res is None:
+            res = ns.checkers.get(ty)
+    except TypeError:
+        # unhashable type such as Callable[[int], int]
+        return (_opaque(ty, ns), True)
+    if res is None:
+        res = _compile(ty, ns)
+        if res[1]:
+            ns.checkers[ty] = res
+        else:
+            _checkers[ty] = res
+    return res
+
+def _opaque(ty: Any, ns: Namespaces) -> Checker:
+    def check(v: Any) -> bool:
+        return _slowMatches(v, ty, ns)
+    return check
+
+def _lazy(resolve: Callable[[], Any], ns: Namespaces) -> Checker:
+    """
+    Checker for a type that can only be resolved when a value is checked, for example
+    a forward reference to a class defined later in the module. The type is resolved for
+    every check (resolutions are memoized), so that redefining a class is noticed.
+    """
+    resolved: Any = None
+    inner: Optional[Checker] = None
+    def check(v: Any) -> bool:
+        nonlocal resolved, inner
+        try:
+            ty = resolve()
+        except Exception:
+            # not resolvable yet, typeguard reports the problem
+            return False
+        if inner is None or ty is not resolved:
+            inner = getChecker(ty, ns)
+            resolved = ty
+        return inner(v)
+    return check
+
+def _stillResolved(resolved: list[tuple[Callable[[], Any], Any]]) -> bool:
+    """Whether all forward references still resolve to the same types"""
+    try:
+        for (resolve, ty) in resolved:
+            if resolve() is not ty:
+                return False
+    except Exception:
+        return False
+    return True
+
+def _isInstanceOf(cls: type) -> Checker:
+    def check(v: Any) -> bool:
+        return isinstance(v, cls)
+    return check
+
+def _isPlainClass(ty: type) -> bool:
+    """Whether values match ty exactly if they are instances of ty"""
+    return not (ty in typeguard._checkers.origin_type_checkers or
+                getattr(ty, '_is_protocol', False) or
+                typeguard._checkers.is_typeddict(ty) or
+                issubclass(ty, tuple))
+
+def _compileClass(ty: type, ns: Namespaces) -> tuple[Checker, bool]:
+    if ty is float:
+        return (_isInstanceOf((float, int)), False)
+    if ty is complex:
+        return (_isInstanceOf((complex, float, int)), False)
+    if getattr(ty, '_is_protocol', False):
+        return (_compileProtocol(ty, ns), True)
+    if not _isPlainClass(ty):
+        # typeguard has a special checker for these types. Values of exactly this type
+        # always match.
+        def check(v: Any) -> bool:
+            return type(v) is ty or _slowMatches(v, ty, ns)
+        return (check, True)
+    return (_isInstanceOf(ty), False)
+
+def _compileProtocol(ty: type, ns: Namespaces) -> Checker:
+    """
+    If all members of the protocol are methods, whether a value conforms only depends on
+    its class, unless the value shadows a method by an attribute of its own. Classes
+    known to conform are remembered until they are garbage collected.
+    """
+    # Keyed by the id of the class, the weak reference removes the entry. The flag tells
+    # whether instances of the class have a __dict__.
+    conforming: dict[int, tuple[weakref.ref, bool]] = {}
+    methods: Optional[frozenset[str]] = None
+    def check(v: Any) -> bool:
+        nonlocal methods
+        t = type(v)
+        if t is ty:
+            return True
+        entry = conforming.get(id(t))
+        if entry is not None and entry[0]() is t and (not entry[1] or _noOwnAttrs(v, methods)):
+            return True
+        if not _slowMatches(v, ty, ns):
+            return False
+        if methods is None:
+            (members, annotations) = typeguard._checkers.get_protocol_info(ty)
+            if any(m in annotations for m in members):
+                # the types of the attribute values must be checked for every value
+                return True
+            methods = frozenset(members)
+        if not isclass(v) and (entry is None or entry[0]() is not t):
+            key = id(t)
+            conforming[key] = (weakref.ref(t, lambda _: conforming.pop(key, None)),
+                               t.__dictoffset__ != 0)
+        return True
+    return check
+
+def _noOwnAttrs(v: Any, names: Optional[frozenset[str]]) -> bool:
+    d = getattr(v, '__dict__', None)
+    return not d or d.keys().isdisjoint(names) # type: ignore
+
+# Attribute of the classes in checkedCollections holding the types of their elements.
+# Checked collections validate their elements on insertion, so they match the
+# corresponding collection type without looking at the elements.
+CARRIED_TYPES_ATTR = '__wyppCarriedTypes__'
+
+def _compileSeq(cls: type | tuple[type, ...], elemTy: Any, ns: Namespaces) -> tuple[Checker, bool]:
+    if elemTy is Any:
+        return (_isInstanceOf(cls), False)
+    (elemCheck, nsDep) = _getChecker(elemTy, ns)
+    carried = (elemTy,)
+    def check(v: Any) -> bool:
+        if not isinstance(v, cls):
+            return False
+        if getattr(type(v), CARRIED_TYPES_ATTR, None) == carried:
+            return True
+        for x in _state.samples(v):
+            if not elemCheck(x):
+                return False
+        return True
+    return (_withVerdictCache(check, (elemTy,), ns), nsDep)
+
+def _compileMapping(cls: type, keyTy: Any, valTy: Any, ns: Namespaces) -> tuple[Checker, bool]:
+    if keyTy is Any and valTy is Any:
+        return (_isInstanceOf(cls), False)
+    (keyCheck, nsDep1) = _getChecker(keyTy, ns)
+    (valCheck, nsDep2) = _getChecker(valTy, ns)
+    carried = (keyTy, valTy)
+    def check(v: Any) -> bool:
+        if not isinstance(v, cls):
+            return False
+        if getattr(type(v), CARRIED_TYPES_ATTR, None) == carried:
+            return True
+        for k, x in _state.samples(v.items()):
+            if not keyCheck(k) or not valCheck(x):
+                return False
+        return True
+    return (check, nsDep1 or nsDep2)
+
+def _compileTuple(args: tuple, ns: Namespaces) -> tuple[Checker, bool]:
+    if len(args) == 2 and args[1] is Ellipsis:
+        return _compileSeq(tuple, args[0], ns)
+    if not args or args == ((),):
+        # tuple[()]
+        return (lambda v: isinstance(v, tuple) and len(v) == 0, False)
+    compiled = [_getChecker(a, ns) for a in args]
+    checks = tuple(c for (c, _) in compiled)
+    n = len(checks)
+    def check(v: Any) -> bool:
+        if not isinstance(v, tuple) or len(v) != n:
+            return False
+        for c, x in zip(checks, v):
+            if not c(x):
+                return False
+        return True
+    return (_withVerdictCache(check, args, ns), any(d for (_, d) in compiled))
+
+#
+# Verdict cache
+#
+# Tuples and frozensets cannot change. If checking them against a type only looks at
+# immutable data, a positive verdict stays valid as long as the object lives. Passing the
+# same large tree of tuples through a recursive function then costs a dict lookup per
+# call instead of a traversal of the tree. The cache holds strong references to the
+# objects (tuples do not support weak references), so its size is bounded. The size is
+# configured by the environment variable WYPP_VERDICT_CACHE, 0 disables the cache.
+#
+VERDICT_CACHE_ENV_VAR = 'WYPP_VERDICT_CACHE'
+
+def _verdictCacheSizeFromEnv() -> int:
+    s = os.environ.get(VERDICT_CACHE_ENV_VAR)
+    if s:
+        try:
+            return max(0, int(s))
+        except ValueError:
+            debug(f'Invalid value for {VERDICT_CACHE_ENV_VAR}: {s}')
+    return 4096
+
+_verdictCacheSize = _verdictCacheSizeFromEnv()
+
+# Maps (id of the value, id of the checker) to the value and the checker
+_verdicts: dict[tuple[int, int], tuple[Any, Checker]] = {}
+
+def setVerdictCacheSize(n: int):
+    global _verdictCacheSize
+    _verdictCacheSize = n
+    _verdicts.clear()
+
+_IMMUTABLE_CONTAINERS = (tuple, frozenset)
+
+def _withVerdictCache(check: Checker, elemTys: tuple, ns: Namespaces) -> Checker:
+    # None as long as the element types cannot be resolved
+    immutable: Optional[bool] = None
+    # Forward references among the element types and what they resolved to
+    resolved: list[tuple[Callable[[], Any], Any]] = []
+    def cached(v: Any) -> bool:
+        nonlocal immutable, resolved
+        if type(v) not in _IMMUTABLE_CONTAINERS or not _verdictCacheSize or \
+                _state.samples is not _allItems:
+            # a positive verdict of a sampled check must not be reused by a full check
+            return check(v)
+        if resolved and not _stillResolved(resolved):
+            # for example a redefined class, the verdicts might be wrong now
+            _verdicts.clear()
+            immutable = None
+        if immutable is None:
+            resolved = []
+            immutable = _isImmutableCheck(elemTys, ns, set(), resolved)
+        if not immutable:
+            return check(v)
+        key = (id(v), id(cached))
+        entry = _verdicts.get(key)
+        if entry is not None and entry[0] is v:
+            return True
+        if not check(v):
+            return False
+        if len(_verdicts) >= _verdictCacheSize:
+            _verdicts.clear()
+        _verdicts[key] = (v, cached)
+        return True
+    return cached
+
+def _isImmutableCheck(tys: Iterable, ns: Namespaces, seen: set[int],
+                      resolved: list[tuple[Callable[[], Any], Any]]) -> Optional[bool]:
+    """
+    Whether checking an immutable container against element types tys only looks at
+    immutable data: tuples, frozensets and the types of the elements. Records are checked
+    via isinstance, so their fields do not matter. None if some type cannot be resolved
+    yet. The forward references resolved on the way are added to resolved.
+    """
+    for ty in tys:
+        if id(ty) in seen:
+            # recursive type such as type Tree = tuple[Tree, int, Tree] | None
+            continue
+        seen.add(id(ty))
+        resolve = _resolver(ty, ns)
+        if resolve is not None:
+            try:
+                ty = resolve()
+            except Exception:
+                return None
+            resolved.append((resolve, ty))
+            res = _isImmutableCheck([ty], ns, seen, resolved)
+            if res is not True:
+                return res
+            continue
+        if ty is Any or ty is None or ty is _NoneType or ty is Ellipsis or ty == ():
+            continue
+        origin = get_origin(ty)
+        if origin is None:
+            if isclass(ty) and (ty is float or ty is complex or _isPlainClass(ty)):
+                continue
+            return False
+        args = get_args(ty)
+        if origin is Literal:
+            continue
+        if origin is Annotated:
+            args = args[:1]
+        elif not (origin is Union or origin is types.UnionType or origin is tuple or
+                  origin is frozenset):
+            return False
+        res = _isImmutableCheck(args, ns, seen, resolved)
+        if res is not True:
+            return res
+    return True
+
+def _compileUnion(args: tuple, ns: Namespaces) -> tuple[Checker, bool]:
+    compiled = [_getChecker(a, ns) for a in args]
+    dispatch = UnionDispatch(args, tuple(c for (c, _) in compiled), ns)
+    return (dispatch.check, any(d for (_, d) in compiled))
+
+# Classification of union members by _dispatchMembers: (cls, _ACCEPT_MEMBER) for members
+# matched by all instances of cls, (cls, checker) for members only matched by some
+# instances of cls. Members that may match values of any type use cls = object.
+def _ACCEPT_MEMBER(v: Any) -> bool:
+    return True
+
+
+# Entry of UnionDispatch.table for types matching a member of the union without further checks
+_ACCEPT: tuple[Checker, ...] = (_ACCEPT_MEMBER,)
+
+class UnionDispatch:
+    """
+    Checker for a union that dispatches on the type of the value. For each type seen,
+    the table holds the members that must be probed for values of this type, or _ACCEPT
+    if the type alone decides that the value matches. Members such as `int` or record
+    classes are decided by the type, members such as `list[int]` are only probed for
+    values whose type is a list, and members such as protocols are always probed.
+    The table is built once the forward references among the members resolve, and
+    rebuilt if they resolve to something else later, for example to a redefined class.
+    """
+    # The table is cleared when it grows beyond this size, for example because classes
+    # are created dynamically
+    MAX_TYPES = 256
+
+    def __init__(self, args: tuple, checks: tuple[Checker, ...], ns: Namespaces):
+        self.args = args
+        self.checks = checks
+        self.ns = ns
+        self.members: Optional[list[tuple[Any, Checker]]] = None
+        self.table: dict[type, tuple[Checker, ...]] = {}
+        # Forward references among the members and what they resolved to
+        self.resolved: list[tuple[Callable[[], Any], Any]] = []
+
+    def check(self, v: Any) -> bool:
+        if self.resolved and not _stillResolved(self.resolved):
+            self.members = None
+            self.table.clear()
+            self.resolved = []
+        probes = self.table.get(type(v))
+        if probes is None:
+            probes = self._probesFor(type(v))
+            if probes is None:
+                # Some member cannot be resolved yet, probe in declaration order
+                probes = self.checks
+            else:
+                if len(self.table) >= self.MAX_TYPES:
+                    self.table.clear()
+                self.table[type(v)] = probes
+        if probes is _ACCEPT:
+            return True
+        for c in probes:
+            if c(v):
+                return True
+        return False
+
+    def _probesFor(self, t: type) -> Optional[tuple[Checker, ...]]:
+        members = self._members()
+        if members is None:
+            return None
+        probes = []
+        for (cls, c) in members:
+            if issubclass(t, cls):
+                if c is _ACCEPT_MEMBER:
+                    return _ACCEPT
+                probes.append(c)
+        return tuple(probes)
+
+    def _members(self) -> Optional[list[tuple[Any, Checker]]]:
+        if self.members is None:
+            members: list[tuple[Any, Checker]] = []
+            resolved: list[tuple[Callable[[], Any], Any]] = []
+            try:
+                for a in self.args:
+                    _dispatchMembers(a, self.ns, members, resolved, 0)
+            except Exception:
+                return None
+            self.members = members
+            self.resolved = resolved
+        return self.members
+
+def _dispatchMembers(ty: Any, ns: Namespaces, out: list[tuple[Any, Checker]],
+                     resolved: list[tuple[Callable[[], Any], Any]], depth: int):
+    resolve = _resolver(ty, ns)
+    if resolve is not None:
+        # Raises if the forward reference cannot be resolved yet
+        ty = resolve()
+        resolved.append((resolve, ty))
+    if ty is Any:
+        out.append((object, _ACCEPT_MEMBER))
+        return
+    if ty is None or ty is _NoneType:
+        out.append((_NoneType, _ACCEPT_MEMBER))
+        return
+    origin = get_origin(ty)
+    if origin is Annotated:
+        _dispatchMembers(get_args(ty)[0], ns, out, resolved, depth)
+        return
+    if (origin is Union or origin is types.UnionType) and depth < 10:
+        for a in get_args(ty):
+            _dispatchMembers(a, ns, out, resolved, depth + 1)
+        return
+    checker = getChecker(ty, ns)
+    if origin is None and isclass(ty):
+        if ty is float or ty is complex or _isPlainClass(ty):
+            for cls in _NUMERIC_CLASSES.get(ty, (ty,)):
+                out.append((cls, _ACCEPT_MEMBER))
+            return
+    elif origin is tuple and ty is not Tuple:
+        out.append((tuple, checker))
+        return
+    elif origin in _SEQ_ORIGINS:
+        out.append((_SEQ_ORIGINS[origin], checker))
+        return
+    elif origin in _MAPPING_ORIGINS:
+        out.append((_MAPPING_ORIGINS[origin], checker))
+        return
+    out.append((object, checker))
+
+_NUMERIC_CLASSES: dict[type, tuple[type, ...]] = {
+    float: (float, int),
+    complex: (complex, float, int),
+}
+
+_SEQ_ORIGINS: dict[Any, type | tuple[type, ...]] = {
+    list: list,
+    collections.abc.Sequence: collections.abc.Sequence,
+    frozenset: frozenset,
+    set: collections.abc.Set,
+    collections.abc.Set: collections.abc.Set,
+}
+
+_MAPPING_ORIGINS: dict[Any, type] = {
+    dict: dict,
+    collections.abc.Mapping: collections.abc.Mapping,
+    collections.abc.MutableMapping: collections.abc.MutableMapping,
+}
+
+def resolveAnnotationStr(s: str, ns: Namespaces) -> Any:
+    """
+    Resolves a string annotation in ns. Raises an exception if the annotation cannot be
+    resolved (yet). Results are cached by typeguard per namespace.
+    """
+    return typeguard._checkers.resolve_annotation_str(s, ns.globals, ns.locals)
+
+def _resolver(ty: Any, ns: Namespaces) -> Optional[Callable[[], Any]]:
+    """
+    For types that can only be resolved later, such as forward references, returns a
+    function resolving the type in ns. Returns None for all other types.
+    """
+    if isinstance(ty, str):
+        if ty.isidentifier():
+            return _classResolver(ty, ns, lambda: resolveAnnotationStr(ty, ns))
+        return lambda: resolveAnnotationStr(ty, ns)
+    if isinstance(ty, ForwardRef):
+        memo = typeguard.TypeCheckMemo(ns.globals, ns.locals)
+        resolveRef = lambda: typeguard._checkers.resolve_forwardref(ty, memo)
+        if ty.__forward_arg__.isidentifier() and \
+                getattr(ty, '__forward_module__', None) is None:
+            return _classResolver(ty.__forward_arg__, ns, resolveRef)
+        return resolveRef
+    if isinstance(ty, TypeAliasType):
+        # The value of an alias is evaluated lazily and may contain forward references
+        return lambda: ty.__value__
+    return None
+
+def _classResolver(name: str, ns: Namespaces, resolve: Callable[[], Any]) -> Callable[[], Any]:
+    """
+    Resolver for a forward reference consisting of a single name. Checkers resolve
+    forward references for every check, a name referring to a class (the common case) is
+    resolved by a lookup in ns. Everything else is resolved by resolve.
+    """
+    (localns, globalns) = (ns.locals, ns.globals)
+    def resolveName() -> Any:
+        if localns and name in localns:
+            v = localns[name]
+        elif globalns and name in globalns:
+            v = globalns[name]
+        else:
+            return resolve()
+        return v if isclass(v) else resolve()
+    return resolveName
+
+def _compile(ty: Any, ns: Namespaces) -> tuple[Checker, bool]:
+    """
+    Compiles ty into a checker, mirroring typeguard.check_type_internal with the
+    ALL_ITEMS collection strategy.
+    """
+    if ty is Any:
+        return (lambda v: True, False)
+    if ty is None or ty is _NoneType:
+        return (lambda v: v is None, False)
+    resolve = _resolver(ty, ns)
+    if resolve is not None:
+        return (_lazy(resolve, ns), True)
+    origin = get_origin(ty)
+    if origin is None:
+        if isclass(ty):
+            return _compileClass(ty, ns)
+        return (_opaque(ty, ns), True)
+    args = get_args(ty)
+    if origin is Annotated:
+        return _getChecker(args[0], ns)
+    if origin is Union or origin is types.UnionType:
+        return _compileUnion(args, ns)
+    if origin is tuple:
+        if ty is Tuple:
+            return (_isInstanceOf(tuple), False)
+        return _compileTuple(args, ns)
+    if origin in _SEQ_ORIGINS and len(args) == 1:
+        return _compileSeq(_SEQ_ORIGINS[origin], args[0], ns)
+    if origin in _MAPPING_ORIGINS and len(args) == 2:
+        return _compileMapping(_MAPPING_ORIGINS[origin], args[0], args[1], ns)
+    if isclass(origin) and origin not in typeguard._checkers.origin_type_checkers and \
+            not getattr(origin, '_is_protocol', False) and \
+            not typeguard._checkers.is_typeddict(origin) and \
+            not issubclass(origin, tuple):
+        # parameterized generic class, typeguard only checks the class
+        return (_isInstanceOf(origin), False)
+    return (_opaque(ty, ns), True)
+
 def getTypeName(t: Any) -> str:
     res: str = typeguard._utils.get_type_name(t, ['__wypp__'])
     wyppPrefixes = ['wypp.writeYourProgram.']
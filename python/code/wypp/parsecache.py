@@ -1,147 +1,338 @@
 import ast
-from dataclasses import dataclass
-import linecache
+import atexit
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
 import os
+import sys
 from typing import *
 
+from .myLogging import *
+from . import sourceIndex
+from . import utils
+
+# The definitions of a file are indexed in a single traversal of its AST. The index only
+# keeps the source locations needed for error messages, not the tree itself.
+
+class NodeLoc(NamedTuple):
+    """Source location of an AST node, with the same attribute names as ast.AST"""
+    lineno: int
+    col_offset: int
+    end_lineno: Optional[int]
+    end_col_offset: Optional[int]
+
+    @staticmethod
+    def of(node: ast.expr | ast.stmt | ast.arg) -> 'NodeLoc':
+        return NodeLoc(node.lineno, node.col_offset, node.end_lineno, node.end_col_offset)
+
+class FunDef(NamedTuple):
+    name: str
+    lineno: int
+    firstlineno: int # line of the first decorator, if any
+    isAsync: bool
+    returns: Optional[NodeLoc]
+    params: tuple[tuple[str, NodeLoc], ...]
+
+    def param(self, name: str) -> Optional[NodeLoc]:
+        for (n, loc) in self.params:
+            if n == name:
+                return loc
+        return None
+
 def _firstLineOfFun(node: ast.FunctionDef | ast.AsyncFunctionDef) -> int:
     allLinenos = [node.lineno]
     for e in node.decorator_list:
         allLinenos.append(e.lineno)
     return min(allLinenos)
 
+def _mkFunDef(node: ast.FunctionDef | ast.AsyncFunctionDef) -> FunDef:
+    a = node.args
+    allArgs = a.posonlyargs + a.args + a.kwonlyargs
+    if a.vararg:
+        allArgs.append(a.vararg)
+    if a.kwarg:
+        allArgs.append(a.kwarg)
+    return FunDef(node.name,
+                  node.lineno,
+                  _firstLineOfFun(node),
+                  isinstance(node, ast.AsyncFunctionDef),
+                  NodeLoc.of(node.returns) if node.returns else None,
+                  tuple((x.arg, NodeLoc.of(x)) for x in allArgs))
+
 @dataclass(frozen=True)
 class FunMatcher:
     name: str
     firstlineno: Optional[int] = None
 
-    def matches(self, node: ast.FunctionDef | ast.AsyncFunctionDef) -> bool:
-        if node.name == self.name:
+    def matches(self, d: FunDef) -> bool:
+        if d.name == self.name:
             if self.firstlineno is not None:
-                return self.firstlineno == _firstLineOfFun(node)
+                return self.firstlineno == d.firstlineno
             else:
                 return True
         else:
             return False
 
+    def find(self, candidates: list[FunDef]) -> Optional[FunDef]:
+        """
+        Returns the matching candidate. None is returned if no or multiple candidates match.
+        """
+        results = [d for d in candidates if self.matches(d)]
+        if len(results) == 1:
+            return results[0]
+        else:
+            return None
+
+@dataclass
+class ClassDef:
+    name: str
+    methods: dict[str, list[FunDef]]
+    attrs: dict[str, list[NodeLoc]]
+
+@dataclass
+class DefIndex:
+    # Toplevel functions and functions nested in functions
+    funs: dict[str, list[FunDef]]
+    # Toplevel classes
+    classes: dict[str, list[ClassDef]]
+
+def _indexClass(node: ast.ClassDef) -> ClassDef:
+    cls = ClassDef(node.name, {}, {})
+    for stmt in node.body:
+        if isinstance(stmt, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            cls.methods.setdefault(stmt.name, []).append(_mkFunDef(stmt))
+        elif isinstance(stmt, ast.AnnAssign) and isinstance(stmt.target, ast.Name):
+            cls.attrs.setdefault(stmt.target.id, []).append(NodeLoc.of(stmt))
+    return cls
+
+def _indexStmts(nodes: list[ast.stmt], index: DefIndex, toplevel: bool):
+    for node in nodes:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            index.funs.setdefault(node.name, []).append(_mkFunDef(node))
+            _indexStmts(node.body, index, False)
+        elif toplevel and isinstance(node, ast.ClassDef):
+            index.classes.setdefault(node.name, []).append(_indexClass(node))
+
+def buildIndex(tree: ast.Module) -> DefIndex:
+    index = DefIndex({}, {})
+    _indexStmts(tree.body, index, True)
+    return index
+
 class AST:
 
-    def __init__(self, filename: str):
+    def __init__(self, filename: str, source: Optional[sourceIndex.SourceFile] = None):
         """
         Do not instantiate, use getAST
         """
         self.__filename = filename
-        self.__tree = None
-        self.__treeResolved = False
-        self.__cache = {}
-
-    def __ensureTree(self):
-        if self.__treeResolved:
-            return
-        lines = linecache.getlines(self.__filename)
-        try:
-            tree = ast.parse(''.join(lines))
-        except Exception:
-            tree = None
-        self.__tree = tree
-        self.__treeResolved = True
-
-    def _collectFuns(self, nodes: list[ast.stmt], m: FunMatcher, recursive: bool,
-                     results: list[ast.FunctionDef | ast.AsyncFunctionDef]):
-        for node in nodes:
-            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
-                if m.matches(node):
-                    results.append(node)
-                if recursive:
-                    self._collectFuns(node.body, m, True, results)
-
-    def _findFun(self, nodes: list[ast.stmt], m: FunMatcher, recursive: bool) -> ast.FunctionDef | ast.AsyncFunctionDef | None:
+        self.source = source if source is not None else sourceIndex.get(filename)
+        self.__index: Optional[DefIndex] = None
+
+    @property
+    def filename(self) -> str:
+        return self.__filename
+
+    def _index(self) -> DefIndex:
+        if self.__index is None:
+            tree = self.source.parse() if self.source else None
+            self.__index = buildIndex(tree) if tree else DefIndex({}, {})
+            _cache.indexBuilt(self)
+        return self.__index
+
+    def estimatedBytes(self) -> int:
+        """Memory used by the source and the index (if already built)"""
+        n = len(self.source.data) if self.source else 0
+        if self.__index is not None:
+            n += _deepSizeOf(self.__index.funs) + _deepSizeOf(self.__index.classes)
+        return n
+
+    def getFunDef(self, m: FunMatcher) -> Optional[FunDef]:
         """
-        Finds the function from the list of statements that matches m. None is returned
-        if no such function is found or if multiple matches are found.
+        Finds the function that matches m. None is returned if no such function
+        or multiple functions are found.
         """
-        results = []
-        self._collectFuns(nodes, m, recursive, results)
-        if len(results) == 1:
-            return results[0]
-        else:
-            return None
+        return m.find(self._index().funs.get(m.name, []))
 
-    def getFunDef(self, m: FunMatcher) -> ast.FunctionDef | ast.AsyncFunctionDef | None:
-        if m in self.__cache:
-            return self.__cache[m]
-        self.__ensureTree()
-        if self.__tree:
-            resultNode = self._findFun(self.__tree.body, m, True)
-        self.__cache[m] = resultNode
-        return resultNode
-
-    def _findClass(self, clsName: str) -> ast.ClassDef | None:
+    def _findClass(self, clsName: str) -> Optional[ClassDef]:
         """
         Finds the toplevel class with the given name. Returns None if no such class or
         multiple classes are found.
         """
-        targetClss = []
-        if self.__tree:
-            for node in self.__tree.body:
-                if isinstance(node, ast.ClassDef) and node.name == clsName:
-                    targetClss.append(node)
-        if len(targetClss) == 1:
-            return targetClss[0]
+        clss = self._index().classes.get(clsName, [])
+        if len(clss) == 1:
+            return clss[0]
         else:
             return None
 
-    def getRecordAttr(self, clsName: str, attrName: str) -> ast.AnnAssign | None:
+    def getRecordAttr(self, clsName: str, attrName: str) -> Optional[NodeLoc]:
         """
         Finds the attribute of the format `A: T` or `A: T = ...` with name attrName
         in a toplevel class with name clsName. Returns None if no such class/attribute
         comnbination or mutiples are found.
         """
-        key = (clsName, attrName)
-        if key in self.__cache:
-            return self.__cache[key]
-        self.__ensureTree()
-        # Step 1: find the class
         targetCls = self._findClass(clsName)
-        # Step 2: look for an AnnAssign like:   A: T = ...
-        annNodes = []
         if targetCls:
-            for stmt in targetCls.body:
-                if isinstance(stmt, ast.AnnAssign) and isinstance(stmt.target, ast.Name):
-                    if stmt.target.id == attrName:
-                        annNodes.append(stmt)
-        annNode = None
-        if len(annNodes) == 1:
-            annNode = annNodes[0]
-        self.__cache[key] = annNode
-        return annNode
-
-    def getMethodDef(self, clsName: str, m: FunMatcher) -> ast.FunctionDef | ast.AsyncFunctionDef | None:
+            attrs = targetCls.attrs.get(attrName, [])
+            if len(attrs) == 1:
+                return attrs[0]
+        return None
+
+    def getMethodDef(self, clsName: str, m: FunMatcher) -> Optional[FunDef]:
         """
         Finds the method in class clsName that matches m. None is returned if no such method
         or multiple methods are found.
         """
-        key = (clsName, m)
-        if key in self.__cache:
-            return self.__cache[key]
-        self.__ensureTree()
-        # Step 1: find the class
         targetCls = self._findClass(clsName)
-        # Step 2: look for the method
-        funNode = None
         if targetCls:
-            funNode = self._findFun(targetCls.body, m, False)
-        self.__cache[key] = funNode
-        # print(f'clsName={clsName}, m={m}, funNode={funNode}')
-        return funNode
+            return m.find(targetCls.methods.get(m.name, []))
+        return None
 
-_cache: dict[str, AST] = {}
+def _deepSizeOf(x: Any) -> int:
+    n = sys.getsizeof(x)
+    if isinstance(x, dict):
+        for (k, v) in x.items():
+            n += _deepSizeOf(k) + _deepSizeOf(v)
+    elif isinstance(x, (list, tuple)):
+        for y in x:
+            n += _deepSizeOf(y)
+    elif isinstance(x, ClassDef):
+        n += _deepSizeOf(x.methods) + _deepSizeOf(x.attrs)
+    return n
 
-def getAST(filename: str) -> AST:
-    filename = os.path.normpath(filename)
-    if filename not in _cache:
-        a = AST(filename)
-        _cache[filename] = a
+# The cache of ASTs is bounded by the number of entries and by the estimated number of
+# bytes of the entries. The least recently used entries are evicted first.
+MAX_ENTRIES_ENV_VAR = 'WYPP_PARSE_CACHE_ENTRIES'
+MAX_BYTES_ENV_VAR = 'WYPP_PARSE_CACHE_BYTES'
+# If set, statistics are appended as a JSON line to this file when the process exits
+STATS_ENV_VAR = 'WYPP_PARSE_CACHE_STATS'
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+    entries: int = 0
+    bytes: int = 0
+
+class AstCache:
+    """
+    LRU cache of ASTs, keyed by normalized filename. Do not instantiate, use getAST.
+    """
+    def __init__(self, maxEntries: Optional[int], maxBytes: Optional[int]):
+        self.maxEntries = maxEntries
+        self.maxBytes = maxBytes
+        self.stats = CacheStats()
+        self.__entries: OrderedDict[str, AST] = OrderedDict()
+        self.__sizes: dict[str, int] = {}
+
+    def get(self, filename: str) -> AST:
+        source = sourceIndex.get(filename)
+        key = sourceIndex.normPath(filename)
+        a = self.__entries.get(key)
+        if a is not None and a.source is source:
+            self.stats.hits += 1
+            self.__entries.move_to_end(key)
+            return a
+        self.stats.misses += 1
+        if a is not None:
+            # The file changed, sourceIndex already holds the new source
+            self._remove(key, dropSource=False)
+            self.stats.invalidations += 1
+        a = AST(filename, source)
+        self.__entries[key] = a
+        self._setSize(key, a.estimatedBytes())
+        self._evict()
         return a
-    else:
-        return _cache[filename]
+
+    def indexBuilt(self, a: AST):
+        key = sourceIndex.normPath(a.filename)
+        if self.__entries.get(key) is a:
+            self._setSize(key, a.estimatedBytes())
+            self._evict()
+
+    def _setSize(self, key: str, n: int):
+        self.stats.bytes += n - self.__sizes.get(key, 0)
+        self.__sizes[key] = n
+        self.stats.entries = len(self.__entries)
+
+    def _remove(self, key: str, dropSource: bool = True):
+        self.__entries.pop(key)
+        self.stats.bytes -= self.__sizes.pop(key)
+        self.stats.entries = len(self.__entries)
+        if dropSource:
+            sourceIndex.invalidate(key)
+
+    def _evict(self):
+        # The most recently used entry is never evicted
+        while len(self.__entries) > 1 and \
+                ((self.maxEntries is not None and len(self.__entries) > self.maxEntries) or
+                 (self.maxBytes is not None and self.stats.bytes > self.maxBytes)):
+            (key, _) = next(iter(self.__entries.items()))
+            self._remove(key)
+            self.stats.evictions += 1
+
+    def invalidate(self, filename: Optional[str] = None):
+        """
+        Removes filename (or all files if filename is None) from the cache, so that the
+        next access parses the file again.
+        """
+        if filename is None:
+            keys = list(self.__entries)
+        else:
+            keys = [sourceIndex.normPath(filename)]
+            sourceIndex.invalidate(filename)
+        for key in keys:
+            if key in self.__entries:
+                self._remove(key)
+                self.stats.invalidations += 1
+
+_cache = AstCache(utils.getEnv(MAX_ENTRIES_ENV_VAR, int, 256),
+                  utils.getEnv(MAX_BYTES_ENV_VAR, int, 64 * 1024 * 1024))
+
+def getAST(filename: str) -> AST:
+    """
+    Returns the AST of filename. The AST is recreated if the file changed since the
+    last call.
+    """
+    return _cache.get(filename)
+
+def getSource(filename: str) -> Optional[sourceIndex.SourceFile]:
+    """
+    Returns the source of filename. Sources are only kept together with their cache
+    entry, so they are evicted with it and counted in the statistics.
+    """
+    return _cache.get(filename).source
+
+def configureCache(maxEntries: Optional[int], maxBytes: Optional[int]):
+    """Sets the budget of the cache, None means unbounded."""
+    _cache.maxEntries = maxEntries
+    _cache.maxBytes = maxBytes
+    _cache._evict()
+
+def invalidate(filename: Optional[str] = None):
+    """
+    Invalidation hook for re-running programs: forgets the AST and the source of filename,
+    or of all files if filename is None.
+    """
+    _cache.invalidate(filename)
+    if filename is None:
+        sourceIndex.invalidate()
+
+def cacheStats() -> CacheStats:
+    return CacheStats(**asdict(_cache.stats))
+
+def dumpStats(out: TextIO):
+    import json # only needed if statistics are requested, keep startup fast
+    out.write(json.dumps({'pid': os.getpid(), **asdict(_cache.stats)}) + '\n')
+
+def dumpStatsFromEnv():
+    """Appends the statistics to the file given by WYPP_PARSE_CACHE_STATS, if set."""
+    path = utils.getEnv(STATS_ENV_VAR, str, None)
+    if path:
+        try:
+            with open(path, 'a') as f:
+                dumpStats(f)
+        except OSError as e:
+            warn(f'Cannot write parse cache statistics to {path}: {e}')
+
+atexit.register(dumpStatsFromEnv)
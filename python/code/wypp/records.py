@@ -1,5 +1,7 @@
 import dataclasses
+import functools
 import sys
+import types
 import typing
 
 from . import errors
@@ -14,6 +16,10 @@ EQ_ATTRS_ATTR = '__eqAttrs__'
 
 _typeCheckingEnabled = False
 
+# Records store their fields in __slots__ instead of a __dict__ where this is safe,
+# see canUseSlots. Saves memory for programs creating many small records.
+_useSlots = True
+
 def init(enableTypeChecking=True):
     global _typeCheckingEnabled
     _typeCheckingEnabled = enableTypeChecking
@@ -38,6 +44,40 @@ def _checkRecordAttr(cls: typing.Any,
                                                         loc)
     return v
 
+class _FieldTypes:
+    """
+    The types of the fields of a mutable record. They are resolved on the first assignment
+    because forward references are not available when the record is defined.
+    """
+    def __init__(self, cls: type, ns: myTypeguard.Namespaces):
+        self.cls = cls
+        self.ns = ns
+        self.types: typing.Optional[dict[str, typing.Any]] = None
+        # Filled by resolve: type(v) in fast[name] implies that v matches the type of field name
+        self.fast: dict[str, frozenset[type]] = {}
+        self.__locs: dict[str, typing.Optional[location.Loc]] = {}
+
+    def resolve(self) -> dict[str, typing.Any]:
+        if self.types is None:
+            types = typing.get_type_hints(self.cls, globalns=self.ns.globals,
+                                          localns=self.ns.locals, include_extras=True)
+            for (name, ty) in types.items():
+                try:
+                    ts = typecheck.fastTypes(ty, self.ns)
+                except TypeError:
+                    # unhashable type, matchesTy reports it
+                    ts = None
+                self.fast[name] = ts if ts is not None else frozenset()
+            self.types = types
+        return self.types
+
+    def loc(self, name: str) -> typing.Optional[location.Loc]:
+        """Source location of the type of the field, only needed for error messages"""
+        if name not in self.__locs:
+            info = location.RecordConstructorInfo(self.cls)
+            self.__locs[name] = info.getParamSourceLocation(name)
+        return self.__locs[name]
+
 def _patchDataClass(cls, mutable: bool, ns: myTypeguard.Namespaces):
     fieldNames = [f.name for f in dataclasses.fields(cls)]
     setattr(cls, EQ_ATTRS_ATTR, fieldNames)
@@ -47,35 +87,81 @@ def _patchDataClass(cls, mutable: bool, ns: myTypeguard.Namespaces):
 
     if mutable:
         # prevent new fields being added
-        fields = set(fieldNames)
-        info = location.RecordConstructorInfo(cls)
-        locs = {}
-        for name in fields:
+        for name in fieldNames:
             if not name in cls.__annotations__:
                 raise errors.WyppTypeError.noTypeAnnotationForRecordAttribute(name, cls.__name__)
-            else:
-                locs[name] = info.getParamSourceLocation(name)
-        types = None # lazily initialized because forward references are not available at this point
+        fieldTypes = _FieldTypes(cls, ns)
         oldSetattr = cls.__setattr__
         def _setattr(obj, name, v):
-            nonlocal types
-            if types is None:
-                types = typing.get_type_hints(cls, globalns=ns.globals, localns=ns.locals,
-                                              include_extras=True)
+            types = fieldTypes.resolve()
             if name in types:
-                ty = types[name]
-                tyLoc = locs[name]
-                v = _checkRecordAttr(cls, ns, name, ty, tyLoc, v)
+                v = _checkRecordAttr(cls, ns, name, types[name], fieldTypes.loc(name), v)
                 oldSetattr(obj, name, v)
             else:
                 raise errors.WyppAttributeError(f'Unknown attribute {name} for record {cls.__name__}')
-        setattr(cls, "__setattr__", lambda obj, k, v: _call_with_frames_removed(_setattr, obj, k, v))
+        fast = fieldTypes.fast
+        def __setattr__(obj, name, v):
+            # A single type lookup for values such as ints or records, all other values
+            # and unknown attributes take the slow path
+            ts = fast.get(name)
+            if ts is not None and type(v) in ts:
+                oldSetattr(obj, name, v)
+            else:
+                _call_with_frames_removed(_setattr, obj, name, v)
+        setattr(cls, "__setattr__", __setattr__)
     return cls
 
+def canUseSlots(cls: type) -> bool:
+    """
+    Slots are only used if they change nothing but the memory layout: all base classes must
+    use slots as well (otherwise instances have a __dict__ anyway) and the class must not
+    depend on the identity of the class object, which dataclasses replaces by a new class.
+    """
+    if '__slots__' in cls.__dict__:
+        return False
+    for base in cls.__mro__[1:-1]:
+        if '__slots__' not in base.__dict__:
+            return False
+    for x in cls.__dict__.values():
+        if isinstance(x, functools.cached_property):
+            # needs the __dict__ of the instance
+            return False
+        if isinstance(x, (staticmethod, classmethod)):
+            x = x.__func__
+        elif isinstance(x, property):
+            x = x.fget
+        code = getattr(x, '__code__', None)
+        if isinstance(code, types.CodeType) and '__class__' in code.co_freevars:
+            # super() without arguments would refer to the replaced class
+            return False
+    return True
+
+def _fixFrozenSlots(cls: type):
+    """
+    The __setattr__ and __delattr__ generated by dataclasses for frozen classes with slots
+    refer to the class before slots were added, so assigning an attribute that is not a field
+    raises a TypeError instead of FrozenInstanceError. Replaces them by working versions.
+    """
+    fieldNames = frozenset(f.name for f in dataclasses.fields(cls))
+    def __setattr__(self, name, value):
+        if type(self) is cls or name in fieldNames:
+            raise dataclasses.FrozenInstanceError(f'cannot assign to field {name!r}')
+        super(cls, self).__setattr__(name, value)
+    def __delattr__(self, name):
+        if type(self) is cls or name in fieldNames:
+            raise dataclasses.FrozenInstanceError(f'cannot delete field {name!r}')
+        super(cls, self).__delattr__(name)
+    for f in [__setattr__, __delattr__]:
+        f.__qualname__ = f'{cls.__qualname__}.{f.__name__}'
+        setattr(cls, f.__name__, f)
+
 def record(cls=None, mutable=False, globals={}, locals={}):
     ns = myTypeguard.Namespaces(globals, locals)
     def wrap(cls: type):
-        newCls = dataclasses.dataclass(cls, frozen=not mutable)
+        slots = _useSlots and canUseSlots(cls)
+        newCls = dataclasses.dataclass(cls, frozen=not mutable, slots=slots, weakref_slot=slots)
+        if slots and not mutable:
+            _fixFrozenSlots(newCls)
         if _typeCheckingEnabled:
             return utils._call_with_frames_removed(_patchDataClass, newCls, mutable, ns)
         else:
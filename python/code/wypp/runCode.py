@@ -4,7 +4,7 @@ import importlib
 import os
 import runpy
 import sys
-from typing import Optional
+from typing import Callable, Optional
 
 from .constants import *
 from .exceptionHandler import handleCurrentException
@@ -47,11 +47,10 @@ class RunSetup:
         if self.args is not None:
             sys.argv = self.args
         if self.installProfile:
-            self.originalProfile = sys.getprofile()
-            stacktrace.installProfileHook()
+            self.uninstallReturnTracking = stacktrace.installReturnTracking()
     def __exit__(self, exc_type, value, traceback):
         if self.installProfile:
-            sys.setprofile(self.originalProfile)
+            self.uninstallReturnTracking()
         if self.sysPathInserted:
             sys.path.remove(self.pathDir)
             self.sysPathInserted = False
@@ -109,17 +108,27 @@ def runStudentCode(fileToRun, globals, onlyCheckRunnable, doTypecheck=True, extr
             utils.die(0)
     return doRun()
 
+# Called with the student's and the tutor's test results by performChecks, see batch.py
+_checkResultsListener: Optional[Callable[[dict, dict], None]] = None
+
+def setCheckResultsListener(f: Optional[Callable[[dict, dict], None]]):
+    global _checkResultsListener
+    _checkResultsListener = f
+
 # globals already contain libDefs
 def runTestsInFile(testFile, globals, libDefs, doTypecheck=True, extraDirs=[]):
     printStderr()
     printStderr(f"Running tutor's tests in {testFile}")
     libDefs.resetTestCount()
-    runCode(testFile, globals, doTypecheck=doTypecheck, extraDirs=extraDirs)
+    loadingFailed = False
     try:
         runCode(testFile, globals, doTypecheck=doTypecheck, extraDirs=extraDirs)
     except:
-        handleCurrentException()
-    return libDefs.dict['printTestResults']('Tutor:  ')
+        handleCurrentException(exit=False)
+        loadingFailed = True
+    res = libDefs.dict['printTestResults']('Tutor:  ', loadingFailed)
+    res['loadingFailed'] = loadingFailed
+    return res
 
 # globals already contain libDefs
 def performChecks(check, testFile, globals, libDefs, doTypecheck=True, extraDirs=None, loadingFailed=False):
@@ -128,11 +137,14 @@ def performChecks(check, testFile, globals, libDefs, doTypecheck=True, extraDirs
         prefix = 'Student: '
     testResultsStudent = libDefs.printTestResults(prefix, loadingFailed)
     if check:
-        testResultsInstr = {'total': 0, 'failing': 0}
+        testResultsInstr = {'total': 0, 'failing': 0, 'loadingFailed': False}
         if testFile:
             testDir = os.path.dirname(testFile)
             with RunSetup(testDir):
                 testResultsInstr = runTestsInFile(testFile, globals, libDefs, doTypecheck=doTypecheck,
                                                   extraDirs=extraDirs)
+        if _checkResultsListener is not None:
+            _checkResultsListener(testResultsStudent, testResultsInstr)
         failingSum = testResultsStudent['failing'] + testResultsInstr['failing']
-        utils.die(0 if failingSum < 1 else 1)
+        ok = failingSum < 1 and not testResultsInstr['loadingFailed']
+        utils.die(0 if ok else 1)
@@ -0,0 +1,105 @@
+# Runs a python file via the wypp daemon (see daemon.py), accepts the same arguments as
+# runYourProgram.py. Falls back to runYourProgram.py if the daemon is not running.
+#
+# This file must not import anything from wypp, so that it starts fast.
+#
+# The client sends its environment and file descriptors to the daemon, so it only talks to
+# a socket owned by the current user in a directory that no other user can access.
+import json
+import os
+import socket
+import stat
+import struct
+import sys
+
+SOCKET_ENV_VAR = 'WYPP_DAEMON_SOCKET'
+
+# Keep in sync with daemon.py
+def defaultSocketPath() -> str:
+    d = os.environ.get('XDG_RUNTIME_DIR')
+    if not d or not os.path.isdir(d):
+        d = os.path.join(os.environ.get('TMPDIR') or '/tmp', f'wypp-{os.getuid()}')
+    return os.path.join(d, 'wypp-daemon.sock')
+
+# Keep in sync with daemon.py
+def checkPrivateDir(d: str) -> str | None:
+    """Returns an error message if d is not a directory accessible only by the current user."""
+    try:
+        st = os.lstat(d)
+    except OSError as e:
+        return f'cannot access {d}: {e}'
+    if not stat.S_ISDIR(st.st_mode):
+        return f'{d} is not a directory'
+    if st.st_uid != os.getuid():
+        return f'{d} is not owned by the current user'
+    if st.st_mode & 0o077:
+        return f'{d} is accessible by other users'
+    return None
+
+def checkSocket(path: str) -> str | None:
+    """Returns an error message if the socket at path may belong to another user."""
+    err = checkPrivateDir(os.path.dirname(os.path.abspath(path)))
+    if err:
+        return err
+    st = os.lstat(path)
+    if not stat.S_ISSOCK(st.st_mode) or st.st_uid != os.getuid():
+        return f'{path} is not a socket owned by the current user'
+    return None
+
+def checkPeer(conn: socket.socket) -> str | None:
+    """Returns an error message if the process listening on conn runs as another user."""
+    if not hasattr(socket, 'SO_PEERCRED'):
+        return None # the owner of the socket and its directory has been checked already
+    creds = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+    (_pid, uid, _gid) = struct.unpack('3i', creds)
+    if uid != os.getuid():
+        return 'the wypp daemon runs as another user'
+    return None
+
+def connect() -> socket.socket | None:
+    if not hasattr(socket, 'AF_UNIX'):
+        return None
+    path = os.environ.get(SOCKET_ENV_VAR) or defaultSocketPath()
+    if not os.path.exists(path):
+        return None
+    err = checkSocket(path)
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    if not err:
+        try:
+            conn.connect(path)
+        except OSError:
+            conn.close()
+            return None
+        err = checkPeer(conn)
+    if err:
+        conn.close()
+        sys.stderr.write(f'Not using the wypp daemon: {err}\n')
+        return None
+    return conn
+
+def runInProcess(args: list[str]):
+    runYourProgram = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'runYourProgram.py')
+    os.execv(sys.executable, [sys.executable, runYourProgram] + args)
+
+def main(args: list[str]) -> int:
+    conn = connect()
+    if conn is None:
+        runInProcess(args)
+    assert conn is not None
+    req = {'args': args, 'cwd': os.getcwd(), 'env': dict(os.environ)}
+    with conn:
+        socket.send_fds(conn, [json.dumps(req).encode('utf-8') + b'\n'], [0, 1, 2])
+        data = b''
+        while True:
+            chunk = conn.recv(4096)
+            if not chunk:
+                break
+            data += chunk
+    try:
+        return json.loads(data)['exitCode']
+    except ValueError:
+        sys.stderr.write('Lost connection to the wypp daemon\n')
+        return 1
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -18,5 +18,14 @@ if __name__ == '__main__':
     codeDir = os.path.abspath(os.path.dirname(sourceDir))
     if codeDir not in sys.path:
         sys.path.insert(0, codeDir)
+    # Load the profiler before the wypp package, so that the imports of wypp are measured
+    import importlib.util
+    spec = importlib.util.spec_from_file_location('wypp.startupProfile',
+                                                  os.path.join(sourceDir, 'startupProfile.py'))
+    startupProfile = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = startupProfile
+    spec.loader.exec_module(startupProfile)
+    if startupProfile.requested(sys.argv[1:]):
+        startupProfile.install()
     import wypp.runner as r
     r.main(globals())
@@ -24,11 +24,10 @@ from . import cmdlineArgs
 from .constants import *
 from . import exceptionHandler
 from . import i18n
-from . import interactive
 from .myLogging import *
 from . import paths
-from . import replTester
 from . import runCode
+from . import typecheck
 from . import version as versionMod
 
 def printWelcomeString(file, version, doTypecheck):
@@ -61,11 +60,22 @@ def main(globals, argList=None):
             printStderr(f'Unsupported language {args.lang}. Supported: ' + ', '.join(i18n.allLanguages))
             sys.exit(1)
 
+    if args.daemon:
+        from . import daemon
+        daemon.serve(daemon.socketPath(), globals)
+        return
+
+    if args.batch:
+        from . import batch
+        batch.main(args, restArgs, globals)
+        return
+
     isInteractive = args.interactive
     version = versionMod.readVersion()
     fileToRun: str|None = args.file
     if fileToRun is None:
         if args.repls:
+            from . import replTester
             replTester.testRepls(args.repls, globals)
         return
     if not os.path.exists(fileToRun):
@@ -82,6 +92,25 @@ def main(globals, argList=None):
         printWelcomeString(fileToRun, version, doTypecheck=args.checkTypes)
 
     libDefs = runCode.prepareLib(onlyCheckRunnable=args.checkRunnable, enableTypeChecking=args.checkTypes)
+    if args.collectionCheck:
+        from . import myTypeguard
+        try:
+            myTypeguard.setCollectionCheckCfg(
+                myTypeguard.parseCollectionCheckCfg(args.collectionCheck))
+        except ValueError as e:
+            printStderr(str(e))
+            sys.exit(1)
+    if args.checkTypes and args.typecheckBackend == 'monitoring':
+        if not typecheck.enableMonitoringBackend():
+            verbose('Monitoring backend not available, falling back to decorator backend')
+
+    if args.testEventsFd is not None:
+        from . import testEvents
+        testEvents.openFd(args.testEventsFd)
+
+    if args.startupProfile:
+        from . import startupProfile
+        startupProfile.report()
 
     runDir = os.path.dirname(fileToRun)
     with (runCode.RunSetup(runDir, [fileToRun] + restArgs),
@@ -104,9 +133,11 @@ def main(globals, argList=None):
                               extraDirs=args.extraDirs, loadingFailed=loadingFailed)
 
         if args.repls:
+            from . import replTester
             replTester.testRepls(args.repls, globals)
 
         if isInteractive:
+            from . import interactive
             interactive.enterInteractive(globals, args.checkTypes, loadingFailed)
 
 
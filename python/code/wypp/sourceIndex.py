@@ -0,0 +1,127 @@
+# Index of source files, shared by location (source lines for error messages) and
+# parsecache (definitions of a file). A file is read once and stays in the index until it
+# changes on disk (detected via its modification time and size).
+#
+# Lines are bytes because the column offsets of code locations are byte offsets.
+# Files are read into memory: a file mapped into memory raises SIGBUS when accessed after
+# the file has been truncated, for example while the student edits it.
+from __future__ import annotations
+import ast
+import linecache
+import os
+import tokenize
+from typing import *
+
+from .myLogging import *
+
+class SourceFile:
+    """
+    The content of a source file. Do not instantiate, use get.
+    """
+    def __init__(self, path: str, stamp: Optional[tuple[int, int]], data: bytes):
+        self.path = path
+        # (mtime in ns, size), None for sources not on disk
+        self.stamp = stamp
+        self.data = data
+        self.encoding = _detectEncoding(data)
+        self.__lineOffsets: Optional[list[int]] = None
+
+    def __repr__(self):
+        return f'SourceFile({self.path})'
+
+    def _lineOffsets(self) -> list[int]:
+        """Offset of the first byte of each line, plus the length of the data at the end"""
+        offsets = self.__lineOffsets
+        if offsets is None:
+            data = self.data
+            offsets = [0]
+            i = data.find(b'\n')
+            while i >= 0:
+                offsets.append(i + 1)
+                i = data.find(b'\n', i + 1)
+            if offsets[-1] != len(data):
+                offsets.append(len(data))
+            self.__lineOffsets = offsets
+        return offsets
+
+    def lineCount(self) -> int:
+        return len(self._lineOffsets()) - 1
+
+    def line(self, lineno: int) -> bytes:
+        """The line with the given number (starting at 1), without the trailing newline"""
+        offsets = self._lineOffsets()
+        if 1 <= lineno < len(offsets):
+            return self.data[offsets[lineno - 1]:offsets[lineno]].rstrip(b'\n')
+        else:
+            return b''
+
+    def parse(self) -> Optional[ast.Module]:
+        """
+        Parses the file, None if the file cannot be parsed. The tree is not kept,
+        parsecache indexes the definitions of the tree.
+        """
+        try:
+            return ast.parse(self.data, self.path)
+        except Exception:
+            return None
+
+def _detectEncoding(data: bytes) -> str:
+    # The encoding is declared in the first two lines (PEP 263)
+    end = 0
+    for _ in range(2):
+        i = data.find(b'\n', end)
+        end = len(data) if i < 0 else i + 1
+    it = iter(data[:end].splitlines(keepends=True))
+    try:
+        (encoding, _) = tokenize.detect_encoding(lambda: next(it, b''))
+    except SyntaxError:
+        encoding = 'utf-8'
+    return encoding
+
+_index: dict[str, SourceFile] = {}
+
+def normPath(path: str) -> str:
+    """The key of path in the index"""
+    return os.path.normpath(os.path.abspath(path))
+
+def _load(path: str, key: str) -> Optional[SourceFile]:
+    try:
+        with open(path, 'rb') as f:
+            st = os.fstat(f.fileno())
+            stamp = (st.st_mtime_ns, st.st_size)
+            data = f.read()
+        return SourceFile(key, stamp, data)
+    except OSError:
+        pass
+    # Not a file on disk, but maybe registered with linecache (for example by the REPL)
+    lines = linecache.getlines(path)
+    if lines:
+        return SourceFile(key, None, ''.join(lines).encode('utf-8'))
+    return None
+
+def get(path: str) -> Optional[SourceFile]:
+    """The SourceFile for path, or None if there is no such file"""
+    key = normPath(path)
+    sf = _index.get(key)
+    if sf is not None:
+        if sf.stamp is None:
+            return sf
+        try:
+            st = os.stat(key)
+            if (st.st_mtime_ns, st.st_size) == sf.stamp:
+                return sf
+        except OSError:
+            pass
+        debug(f'Source file {key} changed')
+        invalidate(key)
+    sf = _load(path, key)
+    if sf is not None:
+        _index[key] = sf
+    return sf
+
+def invalidate(path: Optional[str] = None):
+    """Removes path from the index, or all files if path is None"""
+    if path is None:
+        _index.clear()
+    else:
+        _index.pop(normPath(path), None)
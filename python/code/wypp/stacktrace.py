@@ -5,7 +5,8 @@ import sys
 import threading
 import traceback
 import types
-from typing import Optional, Any
+from typing import Optional, Any, Callable
+import weakref
 
 from .myLogging import *
 from . import utils
@@ -21,10 +22,33 @@ def tbToFrameList(tb: types.TracebackType) -> list[types.FrameType]:
 def isCallWithFramesRemoved(frame: types.FrameType):
     return frame.f_code.co_name == utils._call_with_frames_removed.__name__
 
+def isCallWithFramesAndCallerRemoved(frame: types.FrameType):
+    return frame.f_code.co_name == utils._call_with_frames_and_caller_removed.__name__
+
 def isCallWithNextFrameRemoved(frame: types.FrameType):
     return frame.f_code.co_name == utils._call_with_next_frame_removed.__name__
 
+# Code objects whose frames are removed from tracebacks, such as the wrappers of
+# typechecked functions. Cheaper than calling through _call_with_next_frame_removed.
+_hiddenCode: set[types.CodeType] = set()
+
+def hideFrames(code: types.CodeType):
+    _hiddenCode.add(code)
+
+# Results of isWyppFrame per code object. The result only depends on the module a frame
+# belongs to, and the code of a frame always belongs to the same module. Weak, so that the
+# cache does not keep the code of functions created at runtime alive.
+_isWyppCode: weakref.WeakKeyDictionary[types.CodeType, bool] = weakref.WeakKeyDictionary()
+
 def isWyppFrame(frame: types.FrameType):
+    code = frame.f_code
+    res = _isWyppCode.get(code)
+    if res is None:
+        res = _computeIsWyppFrame(frame)
+        _isWyppCode[code] = res
+    return res
+
+def _computeIsWyppFrame(frame: types.FrameType) -> bool:
     modName = frame.f_globals.get("__name__") or '__wypp__'
     fname = frame.f_code.co_filename
     directDir = os.path.basename(os.path.dirname(fname))
@@ -53,28 +77,50 @@ def limitTraceback(frameList: list[types.FrameType],
             if isCallWithFramesRemoved(frameList[i]):
                 endIdx = i - 1
                 break
+            if isCallWithFramesAndCallerRemoved(frameList[i]):
+                endIdx = max(0, i - 2)
+                break
         frameList = frameList[:endIdx]
         # Step 2: remove those frames directly after _call_with_next_frame_removed
+        # and hidden frames
         toRemove = []
         for i in range(len(frameList)):
             if isCallWithNextFrameRemoved(frameList[i]):
                 toRemove.append(i)
         for i in reversed(toRemove):
             frameList = frameList[:i-1] + frameList[i+1:]
+        frameList = [f for f in frameList if f.f_code not in _hiddenCode]
         # Step 3: remove leading wypp or typeguard frames
         frameList = utils.dropWhile(frameList, lambda f: isWyppFrame(f) or isRunpyFrame(f))
     frameList = frameList + [f.frame for f in extraFrames]
     frames = [(f, f.f_lineno) for f in frameList]
     return traceback.StackSummary.extract(frames)
 
+_wyppDir = os.path.dirname(__file__)
+
+# Walks the stack frame by frame, only the frame found is turned into a FrameInfo (which
+# reads its source line).
 def callerOutsideWypp() -> Optional[inspect.FrameInfo]:
-    stack = inspect.stack()
-    d = os.path.dirname(stack[0].filename)
-    for f in stack:
-        if not isWyppFrame(f.frame) and not d == os.path.dirname(f.filename):
-            return f
+    frame: Optional[types.FrameType] = sys._getframe(1)
+    while frame is not None:
+        if not isWyppFrame(frame) and os.path.dirname(frame.f_code.co_filename) != _wyppDir:
+            return _frameInfoWithPositions(frame)
+        frame = frame.f_back
+    return None
+
+# Like callerOutsideWypp, but starts the search at the given frame
+def callerOutsideWyppFrom(frame: Optional[types.FrameType]) -> Optional[inspect.FrameInfo]:
+    while frame is not None:
+        if not isWyppFrame(frame):
+            return _frameInfoWithPositions(frame)
+        frame = frame.f_back
     return None
 
+def _frameInfoWithPositions(frame: types.FrameType) -> inspect.FrameInfo:
+    tb = inspect.getframeinfo(frame, context=1)
+    return inspect.FrameInfo(frame, tb.filename, tb.lineno, tb.function, tb.code_context,
+                             tb.index, positions=tb.positions)
+
 class ReturnTracker:
     def __init__(self, entriesToKeep: int):
         self.__returnFrames = deque(maxlen=entriesToKeep)   # a ring buffer
@@ -110,6 +156,100 @@ class ReturnTracker:
         else:
             return None
 
+class ReturnMonitor:
+    """
+    Records the frame of the most recent return from a watched code object. In contrast
+    to ReturnTracker, it uses sys.monitoring (PEP 669) with PY_RETURN events enabled
+    only for the code objects of typechecked functions. Calls of all other functions
+    do not pay for the monitoring. Works in all threads.
+    """
+    def __init__(self, toolId: int):
+        self.toolId = toolId
+        self.__local = threading.local()
+    def __call__(self, code: types.CodeType, offset: int, retval: Any):
+        accepts = _acceptReturn.get(code)
+        if accepts and all(accept(retval) for accept in accepts):
+            # The return value is fine, do not materialize the frame
+            self.__local.returnFrame = None
+        else:
+            # Frame 0 is this callback, frame 1 is the returning frame
+            self.__local.returnFrame = sys._getframe(1)
+    def watch(self, code: types.CodeType):
+        sys.monitoring.set_local_events(self.toolId, code, sys.monitoring.events.PY_RETURN)
+    def unwatch(self, code: types.CodeType):
+        sys.monitoring.set_local_events(self.toolId, code, 0)
+    def getReturnFrameType(self, idx: int) -> Optional[types.FrameType]:
+        # Callers ask right after the return of the wrapped function, so the index
+        # is irrelevant
+        return getattr(self.__local, 'returnFrame', None)
+    def getReturnFrame(self, idx: int) -> Optional[inspect.FrameInfo]:
+        return frameTypeToFrameInfo(self.getReturnFrameType(idx))
+
+# Code objects of all functions whose returns should be recorded by the ReturnMonitor.
+# Functions might be wrapped before the monitor is installed.
+_watchedCode: weakref.WeakSet[types.CodeType] = weakref.WeakSet()
+_returnMonitor: Optional[ReturnMonitor] = None
+
+# Predicates on the return values of watched code objects. The ReturnMonitor does not
+# record the frame of a return if all predicates accept the return value. There might be
+# several predicates for the same code object, for example for closures created by the
+# same def, and the monitor cannot tell which of them returned.
+_acceptReturn: dict[types.CodeType, list[Callable[[Any], bool]]] = {}
+
+def watchReturns(code: types.CodeType, accept: Optional[Callable[[Any], bool]] = None,
+                 owner: Any = None):
+    """
+    Records returns from code. The predicate accept is forgotten when owner is garbage
+    collected.
+    """
+    _watchedCode.add(code)
+    if accept is not None:
+        _acceptReturn.setdefault(code, []).append(accept)
+        weakref.finalize(owner, _forgetAccept, code, accept)
+    if _returnMonitor is not None:
+        _returnMonitor.watch(code)
+
+def _forgetAccept(code: types.CodeType, accept: Callable[[Any], bool]):
+    accepts = _acceptReturn.get(code)
+    if accepts is None:
+        return
+    for (i, a) in enumerate(accepts):
+        if a is accept:
+            del accepts[i]
+            break
+    if not accepts:
+        del _acceptReturn[code]
+
+def installReturnMonitor() -> Optional[ReturnMonitor]:
+    global _returnMonitor
+    if _returnMonitor is not None:
+        return _returnMonitor
+    mon = sys.monitoring
+    for toolId in [mon.PROFILER_ID, 3, 4]:
+        if mon.get_tool(toolId) is None:
+            break
+    else:
+        debug('No free sys.monitoring tool id, cannot install ReturnMonitor')
+        return None
+    mon.use_tool_id(toolId, 'wypp')
+    obj = ReturnMonitor(toolId)
+    mon.register_callback(toolId, mon.events.PY_RETURN, obj)
+    for code in _watchedCode:
+        obj.watch(code)
+    _returnMonitor = obj
+    return obj
+
+def uninstallReturnMonitor():
+    global _returnMonitor
+    obj = _returnMonitor
+    if obj is None:
+        return
+    _returnMonitor = None
+    for code in _watchedCode:
+        obj.unwatch(code)
+    sys.monitoring.register_callback(obj.toolId, sys.monitoring.events.PY_RETURN, None)
+    sys.monitoring.free_tool_id(obj.toolId)
+
 def frameTypeToFrameInfo(f: Optional[types.FrameType]) -> Optional[inspect.FrameInfo]:
     if f:
         tb = inspect.getframeinfo(f, context=1)
@@ -119,8 +259,8 @@ def frameTypeToFrameInfo(f: Optional[types.FrameType]) -> Optional[inspect.Frame
     else:
         return None
 
-# when using _call_with_next_frame_removed, we have to take the second-to-last
-# return. Hence, we keep the two most recent returns byn setting entriesToKeep = 2.
+# The wrappers of typechecked functions take the most recent return (index -1), right
+# after the wrapped function returned.
 def installProfileHook(entriesToKeep: int=2) -> ReturnTracker:
     obj = sys.getprofile()
     if isinstance(obj, ReturnTracker):
@@ -129,7 +269,18 @@ def installProfileHook(entriesToKeep: int=2) -> ReturnTracker:
     sys.setprofile(obj)
     return obj
 
-def getReturnTracker():
+# Installs the ReturnMonitor, or the ReturnTracker if sys.monitoring is not usable.
+# Returns a function for uninstalling.
+def installReturnTracking() -> Callable[[], None]:
+    if installReturnMonitor() is not None:
+        return uninstallReturnMonitor
+    originalProfile = sys.getprofile()
+    installProfileHook()
+    return lambda: sys.setprofile(originalProfile)
+
+def getReturnTracker() -> Optional[ReturnTracker | ReturnMonitor]:
+    if _returnMonitor is not None:
+        return _returnMonitor
     obj = sys.getprofile()
     if isinstance(obj, ReturnTracker):
         return obj
@@ -0,0 +1,107 @@
+# Support for the --startup-profile option. Measures how long importing each module takes
+# before the student's code starts, in the same format as python -X importtime.
+#
+# This module must not import anything from wypp: runYourProgram.py loads it before
+# the wypp package so that the imports of wypp itself are measured.
+import builtins
+import sys
+import time
+from typing import *
+
+# (name, depth, self time, cumulative time) in the order in which the imports finish
+_entries: list[tuple[str, int, float, float]] = []
+# Time spent in nested imports, one entry per import currently running
+_childTimes: list[float] = []
+_startTime: Optional[float] = None
+_originalImport = builtins.__import__
+
+# The options of cmdlineArgs.py taking a value, keep in sync
+_OPTIONS_WITH_VALUE = {'--lang', '--test-file', '--extra-dir', '--typecheck-backend',
+                       '--collection-check', '--test-events-fd', '--batch', '--jobs', '--timeout',
+                       '--memory-limit', '--junit'}
+
+def fileIndex(args: Sequence[str]) -> Optional[int]:
+    """
+    The index of FILE in the command line arguments of runYourProgram.py, found like
+    argparse does: FILE is the first argument that is neither an option nor the value
+    of an option.
+    """
+    i = 0
+    while i < len(args):
+        a = args[i]
+        if a == '--':
+            return i + 1 if i + 1 < len(args) else None
+        if not a.startswith('-') or a == '-':
+            return i
+        i += 1
+        if a in _OPTIONS_WITH_VALUE:
+            i += 1
+        elif a == '--repl':
+            while i < len(args) and not args[i].startswith('-'):
+                i += 1
+    return None
+
+def requested(args: Sequence[str]) -> bool:
+    """Whether --startup-profile is given before FILE, later it belongs to the program."""
+    i = fileIndex(args)
+    return '--startup-profile' in (args if i is None else args[:i])
+
+def _absName(name: str, globals: Optional[Mapping[str, Any]], level: int) -> str:
+    if level == 0:
+        return name
+    package = (globals or {}).get('__package__') or ''
+    parts = package.rsplit('.', level - 1)
+    base = parts[0]
+    return f'{base}.{name}' if name else base
+
+def _newModules(name: str, fromlist: Optional[Sequence[str]]) -> list[str]:
+    """The modules an import statement might load, which are not loaded yet."""
+    candidates = [name]
+    for x in fromlist or []:
+        if x != '*':
+            candidates.append(f'{name}.{x}')
+    return [m for m in candidates if m not in sys.modules]
+
+def _timedImport(name, globals=None, locals=None, fromlist=(), level=0):
+    candidates = _newModules(_absName(name, globals, level), fromlist)
+    if not candidates:
+        return _originalImport(name, globals, locals, fromlist, level)
+    _childTimes.append(0.0)
+    start = time.perf_counter()
+    try:
+        return _originalImport(name, globals, locals, fromlist, level)
+    finally:
+        cumulative = time.perf_counter() - start
+        children = _childTimes.pop()
+        if _childTimes:
+            _childTimes[-1] += cumulative
+        loaded = [m for m in candidates if m in sys.modules]
+        if loaded:
+            _entries.append((', '.join(loaded), len(_childTimes), cumulative - children, cumulative))
+
+def install():
+    global _startTime
+    _startTime = time.perf_counter()
+    builtins.__import__ = _timedImport
+
+def uninstall():
+    builtins.__import__ = _originalImport
+
+def isInstalled() -> bool:
+    return _startTime is not None
+
+def report(out: TextIO = sys.stderr):
+    if _startTime is None:
+        out.write('Startup profile not available, wypp was not started via runYourProgram.py\n')
+        return
+    uninstall()
+    out.write('import time: self [us] | cumulative | imported package\n')
+    for (name, depth, selfTime, cumulative) in _entries:
+        out.write(f'import time: {int(selfTime * 1e6):>9} | {int(cumulative * 1e6):>10} | ' +
+                  ('  ' * depth) + name + '\n')
+    total = time.perf_counter() - _startTime
+    importTotal = sum(cum for (_, depth, _, cum) in _entries if depth == 0)
+    out.write(f'Startup: {total * 1000:.1f} ms since runYourProgram.py started, ' +
+              f'{importTotal * 1000:.1f} ms of that for imports, ' +
+              f'{time.process_time() * 1000:.1f} ms CPU time since the process started\n')
+    out.flush()
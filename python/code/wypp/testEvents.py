@@ -0,0 +1,53 @@
+# Machine-readable stream of test events, see the --test-events-fd option. Every event is
+# one line of JSON, written as soon as it happens:
+#
+#   {"event": "check", "ok": false, "file": "test.py", "line": 3,
+#    "expected": "42", "actual": "41", "seconds": 0.0012}
+#   {"event": "fail", "ok": false, "file": "test.py", "line": 7, "message": "...", "seconds": 0.0001}
+#   {"event": "results", "prefix": "Tutor:  ", "total": 2, "failing": 1}
+#
+# "seconds" is the time since the previous event (or since the stream was opened), so it
+# includes computing the value under test.
+import time
+from typing import *
+
+_out: Optional[TextIO] = None
+_lastTime = 0.0
+
+# Limit for the length of expected and actual values
+MAX_REPR = 1000
+
+def openFd(fd: int):
+    global _out, _lastTime
+    _out = open(fd, 'w', encoding='utf-8', buffering=1, closefd=False)
+    _lastTime = time.perf_counter()
+
+def close():
+    global _out
+    if _out is not None:
+        _out.close()
+        _out = None
+
+def isEnabled() -> bool:
+    return _out is not None
+
+def shortRepr(x: Any) -> str:
+    s = repr(x)
+    if len(s) > MAX_REPR:
+        s = s[:MAX_REPR] + '...'
+    return s
+
+def emit(event: str, **fields: Any):
+    global _lastTime
+    if _out is None:
+        return
+    import json # only needed with --test-events-fd, keep startup fast
+    if event != 'results':
+        now = time.perf_counter()
+        fields['seconds'] = round(now - _lastTime, 6)
+        _lastTime = now
+    try:
+        _out.write(json.dumps({'event': event, **fields}, ensure_ascii=False) + '\n')
+    except OSError:
+        # The reader went away, do not disturb the program
+        close()
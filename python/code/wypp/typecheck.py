@@ -1,14 +1,18 @@
 from __future__ import annotations
 from collections.abc import Callable
-from dataclasses import dataclass
+import dataclasses
+from dataclasses import dataclass, field
 import inspect
+import sys
 import types
-from typing import ParamSpec, TypeVar, Any, Optional, Literal
+from typing import ParamSpec, TypeVar, Any, Mapping, Optional, Literal, Annotated, Union, \
+    ForwardRef, get_origin, get_args
 
 from . import errors
 from . import location
 from .myLogging import *
-from .myTypeguard import matchesTy, MatchesTyResult, MatchesTyFailure, Namespaces
+from .myTypeguard import matchesTy, MatchesTyResult, MatchesTyFailure, Namespaces, CheckSite, \
+    resolveAnnotationStr
 from . import stacktrace
 from . import utils
 
@@ -51,23 +55,21 @@ def getKind(cfg: CheckCfg, paramNames: list[str]) -> Literal['function', 'method
             kind = 'function'
     return kind
 
-def checkSignature(sig: inspect.Signature, info: location.CallableInfo, cfg: CheckCfg) -> None:
-    paramNames = list(sig.parameters)
-    kind = getKind(cfg, paramNames)
-    for i in range(len(paramNames)):
-        name = paramNames[i]
+def checkSignature(plan: CheckPlan, info: location.CallableInfo, cfg: CheckCfg) -> None:
+    sig = plan.sig
+    for i, name in enumerate(sig.parameters):
         p = sig.parameters[name]
         ty = p.annotation
         if isEmptyAnnotation(ty):
-            if i == 0 and kind == 'method':
+            if i == 0 and plan.kind == 'method':
                 pass
             else:
                 locDecl = info.getParamSourceLocation(name)
-                raise errors.WyppTypeError.partialAnnotationError(location.CallableName.mk(info), name, locDecl)
+                raise errors.WyppTypeError.partialAnnotationError(plan.callableName, name, locDecl)
         if p.default is not inspect.Parameter.empty:
             locDecl = lambda: info.getParamSourceLocation(name)
             if not handleMatchesTyResult(matchesTy(p.default, ty, cfg.ns), locDecl):
-                raise errors.WyppTypeError.defaultError(location.CallableName.mk(info), name,
+                raise errors.WyppTypeError.defaultError(plan.callableName, name,
                                                         locDecl(), ty, p.default)
 
 
@@ -83,139 +85,355 @@ def mandatoryArgCount(sig: inspect.Signature) -> int:
             res = res + 1
     return res
 
-def checkArgument(p: inspect.Parameter, name: str, idx: Optional[int], a: Any,
-                  getLocArg: Callable[[], Optional[location.Loc]],
-                  info: location.CallableInfo, cfg: CheckCfg):
+@dataclass(frozen=True)
+class RestParam:
+    """
+    A *args or **kwargs parameter. ty is the type of a single element (for *args)
+    or of a single value (for **kwargs).
+    """
+    param: inspect.Parameter
+    ty: Any
+    checked: bool         # False for a bare tuple or dict annotation
+    invalid: bool         # the annotation is not a valid type for this kind of parameter
+
+def mkRestParam(p: inspect.Parameter) -> RestParam:
     t = p.annotation
-    if not isEmptyAnnotation(t):
-        locDecl = lambda: info.getParamSourceLocation(name)
-        if p.kind == inspect.Parameter.VAR_POSITIONAL:
-            if type(t) == str:
-                t = eval(t)
-            argT = None
-            # For *args annotated as tuple[X, ...], extract the element type X
-            origin = getattr(t, '__origin__', None)
-            if origin is tuple:
-                args = getattr(t, '__args__', None)
-                if args and len(args) == 2 and args[1] is Ellipsis:
-                    # tuple[X, ...] — homogeneous variadic
-                    argT = args[0]
-                elif args:
-                    # tuple[X, Y, ...] — fixed-length tuple, no single element type to extract
-                    raise errors.WyppTypeError.invalidRestArgType(t, locDecl())
-            elif t is tuple:
-                # bare `tuple` without type parameters, nothing to check
-                return
-            else:
-                raise errors.WyppTypeError.invalidRestArgType(t, locDecl())
-            t = argT
-        elif p.kind == inspect.Parameter.VAR_KEYWORD:
-            if type(t) == str:
-                t = eval(t)
-            valT = None
-            # For **kwargs annotated as dict[str, X], extract the value type X
-            origin = getattr(t, '__origin__', None)
-            if origin is dict:
-                type_args = getattr(t, '__args__', None)
-                if type_args and len(type_args) >= 2:
-                    valT = type_args[1]
-            elif t is dict:
-                return
+    if isEmptyAnnotation(t):
+        return RestParam(p, None, False, False)
+    if type(t) == str:
+        try:
+            t = eval(t)
+        except Exception:
+            return RestParam(p, t, False, True)
+    origin = getattr(t, '__origin__', None)
+    if p.kind == inspect.Parameter.VAR_POSITIONAL:
+        # For *args annotated as tuple[X, ...], extract the element type X
+        if origin is tuple:
+            args = getattr(t, '__args__', None)
+            if args and len(args) == 2 and args[1] is Ellipsis:
+                # tuple[X, ...] — homogeneous variadic
+                return RestParam(p, args[0], True, False)
+            elif args:
+                # tuple[X, Y, ...] — fixed-length tuple, no single element type to extract
+                return RestParam(p, t, False, True)
             else:
-                raise errors.WyppTypeError.invalidKwArgType(t, info.getParamSourceLocation(p.name))
-            t = valT
-        if not handleMatchesTyResult(matchesTy(a, t, cfg.ns), locDecl):
-            cn = location.CallableName.mk(info)
-            raise errors.WyppTypeError.argumentError(cn,
-                                                     name,
-                                                     idx,
-                                                     locDecl(),
-                                                     t,
-                                                     a,
-                                                     getLocArg())
-
-def checkArguments(sig: inspect.Signature, args: tuple, kwargs: dict,
-                   info: location.CallableInfo, cfg: CheckCfg) -> None:
-    if isDebug():
-        debug(f'Checking arguments when calling {info}')
+                return RestParam(p, None, True, False)
+        elif t is tuple:
+            # bare `tuple` without type parameters, nothing to check
+            return RestParam(p, t, False, False)
+        else:
+            return RestParam(p, t, False, True)
+    else:
+        # For **kwargs annotated as dict[str, X], extract the value type X
+        if origin is dict:
+            typeArgs = getattr(t, '__args__', None)
+            valT = typeArgs[1] if typeArgs and len(typeArgs) >= 2 else None
+            return RestParam(p, valT, True, False)
+        elif t is dict:
+            return RestParam(p, t, False, False)
+        else:
+            return RestParam(p, t, False, True)
+
+_NoneType = type(None)
+
+# Types whose values also match the key type, see check_number in typeguard
+_NUMERIC_TOWER: dict[type, frozenset[type]] = {
+    int: frozenset([int, bool]),
+    float: frozenset([float, int, bool]),
+    complex: frozenset([complex, float, int, bool]),
+}
+
+def fastTypes(t: Any, ns: Namespaces) -> Optional[frozenset[type]]:
+    """
+    Returns a set of types such that `type(a) in fastTypes(t, ns)` implies that a matches t.
+    Values of other types are checked by matchesTy. Returns None if t cannot be resolved yet.
+    """
+    if isinstance(t, ForwardRef):
+        t = t.__forward_arg__
+    if isinstance(t, str):
+        try:
+            t = resolveAnnotationStr(t, ns)
+        except Exception:
+            return None
+    if t is None or t is _NoneType:
+        return frozenset([_NoneType])
+    if t in _NUMERIC_TOWER:
+        return _NUMERIC_TOWER[t]
+    if inspect.isclass(t) and not isinstance(t, types.GenericAlias):
+        if issubclass(t, tuple) and t is not tuple:
+            # named tuples have typed fields
+            return frozenset()
+        return frozenset([t])
+    origin = get_origin(t)
+    if origin is Annotated:
+        # typeguard does not check the predicates of Annotated types such as nat
+        return fastTypes(get_args(t)[0], ns)
+    if origin is Union or origin is types.UnionType:
+        res: frozenset[type] = frozenset()
+        for x in get_args(t):
+            xs = fastTypes(x, ns)
+            if xs is None:
+                return None
+            res = res | xs
+        return res
+    return frozenset()
+
+@dataclass(frozen=True)
+class CheckPlan:
+    """
+    Everything needed to check the arguments of a call, computed once per signature
+    by mkCheckPlan so that checkArguments only has to index into it.
+    """
+    sig: inspect.Signature
+    callableName: location.CallableName
+    kind: Literal['function', 'method', 'staticmethod']
+    offset: int                                 # 1 if the first parameter is self
+    paramCount: int
+    mandatory: int
+    positional: tuple[inspect.Parameter, ...]   # positional-only and positional-or-keyword
+    keywords: Mapping[str, inspect.Parameter]   # all parameters except *args and **kwargs
+    varPositional: Optional[RestParam]
+    varKeyword: Optional[RestParam]
+    # Filled lazily by isFastMatch, maps annotations to the result of fastTypes
+    fastTypes: dict[Any, frozenset[type]] = field(default_factory=dict, compare=False, repr=False)
+    # Filled lazily by checkSite, maps parameter names and 'return' to sites
+    sites: dict[str, CheckSite] = field(default_factory=dict, compare=False, repr=False)
+    # Filled lazily by quickCheckArguments: the fastTypes of the positional parameters,
+    # None for parameters without annotation
+    positionalFastTypes: list[Optional[frozenset[type]]] = \
+        field(default_factory=list, compare=False, repr=False)
+
+def checkSite(plan: CheckPlan, name: str) -> CheckSite:
+    site = plan.sites.get(name)
+    if site is None:
+        site = CheckSite()
+        plan.sites[name] = site
+    return site
+
+def isFastMatch(plan: CheckPlan, a: Any, t: Any, ns: Namespaces) -> bool:
+    """
+    Decides with a single type lookup whether a matches t for common types such as
+    int, str or record types. A result of False means that matchesTy must decide.
+    """
+    try:
+        fast = plan.fastTypes.get(t)
+        if fast is None:
+            fast = fastTypes(t, ns)
+            if fast is None:
+                return False
+            plan.fastTypes[t] = fast
+    except TypeError:
+        # unhashable type
+        return False
+    return type(a) in fast
+
+def mkCheckPlan(sig: inspect.Signature, info: location.CallableInfo, cfg: CheckCfg) -> CheckPlan:
     paramNames = list(sig.parameters)
-    mandatory = mandatoryArgCount(sig)
     kind = getKind(cfg, paramNames)
-    offset = 1 if kind == 'method' else 0
-    cn = location.CallableName.mk(info)
-    # stacktrace.callerOutsideWypp() is expensive, only access it lazily
-    def getCallLoc() -> Optional[location.Loc]:
-        fi = stacktrace.callerOutsideWypp()
-        return None if not fi else location.Loc.fromFrameInfo(fi)
-    def getLocArg(idxOrName: int | str) -> Callable[[], Optional[location.Loc]]:
-        def f():
-            fi = stacktrace.callerOutsideWypp()
-            return None if fi is None else location.locationOfArgument(fi, i)
-        return f
-    def raiseArgMismatch():
-        raise errors.WyppTypeError.argCountMismatch(cn,
-                                                    getCallLoc(),
-                                                    len(paramNames) - offset,
-                                                    mandatory - offset,
-                                                    len(args) - offset)
-    # Classify parameters by kind
-    varPositionalParam: Optional[inspect.Parameter] = None
-    varKeywordParam: Optional[inspect.Parameter] = None
-    positionalNames: list[str] = []
-    for pName in paramNames:
-        p = sig.parameters[pName]
+    positional = []
+    keywords = {}
+    varPositional = None
+    varKeyword = None
+    for p in sig.parameters.values():
         if p.kind == inspect.Parameter.VAR_POSITIONAL:
-            varPositionalParam = p
+            varPositional = mkRestParam(p)
         elif p.kind == inspect.Parameter.VAR_KEYWORD:
-            varKeywordParam = p
-        elif p.kind in (inspect.Parameter.POSITIONAL_ONLY, inspect.Parameter.POSITIONAL_OR_KEYWORD):
-            positionalNames.append(pName)
-    if len(args) + len(kwargs) < mandatory:
-        raiseArgMismatch()
+            varKeyword = mkRestParam(p)
+        else:
+            keywords[p.name] = p
+            if p.kind in (inspect.Parameter.POSITIONAL_ONLY, inspect.Parameter.POSITIONAL_OR_KEYWORD):
+                positional.append(p)
+    return CheckPlan(sig=sig,
+                     callableName=location.CallableName.mk(info),
+                     kind=kind,
+                     offset=1 if kind == 'method' else 0,
+                     paramCount=len(paramNames),
+                     mandatory=mandatoryArgCount(sig),
+                     positional=tuple(positional),
+                     keywords=types.MappingProxyType(keywords),
+                     varPositional=varPositional,
+                     varKeyword=varKeyword)
+
+type GetCaller = Callable[[], Optional[inspect.FrameInfo]]
+
+def argLocation(getCaller: GetCaller, argIdx: Optional[int]) -> Optional[location.Loc]:
+    """
+    The location of the argument at position argIdx of the call, or of the whole call
+    if argIdx is None. Only computed for error messages.
+    """
+    fi = getCaller()
+    if fi is None:
+        return None
+    elif argIdx is None:
+        return location.Loc.fromFrameInfo(fi)
+    else:
+        return location.locationOfArgument(fi, argIdx)
+
+# The check functions below do not allocate closures or location objects if the check
+# succeeds. Everything needed for an error message is computed after the check failed.
+
+def checkArgument(plan: CheckPlan, paramName: str, name: str, idx: Optional[int], a: Any, t: Any,
+                  argIdx: Optional[int], info: location.CallableInfo, cfg: CheckCfg,
+                  getCaller: GetCaller):
+    if isFastMatch(plan, a, t, cfg.ns):
+        return
+    res = matchesTy(a, t, cfg.ns, checkSite(plan, paramName))
+    if res is True:
+        return
+    locDecl = lambda: info.getParamSourceLocation(paramName)
+    if not handleMatchesTyResult(res, locDecl):
+        raise errors.WyppTypeError.argumentError(plan.callableName,
+                                                 name,
+                                                 idx,
+                                                 locDecl(),
+                                                 t,
+                                                 a,
+                                                 argLocation(getCaller, argIdx))
+
+def checkRestArgument(plan: CheckPlan, rest: RestParam, paramName: str, name: str,
+                      idx: Optional[int], a: Any, argIdx: Optional[int],
+                      info: location.CallableInfo, cfg: CheckCfg, getCaller: GetCaller):
+    p = rest.param
+    if rest.invalid:
+        locDecl = info.getParamSourceLocation(p.name)
+        if p.kind == inspect.Parameter.VAR_POSITIONAL:
+            raise errors.WyppTypeError.invalidRestArgType(rest.ty, locDecl)
+        else:
+            raise errors.WyppTypeError.invalidKwArgType(rest.ty, locDecl)
+    if rest.checked:
+        checkArgument(plan, paramName, name, idx, a, rest.ty, argIdx, info, cfg, getCaller)
+
+def raiseArgCountMismatch(plan: CheckPlan, args: tuple, getCaller: GetCaller):
+    offset = plan.offset
+    raise errors.WyppTypeError.argCountMismatch(plan.callableName,
+                                                argLocation(getCaller, None),
+                                                plan.paramCount - offset,
+                                                plan.mandatory - offset,
+                                                len(args) - offset)
+
+def checkArguments(plan: CheckPlan, args: tuple, kwargs: dict,
+                   info: location.CallableInfo, cfg: CheckCfg,
+                   getCaller: GetCaller = stacktrace.callerOutsideWypp) -> None:
+    if isDebug():
+        debug(f'Checking arguments when calling {info}')
+    offset = plan.offset
+    if len(args) + len(kwargs) < plan.mandatory:
+        raiseArgCountMismatch(plan, args, getCaller)
     # Check positional args
+    positional = plan.positional
     for i in range(len(args)):
-        if i < len(positionalNames):
-            name = positionalNames[i]
-            p = sig.parameters[name]
-            checkArgument(p, name, i - offset, args[i], getLocArg(i), info, cfg)
-        elif varPositionalParam is not None:
-            checkArgument(varPositionalParam, varPositionalParam.name, i - offset, args[i], getLocArg(i), info, cfg)
+        if i < len(positional):
+            p = positional[i]
+            if not isEmptyAnnotation(p.annotation):
+                checkArgument(plan, p.name, p.name, i - offset, args[i], p.annotation,
+                              i, info, cfg, getCaller)
+        elif plan.varPositional is not None:
+            restName = plan.varPositional.param.name
+            checkRestArgument(plan, plan.varPositional, restName, restName, i - offset,
+                              args[i], i, info, cfg, getCaller)
         else:
-            raiseArgMismatch()
-    # Check keyword args
+            raiseArgCountMismatch(plan, args, getCaller)
+    # Check keyword args. Errors for keyword args point to the whole call.
     for name in kwargs:
-        if name in sig.parameters and sig.parameters[name].kind not in (
-            inspect.Parameter.VAR_POSITIONAL, inspect.Parameter.VAR_KEYWORD
-        ):
-            checkArgument(sig.parameters[name], name, None, kwargs[name], getLocArg(name), info, cfg)
-        elif varKeywordParam is not None:
-            checkArgument(varKeywordParam, name, None, kwargs[name], getLocArg(name), info, cfg)
+        p = plan.keywords.get(name)
+        if p is not None:
+            if not isEmptyAnnotation(p.annotation):
+                checkArgument(plan, name, name, None, kwargs[name], p.annotation,
+                              None, info, cfg, getCaller)
+        elif plan.varKeyword is not None:
+            checkRestArgument(plan, plan.varKeyword, name, name, None, kwargs[name],
+                              None, info, cfg, getCaller)
         else:
-            raise errors.WyppTypeError.unknownKeywordArgument(cn, getCallLoc(), name)
+            raise errors.WyppTypeError.unknownKeywordArgument(plan.callableName,
+                                                              argLocation(getCaller, None), name)
 
-def checkReturn(sig: inspect.Signature, returnFrameType: Optional[types.FrameType],
-                result: Any, info: location.CallableInfo, cfg: CheckCfg) -> None:
+def checkReturn(plan: CheckPlan, returnFrameType: Optional[types.FrameType],
+                result: Any, info: location.CallableInfo, cfg: CheckCfg,
+                getCaller: GetCaller = stacktrace.callerOutsideWypp,
+                returnFrameInTraceback: bool = False) -> None:
     if info.isAsync:
         return
-    t = sig.return_annotation
+    t = plan.sig.return_annotation
     if isEmptyAnnotation(t):
         t = None
     if isDebug():
         debug(f'Checking return value when calling {info}, return type: {t}')
+    if isFastMatch(plan, result, t, cfg.ns):
+        return
+    res = matchesTy(result, t, cfg.ns, checkSite(plan, 'return'))
+    if res is True:
+        return
     locDecl = lambda: info.getResultTypeLocation()
-    if not handleMatchesTyResult(matchesTy(result, t, cfg.ns), locDecl):
-        fi = stacktrace.callerOutsideWypp()
-        if fi is not None:
-            locRes = location.Loc.fromFrameInfo(fi)
+    if not handleMatchesTyResult(res, locDecl):
+        locRes = argLocation(getCaller, None)
         returnLoc = None
         extraFrames = []
         returnFrame = stacktrace.frameTypeToFrameInfo(returnFrameType)
         if returnFrame:
             returnLoc = location.Loc.fromFrameInfo(returnFrame)
-            extraFrames = [returnFrame]
-        raise errors.WyppTypeError.resultError(location.CallableName.mk(info), locDecl(), t, returnLoc, result,
+            if not returnFrameInTraceback:
+                extraFrames = [returnFrame]
+        raise errors.WyppTypeError.resultError(plan.callableName, locDecl(), t, returnLoc, result,
                                                locRes, extraFrames)
 
+# If False, wrapped functions always take the slow path through checkArguments and
+# checkReturn. Only used for benchmarking.
+_quickChecks = True
+
+def quickCheckArguments(plan: CheckPlan, args: tuple, kwargs: dict, ns: Namespaces) -> bool:
+    """
+    Checks the arguments of a call with isFastMatch only, without allocating. A result of
+    False means that checkArguments must decide, this includes all calls with type errors.
+    """
+    positional = plan.positional
+    n = len(args)
+    if n > len(positional) or n + len(kwargs) < plan.mandatory:
+        return False
+    fast = plan.positionalFastTypes
+    if not fast and positional:
+        fast = resolvePositionalFastTypes(plan, ns)
+    if fast:
+        for i in range(n):
+            ts = fast[i]
+            if ts is not None and type(args[i]) not in ts:
+                return False
+    else:
+        for i in range(n):
+            t = positional[i].annotation
+            if t is not _emptyAnnotation and not isFastMatch(plan, args[i], t, ns):
+                return False
+    if kwargs:
+        for name in kwargs:
+            p = plan.keywords.get(name)
+            if p is None:
+                return False
+            t = p.annotation
+            if t is not _emptyAnnotation and not isFastMatch(plan, kwargs[name], t, ns):
+                return False
+    return True
+
+_emptyAnnotation = inspect.Parameter.empty
+
+def resolvePositionalFastTypes(plan: CheckPlan, ns: Namespaces) -> list[Optional[frozenset[type]]]:
+    """
+    Fills plan.positionalFastTypes. The list stays empty as long as some annotation
+    cannot be resolved, for example because of a forward reference.
+    """
+    res: list[Optional[frozenset[type]]] = []
+    for p in plan.positional:
+        if p.annotation is _emptyAnnotation:
+            res.append(None)
+        else:
+            try:
+                ts = fastTypes(p.annotation, ns)
+            except TypeError:
+                # unhashable type, checkArguments reports it
+                ts = frozenset()
+            if ts is None:
+                return []
+            res.append(ts)
+    plan.positionalFastTypes.extend(res)
+    return plan.positionalFastTypes
 
 @dataclass
 class CheckCfg:
@@ -234,7 +452,8 @@ class CheckCfg:
 P = ParamSpec("P")
 T = TypeVar("T")
 
-def wrapTypecheck(cfg: dict | CheckCfg, outerInfo: Optional[location.CallableInfo]=None) -> Callable[[Callable[P, T]], Callable[P, T]]:
+def wrapTypecheck(cfg: dict | CheckCfg, outerInfo: Optional[location.CallableInfo]=None,
+                  recordFields: Optional[list[str]]=None) -> Callable[[Callable[P, T]], Callable[P, T]]:
     if isinstance(cfg, CheckCfg):
         checkCfg = cfg
     else:
@@ -249,21 +468,445 @@ def wrapTypecheck(cfg: dict | CheckCfg, outerInfo: Optional[location.CallableInf
         else:
             # special case: constructor of a record
             info = outerInfo
-        utils._call_with_frames_removed(checkSignature, sig, info, checkCfg)
+        plan = mkCheckPlan(sig, info, checkCfg)
+        code = getattr(f, '__code__', None)
+        utils._call_with_frames_removed(checkSignature, plan, info, checkCfg)
+        if code is not None and outerInfo is None and _monitoringBackend is not None and \
+                _monitoringBackend.canMonitor(f, code):
+            _monitoringBackend.register(code, plan, info, checkCfg)
+            return f
+        ns = checkCfg.ns
+        returnType = plan.sig.return_annotation
+        if isEmptyAnnotation(returnType):
+            returnType = None
+        # On success, a call only costs the isFastMatch lookups. The frames of wrapped
+        # are removed from tracebacks (see stacktrace.hideFrames).
         def wrapped(*args, **kwargs) -> T:
-            utils._call_with_frames_removed(checkArguments, sig, args, kwargs, info, checkCfg)
+            if not (_quickChecks and quickCheckArguments(plan, args, kwargs, ns)):
+                utils._call_with_frames_removed(checkArguments, plan, args, kwargs, info, checkCfg)
             returnTracker = stacktrace.getReturnTracker()
-            result = utils._call_with_next_frame_removed(f, *args, **kwargs)
-            ft = returnTracker.getReturnFrameType(0) if returnTracker else None
+            result = f(*args, **kwargs)
+            ft = returnTracker.getReturnFrameType(-1) if returnTracker else None
+            if _quickChecks and isFastMatch(plan, result, returnType, ns):
+                return result
             utils._call_with_frames_removed(
-                checkReturn, sig, ft, result, info, checkCfg
+                checkReturn, plan, ft, result, info, checkCfg
             )
             return result
+        stacktrace.hideFrames(wrapped.__code__)
+        if code is not None:
+            stacktrace.watchReturns(code, lambda r: isFastMatch(plan, r, returnType, ns), wrapped)
+        if _specializeWrappers and canSpecialize(plan, f):
+            return mkSpecializedWrapper(plan, info, checkCfg, f, wrapped, recordFields)
         return wrapped
     return _wrap
 
+#
+# Specialized wrappers
+#
+# For functions with a simple signature, wrapTypecheck generates the source code of a
+# wrapper with the parameter list of the function, similar to the __init__ generated by
+# dataclasses. Calling such a wrapper does not pack the arguments into a tuple and a
+# dict, and the checks of the parameters are inlined. Calls failing a check, with missing
+# or superfluous arguments or with unknown keyword arguments are passed on to the generic
+# wrapper, which reports the error.
+#
+
+# If False, wrapTypecheck only returns generic wrappers. Only used for benchmarking.
+_specializeWrappers = True
+
+# Default value of mandatory parameters in specialized wrappers
+_MISSING: Any = object()
+
+# Compiled factories of specialized wrappers by the shape of the signature (see
+# wrapperShape). A def statement inside a function creates a new function each time it runs,
+# compiling its wrapper each time would cost more than the specialization saves.
+_wrapperFactories: dict[tuple, Callable[..., Callable]] = {}
+
+def wrapperShape(f: Callable, params: list[inspect.Parameter],
+                 recordFields: Optional[list[str]]) -> tuple:
+    """Everything the source code of a specialized wrapper depends on"""
+    return (f.__name__,
+            tuple((p.name, p.kind, p.default is inspect.Parameter.empty,
+                   isEmptyAnnotation(p.annotation)) for p in params),
+            None if recordFields is None else tuple(recordFields))
+
+def canSpecialize(plan: CheckPlan, f: Callable) -> bool:
+    if plan.varPositional is not None or plan.varKeyword is not None:
+        return False
+    name = getattr(f, '__name__', '')
+    if not name.isidentifier() or name.startswith('__wypp'):
+        # names starting with __wypp are reserved for the generated code
+        return False
+    for p in plan.keywords.values():
+        if p.kind == inspect.Parameter.POSITIONAL_ONLY or p.name.startswith('__wypp'):
+            return False
+    return True
+
+def callArguments(plan: CheckPlan, values: tuple, extra: tuple, kw: dict,
+                  getCaller: GetCaller) -> tuple[tuple, dict]:
+    """
+    Reconstructs the arguments of a call to a specialized wrapper from the values of its
+    parameters. Every value that differs from the default of its parameter is passed on,
+    so the call binds the parameters exactly like the original call. The call site only
+    decides whether a value is passed positionally or by keyword, which matters for the
+    wording of error messages. If the call site cannot be parsed or does not fit the
+    values, arguments are treated as if passed positionally if possible.
+    """
+    params = list(plan.keywords.values())
+    fi = getCaller()
+    shape = location.callShape(fi) if fi is not None else None
+    kinds = None
+    if shape is not None:
+        # None if the caller found is not the call of the function, for example for map(f, xs)
+        kinds = shapeArgumentKinds(plan, params, values, extra, kw, shape)
+    if kinds is None:
+        kinds = defaultArgumentKinds(params, values, extra)
+    args = []
+    kwargs = {}
+    for (p, v, k) in zip(params, values, kinds):
+        if k == 'pos':
+            args.append(v)
+        elif k == 'kw':
+            kwargs[p.name] = v
+    kwargs.update(kw)
+    if shape is not None and kinds is not None:
+        # Keyword arguments are checked in the order of the call
+        order = {n: i for (i, n) in enumerate(shape[1])}
+        kwargs = dict(sorted(kwargs.items(), key=lambda kv: order.get(kv[0], len(order))))
+    return (tuple(args) + extra, kwargs)
+
+# How a parameter value was passed: positionally ('pos'), by keyword ('kw') or not at
+# all (''). Values are only left out if they are missing or the default of the parameter.
+ArgumentKind = Literal['pos', 'kw', '']
+
+def defaultArgumentKinds(params: list[inspect.Parameter], values: tuple,
+                         extra: tuple) -> list[ArgumentKind]:
+    kinds: list[ArgumentKind] = []
+    positional = True
+    for (p, v) in zip(params, values):
+        isPositional = p.kind == inspect.Parameter.POSITIONAL_OR_KEYWORD
+        if v is _MISSING:
+            kinds.append('')
+            positional = False
+        elif extra and isPositional:
+            kinds.append('pos')
+        elif p.default is not inspect.Parameter.empty and v is p.default:
+            kinds.append('')
+            positional = False
+        elif positional and isPositional:
+            kinds.append('pos')
+        else:
+            kinds.append('kw')
+    return kinds
+
+def shapeArgumentKinds(plan: CheckPlan, params: list[inspect.Parameter], values: tuple,
+                       extra: tuple, kw: dict, shape: location.CallShape) -> Optional[list[ArgumentKind]]:
+    """
+    The argument kinds according to the call shape, None if the shape does not fit the
+    values received by a specialized wrapper.
+    """
+    (nPos, kwNames, kwSplat) = shape
+    names = set(kwNames)
+    if len(names) != len(kwNames) or not (kwSplat or names.issuperset(kw)):
+        return None
+    if not names.issubset(kw.keys() | {p.name for p in params}):
+        return None
+    if nPos is not None:
+        # self is passed implicitly
+        nPos += plan.offset
+    kinds: list[ArgumentKind] = []
+    positional = True
+    for (i, (p, v)) in enumerate(zip(params, values)):
+        isPositional = p.kind == inspect.Parameter.POSITIONAL_OR_KEYWORD
+        if v is _MISSING:
+            if p.name in names:
+                return None
+            kinds.append('')
+            positional = False
+        elif p.name in names:
+            kinds.append('kw')
+            positional = False
+        elif positional and isPositional and nPos is not None and i < nPos:
+            kinds.append('pos')
+        elif p.default is not inspect.Parameter.empty and v is p.default:
+            # maybe not passed, the number of positional arguments is unknown with *
+            kinds.append('')
+            positional = False
+        elif positional and isPositional and nPos is None:
+            kinds.append('pos')
+        elif kwSplat:
+            # passed with **
+            kinds.append('kw')
+            positional = False
+        else:
+            # the shape has no argument for the value
+            return None
+    nPosParams = sum(1 for p in params if p.kind == inspect.Parameter.POSITIONAL_OR_KEYWORD)
+    if extra and kinds[:nPosParams] != ['pos'] * nPosParams:
+        return None
+    if nPos is not None and nPos != kinds.count('pos') + len(extra):
+        return None
+    return kinds
+
+def _callGeneric(generic: Callable, plan: CheckPlan, values: tuple, extra: tuple, kw: dict) -> Any:
+    (args, kwargs) = callArguments(plan, values, extra, kw, stacktrace.callerOutsideWypp)
+    return generic(*args, **kwargs)
+
+stacktrace.hideFrames(_callGeneric.__code__)
+
+def mkSpecializedWrapper(plan: CheckPlan, info: location.CallableInfo, cfg: CheckCfg,
+                         f: Callable, generic: Callable,
+                         recordFields: Optional[list[str]] = None) -> Callable:
+    """
+    Generates the specialized wrapper of f. If recordFields is given, f is the __init__
+    of a record with these fields and the wrapper assigns the fields itself.
+    """
+    ns = cfg.ns
+    params = list(plan.keywords.values())
+    # fastTypes of the parameters, replaced by ok once a forward reference resolves
+    fast: list[frozenset[type]] = []
+    for p in params:
+        try:
+            ts = None if isEmptyAnnotation(p.annotation) else fastTypes(p.annotation, ns)
+        except TypeError:
+            ts = None
+        fast.append(ts or frozenset())
+    def ok(i: int, a: Any) -> bool:
+        t = params[i].annotation
+        if isFastMatch(plan, a, t, ns):
+            fast[i] = plan.fastTypes[t]
+            return True
+        return matchesTy(a, t, ns, checkSite(plan, params[i].name)) is True
+    returnType = plan.sig.return_annotation
+    if isEmptyAnnotation(returnType):
+        returnType = None
+    env: dict[str, Any] = {
+        '__wypp_f': f, '__wypp_generic': generic, '__wypp_plan': plan, '__wypp_info': info,
+        '__wypp_cfg': cfg, '__wypp_ns': ns, '__wypp_fast': fast, '__wypp_ok': ok,
+        '__wypp_missing': _MISSING, '__wypp_returnType': returnType,
+        '__wypp_set': object.__setattr__, '__wypp_type': type, '__wypp_module': sys.modules[__name__],
+        '__wypp_callGeneric': _callGeneric, '__wypp_isFastMatch': isFastMatch,
+        '__wypp_getReturnTracker': stacktrace.getReturnTracker,
+        '__wypp_callWithFramesRemoved': utils._call_with_frames_removed,
+        '__wypp_checkReturn': checkReturn,
+    }
+    for (i, p) in enumerate(params):
+        if p.default is not inspect.Parameter.empty:
+            env[f'__wypp_d{i}'] = p.default
+    key = wrapperShape(f, params, recordFields)
+    factory = _wrapperFactories.get(key)
+    if factory is None:
+        factory = compileWrapperFactory(f, params, list(env), recordFields)
+        _wrapperFactories[key] = factory
+    wrapper = factory(**env)
+    wrapper.__qualname__ = getattr(f, '__qualname__', f.__name__)
+    wrapper.__doc__ = f.__doc__
+    stacktrace.hideFrames(wrapper.__code__)
+    return wrapper
+
+def compileWrapperFactory(f: Callable, params: list[inspect.Parameter], envNames: list[str],
+                          recordFields: Optional[list[str]]) -> Callable[..., Callable]:
+    """
+    Compiles a function that takes the values of envNames and returns the specialized
+    wrapper of f.
+    """
+    # The generated code only refers to names starting with __wypp, so that the names of
+    # parameters cannot shadow them
+    paramSrc = []
+    conds = ['not __wypp_module._quickChecks', '__wypp_extra', '__wypp_kw']
+    callArgs = []
+    for (i, p) in enumerate(params):
+        if p.kind == inspect.Parameter.KEYWORD_ONLY and '*__wypp_extra' not in paramSrc:
+            paramSrc.append('*__wypp_extra')
+        if p.default is inspect.Parameter.empty:
+            paramSrc.append(f'{p.name}=__wypp_missing')
+            conds.append(f'{p.name} is __wypp_missing')
+            default = None
+        else:
+            default = f'__wypp_d{i}'
+            paramSrc.append(f'{p.name}={default}')
+        if not isEmptyAnnotation(p.annotation):
+            c = f'__wypp_type({p.name}) not in __wypp_fast[{i}] and not __wypp_ok({i}, {p.name})'
+            # default values are checked once by checkSignature
+            conds.append(f'({p.name} is not {default} and {c})' if default else f'({c})')
+        if p.kind == inspect.Parameter.KEYWORD_ONLY:
+            callArgs.append(f'{p.name}={p.name}')
+        else:
+            callArgs.append(p.name)
+    if '*__wypp_extra' not in paramSrc:
+        paramSrc.append('*__wypp_extra')
+    paramSrc.append('**__wypp_kw')
+    values = ''.join(f'{p.name}, ' for p in params)
+    lines = [
+        f'def {f.__name__}({", ".join(paramSrc)}):',
+        f'    if {" or ".join(conds)}:',
+        f'        return __wypp_callGeneric(__wypp_generic, __wypp_plan, ({values}), __wypp_extra, __wypp_kw)'
+    ]
+    if recordFields is not None:
+        self = params[0].name
+        lines += [f'    __wypp_set({self}, {n!r}, {n})' for n in recordFields]
+    else:
+        lines += [
+            '    __wypp_tracker = __wypp_getReturnTracker()',
+            f'    __wypp_result = __wypp_f({", ".join(callArgs)})',
+            '    __wypp_ft = __wypp_tracker.getReturnFrameType(-1) if __wypp_tracker else None',
+            '    if __wypp_isFastMatch(__wypp_plan, __wypp_result, __wypp_returnType, __wypp_ns):',
+            '        return __wypp_result',
+            '    __wypp_callWithFramesRemoved(__wypp_checkReturn, __wypp_plan, __wypp_ft,',
+            '                                 __wypp_result, __wypp_info, __wypp_cfg)',
+            '    return __wypp_result'
+        ]
+    src = f'def __wypp_create({", ".join(envNames)}):\n' + \
+        ''.join(f'    {l}\n' for l in lines) + f'    return {f.__name__}\n'
+    if isDebug():
+        debug(f'Specialized wrapper for {f.__name__}:\n{src}')
+    created: dict[str, Any] = {}
+    # The module name marks the frames of the wrapper as wypp frames
+    exec(src, {'__name__': __name__}, created)
+    return created['__wypp_create']
+
+#
+# Typechecking via sys.monitoring
+#
+# Instead of wrapping a function, this backend registers the code object of the function
+# and checks arguments and return values in callbacks for the PY_START and PY_RETURN events
+# of sys.monitoring (PEP 669). Checked calls then do not pay for extra frames. Arity errors
+# are reported by Python itself, because they occur before PY_START.
+#
+
+@dataclass(frozen=True)
+class MonitoredCallable:
+    plan: CheckPlan
+    info: location.CallableInfo
+    cfg: CheckCfg
+    # Names and types of the annotated parameters, None if there are *args or **kwargs
+    simpleParams: Optional[tuple[tuple[str, Any], ...]]
+    returnType: Any
+
+class MonitoringBackend:
+    def __init__(self, toolId: int):
+        self.toolId = toolId
+        self.callables: dict[types.CodeType, MonitoredCallable] = {}
+    def canMonitor(self, f: Callable, code: types.CodeType) -> bool:
+        # PY_START and PY_RETURN do not correspond to calls and returns of generators
+        # and coroutines. Nested functions share their code object, but not their
+        # namespace.
+        noSimpleCall = inspect.CO_GENERATOR | inspect.CO_COROUTINE | inspect.CO_ASYNC_GENERATOR
+        return not (code.co_flags & noSimpleCall) and \
+            '<locals>' not in getattr(f, '__qualname__', '')
+    def register(self, code: types.CodeType, plan: CheckPlan, info: location.CallableInfo,
+                 cfg: CheckCfg):
+        simpleParams = None
+        if plan.varPositional is None and plan.varKeyword is None:
+            simpleParams = tuple((name, p.annotation) for name, p in plan.keywords.items()
+                                 if not isEmptyAnnotation(p.annotation))
+        returnType = plan.sig.return_annotation
+        if isEmptyAnnotation(returnType):
+            returnType = None
+        self.callables[code] = MonitoredCallable(plan, info, cfg, simpleParams, returnType)
+        events = sys.monitoring.events
+        sys.monitoring.set_local_events(self.toolId, code, events.PY_START | events.PY_RETURN)
+    def onStart(self, code: types.CodeType, offset: int):
+        m = self.callables.get(code)
+        if m is None:
+            return sys.monitoring.DISABLE
+        frame = sys._getframe(1)
+        if m.simpleParams is not None:
+            locals = frame.f_locals
+            for (name, t) in m.simpleParams:
+                if not isFastMatch(m.plan, locals[name], t, m.cfg.ns):
+                    break
+            else:
+                return
+        (args, kwargs) = argumentsOfFrame(m.plan, frame)
+        getCaller = lambda: stacktrace.callerOutsideWyppFrom(frame.f_back)
+        utils._call_with_frames_and_caller_removed(checkArguments, m.plan, args, kwargs,
+                                                   m.info, m.cfg, getCaller)
+    def onReturn(self, code: types.CodeType, offset: int, result: Any):
+        m = self.callables.get(code)
+        if m is None:
+            return sys.monitoring.DISABLE
+        if isFastMatch(m.plan, result, m.returnType, m.cfg.ns):
+            return
+        frame = sys._getframe(1)
+        getCaller = lambda: stacktrace.callerOutsideWyppFrom(frame.f_back)
+        # The exception is raised in the returning frame, so it is already part of the traceback
+        utils._call_with_frames_removed(checkReturn, m.plan, frame, result, m.info, m.cfg,
+                                        getCaller, True)
+
+def argumentsOfFrame(plan: CheckPlan, frame: types.FrameType) -> tuple[tuple, dict]:
+    """
+    Reconstructs the arguments of a call from the frame of the callee, just after the
+    call started. All parameters are treated as if passed positionally if possible.
+    """
+    locals = frame.f_locals
+    args = tuple(locals[p.name] for p in plan.positional)
+    if plan.varPositional is not None:
+        args = args + locals[plan.varPositional.param.name]
+    kwargs = {}
+    for name, p in plan.keywords.items():
+        if p.kind == inspect.Parameter.KEYWORD_ONLY:
+            kwargs[name] = locals[name]
+    if plan.varKeyword is not None:
+        kwargs.update(locals[plan.varKeyword.param.name])
+    return (args, kwargs)
+
+_monitoringBackend: Optional[MonitoringBackend] = None
+
+def enableMonitoringBackend() -> bool:
+    """
+    Functions wrapped by wrapTypecheck after this call are checked via sys.monitoring.
+    Returns False if no sys.monitoring tool id is available.
+    """
+    global _monitoringBackend
+    if _monitoringBackend is not None:
+        return True
+    mon = sys.monitoring
+    for toolId in [mon.OPTIMIZER_ID, 4, 3]:
+        if mon.get_tool(toolId) is None:
+            break
+    else:
+        debug('No free sys.monitoring tool id, cannot enable monitoring backend')
+        return False
+    mon.use_tool_id(toolId, 'wypp-typecheck')
+    backend = MonitoringBackend(toolId)
+    mon.register_callback(toolId, mon.events.PY_START, backend.onStart)
+    mon.register_callback(toolId, mon.events.PY_RETURN, backend.onReturn)
+    _monitoringBackend = backend
+    return True
+
+def disableMonitoringBackend():
+    global _monitoringBackend
+    backend = _monitoringBackend
+    if backend is None:
+        return
+    _monitoringBackend = None
+    mon = sys.monitoring
+    for code in backend.callables:
+        mon.set_local_events(backend.toolId, code, 0)
+    mon.register_callback(backend.toolId, mon.events.PY_START, None)
+    mon.register_callback(backend.toolId, mon.events.PY_RETURN, None)
+    mon.free_tool_id(backend.toolId)
+
 def wrapTypecheckRecordConstructor(cls: type, ns: Namespaces) -> Callable:
     checkCfg = CheckCfg.fromDict({'kind': 'method', 'className': cls.__name__,
                                   'globals': ns.globals, 'locals': ns.locals})
     info = location.RecordConstructorInfo(cls)
-    return wrapTypecheck(checkCfg, info)(cls.__init__)
+    return wrapTypecheck(checkCfg, info, flatInitFields(cls))(cls.__init__)
+
+def flatInitFields(cls: type) -> Optional[list[str]]:
+    """
+    The fields of a record whose specialized __init__ may assign the fields itself instead
+    of calling the __init__ generated by dataclasses. None if the record needs the
+    dataclasses __init__, for example because of a default_factory or __post_init__.
+    """
+    if hasattr(cls, '__post_init__'):
+        return None
+    fields = dataclasses.fields(cls) # type: ignore
+    for fld in fields:
+        if not fld.init or fld.default_factory is not dataclasses.MISSING:
+            return None
+    names = [fld.name for fld in fields]
+    params = list(inspect.signature(cls.__init__).parameters)[1:]
+    return names if names == params else None
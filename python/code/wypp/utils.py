@@ -20,6 +20,15 @@ def _call_with_next_frame_removed(
 ) -> T:
     return f(*args, **kwargs)
 
+# The name of this function is magical. All stack frames that appear
+# nested within this function are removed from tracebacks, as well as the
+# frame of the sys.monitoring callback calling this function and the frame
+# that triggered the callback.
+def _call_with_frames_and_caller_removed(
+    f: Callable[P, T], *args: P.args, **kwargs: P.kwargs
+) -> T:
+    return f(*args, **kwargs)
+
 def getEnv(name, conv, default):
     s = os.getenv(name)
     if s is None:
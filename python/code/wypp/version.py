@@ -1,7 +1,5 @@
 from dataclasses import dataclass
-import json
 import os
-import subprocess
 
 from .constants import *
 from .myLogging import *
@@ -11,6 +9,7 @@ def readGitVersion():
     thisDir = os.path.basename(SOURCE_DIR)
     baseDir = os.path.join(SOURCE_DIR, '..', '..')
     if thisDir == 'src' and os.path.isdir(os.path.join(baseDir, '.git')):
+        import subprocess
         try:
             h = subprocess.check_output(['git', '-C', baseDir, 'rev-parse', '--short', 'HEAD'],
                 encoding='UTF-8').strip()
@@ -31,6 +30,7 @@ def readVersion():
     if version is not None:
         return version
     try:
+        import json
         content = utils.readFile(os.path.join(SOURCE_DIR, '..', '..', 'package.json'))
         d = json.loads(content)
         version = d['version']
@@ -1,9 +1,10 @@
 import dataclasses
-import inspect
 import math as moduleMath
+import sys
 import typing
-from typing import Any
+from typing import Any, Optional
 
+from . import checkedCollections
 from . import errors
 from . import i18n
 from . import location
@@ -11,6 +12,7 @@ from . import paths
 from . import records
 from . import renderTy
 from . import stacktrace
+from . import testEvents
 from . import typecheck
 from . import utils
 
@@ -21,6 +23,10 @@ def _debug(s):
 
 record = records.record
 
+CheckedDict = checkedCollections.CheckedDict
+CheckedList = checkedCollections.CheckedList
+CheckedSet = checkedCollections.CheckedSet
+
 intPositive = typing.Annotated[int, lambda i: i > 0, 'intPositive']
 nat = typing.Annotated[int, lambda i: i >= 0, 'nat']
 intNonNegative = typing.Annotated[int, lambda i: i >= 0, 'intNonNegative']
@@ -123,6 +129,7 @@ def initModule(enableChecks=True, enableTypeChecking=True, quiet=False):
     _checksEnabled = enableChecks
     _typeCheckingEnabled = enableTypeChecking
     records.init(enableTypeChecking)
+    checkedCollections.init(enableTypeChecking)
     resetTestCount()
 
 def resetTestCount():
@@ -149,6 +156,7 @@ def printTestResults(prefix='', loadingFailed=False):
             print(f'{tests}, {i18n.numFailing(failing)} and stop of execution {bad}')
         else:
             print(f'{tests}, {i18n.numFailing(failing)} {bad}')
+    testEvents.emit('results', prefix=prefix, total=total, failing=failing)
     return {'total': total, 'failing': failing}
 
 def checkEq(actual, expected):
@@ -171,19 +179,32 @@ def check(actual, expected):
     """
     checkGeneric(actual, expected)
 
+def _callerLocation(depth: int) -> Optional[tuple[str, int]]:
+    """File and line of the frame depth levels above the caller of this function."""
+    try:
+        f = sys._getframe(depth + 1)
+    except ValueError:
+        return None
+    return (f.f_code.co_filename, f.f_lineno)
+
 def checkGeneric(actual, expected, *, structuralObjEq=True, floatEqWithDelta=True):
     if not _checksEnabled:
         return
     flags = {'structuralObjEq': structuralObjEq, 'floatEqWithDelta': floatEqWithDelta}
     matches = deepEq(actual, expected, **flags)
     incTestCount(matches)
+    if matches and not testEvents.isEnabled():
+        return
+    loc = _callerLocation(2)
+    filename = paths.canonicalizePath(loc[0]) if loc else None
+    if testEvents.isEnabled():
+        testEvents.emit('check', ok=matches, file=filename, line=loc[1] if loc else None,
+                        expected=testEvents.shortRepr(expected),
+                        actual=testEvents.shortRepr(actual))
     if not matches:
-        stack = inspect.stack()
-        frame = stack[2] if len(stack) > 2 else None
-        if frame:
-            filename = paths.canonicalizePath(frame.filename)
+        if loc:
             caller = i18n.tr('File {filename}, line {lineno}: ',
-                             filename=filename, lineno=frame.lineno)
+                             filename=filename, lineno=loc[1])
         else:
             caller = ""
         def fmt(x):
@@ -202,17 +223,20 @@ def checkFail(msg: str):
         return
     incTestCount(False)
     msg = str(msg)
+    if testEvents.isEnabled():
+        loc = _callerLocation(1)
+        testEvents.emit('fail', ok=False, file=paths.canonicalizePath(loc[0]) if loc else None,
+                        line=loc[1] if loc else None, message=msg)
     if _dieOnCheckFailures():
         raise Exception(msg)
     else:
         print(i18n.tr('ERROR: ') + msg)
 
 def uncoveredCase():
-    stack = inspect.stack()
-    if len(stack) > 1:
-        caller = stack[1]
+    loc = _callerLocation(1)
+    if loc:
         callerStr = i18n.tr('File {filename}, line {lineno}: ',
-                            filename=caller.filename, lineno=caller.lineno)
+                            filename=loc[0], lineno=loc[1])
         raise Exception(callerStr + i18n.tr('uncovered case'))
     else:
         raise Exception(i18n.tr('Uncovered case'))
@@ -0,0 +1,9 @@
+from wypp import *
+
+def total(xs: list[int]) -> int:
+    return sum(xs)
+
+xs = CheckedList[int]([1, 2])
+xs.append(3)
+print(total(xs))
+xs.append('4')
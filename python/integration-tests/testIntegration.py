@@ -93,3 +93,122 @@ class ReplTesterTests(unittest.TestCase):
         print(cmd)
         res = shell.run(cmd, captureStdout=True, onError='die', cwd='/tmp')
         self.assertIn('All 1 tests succeeded. Great!', res.stdout)
+
+@unittest.skipUnless(hasattr(os, 'fork'), 'daemon requires fork')
+class DaemonTests(unittest.TestCase):
+
+    def test_daemonMatchesDirectRun(self):
+        import shutil, subprocess, tempfile, time
+        d = tempfile.mkdtemp(prefix='wypp-daemon')
+        self.addCleanup(shutil.rmtree, d)
+        sock = os.path.join(d, 'daemon.sock')
+        env = dict(os.environ, PYTHONPATH='./code', WYPP_DAEMON_SOCKET=sock)
+        daemon = subprocess.Popen(['python3', 'code/wypp/runYourProgram.py', '--daemon'], env=env)
+        try:
+            for _ in range(100):
+                if os.path.exists(sock):
+                    break
+                time.sleep(0.1)
+            for (path, ecode) in [('integration-test-data/testTypes3.py', 1),
+                                  ('integration-test-data/testTypesInteractive.py', 0)]:
+                args = ['--quiet', '--no-clear', path]
+                direct = subprocess.run(['python3', 'code/wypp/runYourProgram.py'] + args,
+                                        env=env, capture_output=True, text=True)
+                viaDaemon = subprocess.run(['python3', 'code/wypp/runViaDaemon.py'] + args,
+                                           env=env, capture_output=True, text=True)
+                self.assertEqual(ecode, direct.returncode)
+                self.assertEqual(direct.returncode, viaDaemon.returncode)
+                self.assertEqual(direct.stdout, viaDaemon.stdout)
+                self.assertEqual(direct.stderr, viaDaemon.stderr)
+        finally:
+            daemon.terminate()
+            daemon.wait()
+        self.assertFalse(os.path.exists(sock))
+
+    def test_refuseSharedSocketDir(self):
+        import shutil, socket, subprocess, tempfile
+        d = tempfile.mkdtemp(prefix='wypp-daemon')
+        self.addCleanup(shutil.rmtree, d)
+        os.chmod(d, 0o755)
+        sock = os.path.join(d, 'daemon.sock')
+        env = dict(os.environ, PYTHONPATH='./code', WYPP_DAEMON_SOCKET=sock)
+        daemon = subprocess.run(['python3', 'code/wypp/runYourProgram.py', '--daemon'],
+                                env=env, capture_output=True, text=True)
+        self.assertNotEqual(0, daemon.returncode)
+        self.assertIn('accessible by other users', daemon.stderr)
+        # A socket in a directory of another user might belong to someone else: the client
+        # must not send its environment and descriptors there, but run the program itself.
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+            server.bind(sock)
+            server.listen()
+            args = ['--quiet', '--no-clear', 'integration-test-data/testTypesInteractive.py']
+            res = subprocess.run(['python3', 'code/wypp/runViaDaemon.py'] + args,
+                                 env=env, capture_output=True, text=True, timeout=60)
+        self.assertEqual(0, res.returncode)
+        self.assertIn('Not using the wypp daemon', res.stderr)
+
+@unittest.skipUnless(hasattr(os, 'fork'), 'batch mode requires fork')
+class BatchTests(unittest.TestCase):
+
+    def test_batch(self):
+        import json, shutil, tempfile
+        d = tempfile.mkdtemp(prefix='wypp-batch')
+        self.addCleanup(shutil.rmtree, d)
+        for name in ['student-submission', 'student-submission-bad', 'student-submission-tyerror']:
+            shutil.copy(f'integration-test-data/{name}.py', d)
+        os.mkdir(f'{d}/sub')
+        shutil.copy('integration-test-data/student-submission.py', f'{d}/sub/main.py')
+        with open(f'{d}/hang.py', 'w') as f:
+            f.write('def incByOne(x: int) -> int:\n    while True:\n        pass\n')
+        flags = ['--batch', d, '--test-file', 'integration-test-data/student-submission-tests.py',
+                 '--timeout', '2', '--jobs', '2', '--junit', f'{d}/junit.xml']
+        cmd = f'python3 code/wypp/runYourProgram.py {" ".join(flags)} main.py'
+        res = shell.run(cmd, captureStdout=True, onError='ignore', env={'PYTHONPATH': './code'})
+        self.assertEqual(1, res.exitcode)
+        summary = json.loads(res.stdout)
+        statuses = {r['name']: r['status'] for r in summary['results']}
+        self.assertEqual({'hang': 'timeout', 'student-submission': 'ok',
+                          'student-submission-bad': 'failed', 'student-submission-tyerror': 'failed',
+                          'sub': 'ok'}, statuses)
+        ok = [r for r in summary['results'] if r['name'] == 'sub'][0]
+        self.assertEqual({'total': 1, 'failing': 0, 'loadingFailed': False}, ok['tutor'])
+        self.assertTrue(os.path.exists(f'{d}/junit.xml'))
+
+    def test_batchLimits(self):
+        import json, shutil, tempfile
+        d = tempfile.mkdtemp(prefix='wypp-batch')
+        self.addCleanup(shutil.rmtree, d)
+        pidFile = f'{d}/grandchild.pid'
+        # The grandchild does not exit on its own, killing the child must also kill it
+        with open(f'{d}/spawn.py', 'w') as f:
+            f.write('import os, time\n'
+                    'if os.fork() == 0:\n'
+                    f'    with open({pidFile!r}, "w") as f:\n'
+                    '        f.write(str(os.getpid()))\n'
+                    '    while True:\n'
+                    '        time.sleep(0.1)\n'
+                    'while True:\n'
+                    '    pass\n')
+        with open(f'{d}/chatty.py', 'w') as f:
+            f.write("for _ in range(3000):\n    print('x' * 999)\n"
+                    'def incByOne(x: int) -> int:\n    return x + 1\n')
+        flags = ['--batch', d, '--test-file', 'integration-test-data/student-submission-tests.py',
+                 '--timeout', '2']
+        cmd = f'python3 code/wypp/runYourProgram.py {" ".join(flags)}'
+        res = shell.run(cmd, captureStdout=True, onError='ignore', env={'PYTHONPATH': './code'})
+        results = {r['name']: r for r in json.loads(res.stdout)['results']}
+        self.assertEqual('timeout', results['spawn']['status'])
+        self.assertEqual('ok', results['chatty']['status'])
+        output = results['chatty']['output']
+        self.assertTrue(output.endswith('[output truncated after 1048576 bytes]\n'))
+        self.assertLess(len(output), 1024 * 1024 + 100)
+        with open(pidFile) as f:
+            self.assertFalse(_isRunning(int(f.read())))
+
+def _isRunning(pid: int) -> bool:
+    try:
+        # Killed processes might stay zombies if nobody reaps them
+        with open(f'/proc/{pid}/stat') as f:
+            return f.read().rsplit(')', 1)[1].split()[0] not in ['Z', 'X']
+    except FileNotFoundError:
+        return False
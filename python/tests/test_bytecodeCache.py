@@ -0,0 +1,80 @@
+import os
+import tempfile
+import unittest
+import wypp.bytecodeCache as bytecodeCache
+import wypp.instrument as instrument
+
+class TestBytecodeCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpDir = tempfile.TemporaryDirectory()
+        self.oldEnv = os.environ.get(bytecodeCache.CACHE_DIR_ENV_VAR)
+        os.environ[bytecodeCache.CACHE_DIR_ENV_VAR] = self.tmpDir.name
+
+    def tearDown(self):
+        if self.oldEnv is None:
+            del os.environ[bytecodeCache.CACHE_DIR_ENV_VAR]
+        else:
+            os.environ[bytecodeCache.CACHE_DIR_ENV_VAR] = self.oldEnv
+        self.tmpDir.cleanup()
+
+    def test_key(self):
+        k = bytecodeCache.mkKey(b'x = 1', 'foo.py', True)
+        self.assertEqual(k, bytecodeCache.mkKey(b'x = 1', 'foo.py', True))
+        self.assertNotEqual(k, bytecodeCache.mkKey(b'x = 2', 'foo.py', True))
+        self.assertNotEqual(k, bytecodeCache.mkKey(b'x = 1', 'bar.py', True))
+        self.assertNotEqual(k, bytecodeCache.mkKey(b'x = 1', 'foo.py', False))
+
+    def test_storeLoad(self):
+        key = bytecodeCache.mkKey(b'x = 1', 'foo.py', True)
+        self.assertIsNone(bytecodeCache.load(key))
+        code = compile('x = 1', 'foo.py', 'exec')
+        bytecodeCache.store(key, code)
+        self.assertEqual(code, bytecodeCache.load(key))
+
+    def test_instrumentingLoader(self):
+        source = b'def foo(x: int) -> int:\n    return x\n'
+        code1 = instrument.InstrumentingLoader.source_to_code(source, 'foo.py')
+        code2 = instrument.InstrumentingLoader.source_to_code(source, 'foo.py')
+        self.assertEqual(code1, code2)
+        self.assertIsNot(code1, code2)
+        self.assertIn('wrapTypecheck', code2.co_names)
+
+    def test_disabled(self):
+        os.environ[bytecodeCache.CACHE_DIR_ENV_VAR] = ''
+        key = bytecodeCache.mkKey(b'x = 1', 'foo.py', True)
+        bytecodeCache.store(key, compile('x = 1', 'foo.py', 'exec'))
+        self.assertIsNone(bytecodeCache.load(key))
+        self.assertEqual([], os.listdir(self.tmpDir.name))
+
+    def test_prune(self):
+        d = self.tmpDir.name
+        keys = [bytecodeCache.mkKey(str(i).encode(), 'foo.py', True) for i in range(5)]
+        for (i, key) in enumerate(keys):
+            bytecodeCache.store(key, compile(f'x = {i}', 'foo.py', 'exec'))
+            os.utime(bytecodeCache._cacheFile(d, key), (1000 + i, 1000 + i))
+        # Loading marks an entry as recently used
+        self.assertIsNotNone(bytecodeCache.load(keys[0]))
+        bytecodeCache.prune(d, 3, 1024 * 1024)
+        self.assertEqual([True, False, False, True, True],
+                         [os.path.exists(bytecodeCache._cacheFile(d, k)) for k in keys])
+        size = os.path.getsize(bytecodeCache._cacheFile(d, keys[0]))
+        bytecodeCache.prune(d, 3, size)
+        self.assertEqual([True, False, False, False, False],
+                         [os.path.exists(bytecodeCache._cacheFile(d, k)) for k in keys])
+
+    def test_pruneOnStore(self):
+        os.environ[bytecodeCache.MAX_ENTRIES_ENV_VAR] = '1'
+        self.addCleanup(os.environ.pop, bytecodeCache.MAX_ENTRIES_ENV_VAR)
+        d = self.tmpDir.name
+        keys = [bytecodeCache.mkKey(str(i).encode(), 'foo.py', True) for i in range(3)]
+        bytecodeCache.store(keys[0], compile('x = 0', 'foo.py', 'exec'))
+        # The first store checks the size, the next ones are within the interval
+        bytecodeCache.store(keys[1], compile('x = 1', 'foo.py', 'exec'))
+        self.assertTrue(os.path.exists(bytecodeCache._cacheFile(d, keys[1])))
+        os.utime(os.path.join(d, bytecodeCache._PRUNE_MARKER), (0, 0))
+        os.utime(bytecodeCache._cacheFile(d, keys[0]), (1000, 1000))
+        os.utime(bytecodeCache._cacheFile(d, keys[1]), (1001, 1001))
+        bytecodeCache.store(keys[2], compile('x = 2', 'foo.py', 'exec'))
+        self.assertEqual([False, False, True],
+                         [os.path.exists(bytecodeCache._cacheFile(d, k)) for k in keys])
@@ -0,0 +1,62 @@
+import unittest
+from wypp import *
+from wypp import WyppTypeError
+import wypp.myTypeguard as myTypeguard
+
+ns = myTypeguard.Namespaces.empty()
+
+class TestCheckedCollections(unittest.TestCase):
+
+    def test_list(self):
+        xs = CheckedList[int]([1, 2])
+        xs.append(3)
+        xs.insert(0, 0)
+        xs.extend([4])
+        xs += [5]
+        xs[0] = 10
+        xs[1:2] = [11, 12]
+        self.assertEqual([10, 11, 12, 2, 3, 4, 5], xs)
+        self.assertIs(type(xs), type(xs + [6]))
+        self.assertIs(type(xs), type(xs.copy()))
+        for f in [lambda: xs.append('x'), lambda: xs.insert(0, 'x'), lambda: xs.extend(['x']),
+                  lambda: xs.__setitem__(0, 'x'), lambda: xs.__setitem__(slice(0, 1), ['x']),
+                  lambda: CheckedList[int](['x'])]:
+            with self.assertRaises(WyppTypeError):
+                f()
+        self.assertEqual([10, 11, 12, 2, 3, 4, 5], xs)
+
+    def test_dict(self):
+        d = CheckedDict[str, int]({'a': 1}, b=2)
+        d['c'] = 3
+        d.setdefault('d', 4)
+        d |= {'e': 5}
+        self.assertEqual({'a': 1, 'b': 2, 'c': 3, 'd': 4, 'e': 5}, d)
+        with self.assertRaises(WyppTypeError):
+            d[1] = 1
+        with self.assertRaises(WyppTypeError):
+            d['x'] = 'x'
+        with self.assertRaises(WyppTypeError):
+            d.update({'x': 'x'})
+
+    def test_set(self):
+        s = CheckedSet[int]([1])
+        s.add(2)
+        s |= {3}
+        self.assertEqual({1, 2, 3}, s)
+        with self.assertRaises(WyppTypeError):
+            s.add('x')
+
+    def test_specializationCached(self):
+        self.assertIs(CheckedList[int], CheckedList[int])
+        self.assertEqual('CheckedList[int]', CheckedList[int].__name__)
+
+    def test_matchesTyUsesCarriedTypes(self):
+        xs = CheckedList[int]([1, 2])
+        self.assertTrue(myTypeguard.matchesTy(xs, list[int], ns))
+        # elements are not looked at, the carried type is authoritative
+        list.append(xs, 'x')
+        self.assertTrue(myTypeguard.matchesTy(xs, list[int], ns))
+        self.assertFalse(myTypeguard.matchesTy(xs, list[str], ns))
+        d = CheckedDict[str, int]()
+        self.assertTrue(myTypeguard.matchesTy(d, dict[str, int], ns))
+        self.assertTrue(myTypeguard.matchesTy(CheckedSet[int](), set[int], ns))
@@ -0,0 +1,261 @@
+import threading
+import unittest
+from typing import *
+from wypp.myTypeguard import Namespaces, matchesTy, getChecker, MatchesTyFailure
+import wypp.myTypeguard as myTypeguard
+
+class Point:
+    pass
+
+class TestMatchesTy(unittest.TestCase):
+
+    def assertMatches(self, v, ty, ns=None):
+        self.assertIs(True, matchesTy(v, ty, ns or Namespaces.empty()))
+
+    def assertNotMatches(self, v, ty, ns=None):
+        self.assertIs(False, matchesTy(v, ty, ns or Namespaces.empty()))
+
+    def test_primitive(self):
+        self.assertMatches(1, int)
+        self.assertMatches(1, float)
+        self.assertMatches(1.0, complex)
+        self.assertNotMatches(1.0, int)
+        self.assertMatches(None, None)
+        self.assertNotMatches(0, None)
+
+    def test_collections(self):
+        self.assertMatches([1, 2], list[int])
+        self.assertNotMatches([1, 'x'], list[int])
+        self.assertMatches({'a': [1.0, 2]}, dict[str, list[float]])
+        self.assertNotMatches({'a': 1}, dict[str, str])
+        self.assertMatches((1, 'x'), tuple[int, str])
+        self.assertNotMatches((1, 'x', 2), tuple[int, str])
+        self.assertMatches((1, 2, 3), tuple[int, ...])
+        self.assertMatches((), tuple[()])
+        self.assertMatches(frozenset([1]), set[int])
+        self.assertNotMatches('ab', Sequence[int])
+
+    def test_union(self):
+        self.assertMatches(None, Optional[int])
+        self.assertMatches('x', int | str)
+        self.assertNotMatches(1.0, int | str)
+
+    def test_unionDispatch(self):
+        class Leaf:
+            pass
+        class Node:
+            pass
+        ns = Namespaces({'Leaf': Leaf, 'Node': Node}, {})
+        ty = Union[int, None, 'Leaf', 'Node', list[int], Literal['x']]
+        for v in [1, True, None, Leaf(), Node(), [1], 'x']:
+            self.assertMatches(v, ty, ns)
+        for v in [1.0, ['x'], 'y']:
+            self.assertNotMatches(v, ty, ns)
+        dispatch = getChecker(ty, ns).__self__
+        self.assertIs(myTypeguard._ACCEPT, dispatch.table[Node])
+        self.assertEqual(2, len(dispatch.table[list]))  # list[int] and Literal['x']
+
+    def test_protocol(self):
+        class Closable(Protocol):
+            def close(self) -> None: ...
+        class File:
+            def close(self) -> None:
+                pass
+        class NoFile:
+            pass
+        self.assertMatches(File(), Closable)
+        self.assertMatches(File(), Closable)
+        self.assertNotMatches(NoFile(), Closable)
+        f = File()
+        f.close = 1
+        self.assertNotMatches(f, Closable)
+        # The conformance of File is forgotten when the class is garbage collected
+        checks = myTypeguard.typeguard._checkers._signature_checks
+        self.assertIn(File, checks)
+        n = len(checks)
+        del File, f
+        import gc
+        gc.collect()
+        self.assertEqual(n - 1, len(checks))
+
+    def test_literal(self):
+        self.assertMatches(1, Literal[1, 2])
+        self.assertNotMatches(3, Literal[1, 2])
+
+    def test_forwardRef(self):
+        ns = Namespaces({'Point': Point}, {})
+        self.assertMatches(Point(), 'Point', ns)
+        self.assertMatches([Point()], list['Point'], ns)
+        self.assertNotMatches([1], list['Point'], ns)
+
+    def test_invalidType(self):
+        res = matchesTy(1, 'Unknown', Namespaces.empty())
+        self.assertIsInstance(res, MatchesTyFailure)
+
+    def test_checkerCached(self):
+        ns1 = Namespaces.empty()
+        ns2 = Namespaces.empty()
+        self.assertIs(getChecker(list[int], ns1), getChecker(list[int], ns2))
+        self.assertIsNot(getChecker('Point', ns1), getChecker('Point', ns2))
+
+class TestMatchesType(unittest.TestCase):
+
+    def checkTypeResult(self, v, ty) -> bool:
+        try:
+            myTypeguard.typeguard.check_type(v, ty)
+            return True
+        except myTypeguard.typeguard.TypeCheckError:
+            return False
+
+    def test_agreesWithCheckType(self):
+        UserId = NewType('UserId', int)
+        T = TypeVar('T', int, str)
+        cases = [
+            (1, int), ('x', int), (True, int), (1, float), (None, Optional[int]),
+            ('x', int | None), ([1, 2], list[int]), ([1, 'x'], list[int]),
+            ({'a': 1}, dict[str, int]), ({'a': 'b'}, Mapping[str, int]),
+            ((1, 'x'), tuple[int, str]), ((1,), tuple[int, str]), ((), tuple[()]),
+            ((1, 2), tuple[int, ...]), ({1}, set[int]), ({1}, frozenset[int]),
+            (1, Literal[1, 2]), (True, Literal[1]), (b'x', bytes), (3, UserId),
+            ('x', T), (1.0, T), (len, Callable[[str], int]), (1, Callable[[], int]),
+            ([[1], [2, 'x']], list[list[int]]), (int, type[int]), (str, type[int]),
+        ]
+        for (v, ty) in cases:
+            with self.subTest(v=v, ty=ty):
+                self.assertEqual(self.checkTypeResult(v, ty),
+                                 myTypeguard.typeguard.matches_type(v, ty))
+
+    def test_invalidType(self):
+        with self.assertRaises(TypeError):
+            myTypeguard.typeguard.matches_type(1, Literal[[1]])
+
+class TestResolveAnnotation(unittest.TestCase):
+
+    def test_cache(self):
+        checkers = myTypeguard.typeguard._checkers
+        checkers.clear_resolved_annotations()
+        ns = Namespaces({}, {})
+        with self.assertRaises(NameError):
+            myTypeguard.resolveAnnotationStr("list['Node']", ns)
+        # names defined later are resolved once they exist
+        class Node:
+            pass
+        ns.globals['Node'] = Node
+        self.assertEqual(list[Node], myTypeguard.resolveAnnotationStr("list['Node']", ns))
+        self.assertEqual(1, len(checkers._resolved_annotations))
+        self.assertEqual(list[Node], myTypeguard.resolveAnnotationStr("list['Node']", ns))
+        # redefinitions are noticed, also for names in nested strings
+        class Node2:
+            pass
+        ns.globals['Node'] = Node2
+        self.assertEqual(list[Node2], myTypeguard.resolveAnnotationStr("list['Node']", ns))
+        # other namespaces resolve independently
+        self.assertEqual(int, myTypeguard.resolveAnnotationStr('Node', Namespaces({'Node': int}, {})))
+
+    def test_redefinedClass(self):
+        # Compiled checkers must notice that a name refers to a redefined class
+        class A:
+            pass
+        class B:
+            pass
+        ns = Namespaces({'Node': A}, {})
+        (a, b) = (A(), B())
+        tys = ['Node', Optional['Node'], tuple['Node', ...]]
+        vals = [a, a, (a,)]
+        for (ty, v) in zip(tys, vals):
+            self.assertIs(True, matchesTy(v, ty, ns))
+        ns.globals['Node'] = B
+        for (ty, v) in zip(tys, vals):
+            self.assertIs(False, matchesTy(v, ty, ns))
+        self.assertIs(True, matchesTy(b, Optional['Node'], ns))
+
+class TestVerdictCache(unittest.TestCase):
+
+    def setUp(self):
+        myTypeguard.setVerdictCacheSize(4096)
+
+    def test_immutableTree(self):
+        ns = Namespaces({}, {})
+        ns.globals['Tree'] = Optional[tuple['Tree', int, 'Tree']]
+        tree = None
+        for i in range(10):
+            tree = (tree, i, None)
+        self.assertIs(True, matchesTy(tree, 'Tree', ns))
+        cached = [v for (v, _) in myTypeguard._verdicts.values()]
+        self.assertTrue(any(v is tree for v in cached))
+        self.assertTrue(any(v is tree[0] for v in cached))
+        self.assertIs(True, matchesTy(tree[0], 'Tree', ns))
+        self.assertIs(False, matchesTy((tree, 'x', None), 'Tree', ns))
+
+    def test_mutableElements(self):
+        xs = [1, 2]
+        t = (xs,)
+        ty = tuple[list[int]]
+        self.assertIs(True, matchesTy(t, ty, Namespaces.empty()))
+        self.assertFalse(any(v is t for (v, _) in myTypeguard._verdicts.values()))
+        xs.append('x')
+        self.assertIs(False, matchesTy(t, ty, Namespaces.empty()))
+
+    def test_disabled(self):
+        myTypeguard.setVerdictCacheSize(0)
+        t = (1, 2)
+        self.assertIs(True, matchesTy(t, tuple[int, int], Namespaces.empty()))
+        self.assertEqual({}, myTypeguard._verdicts)
+
+class TestCollectionCheckStrategies(unittest.TestCase):
+
+    def tearDown(self):
+        myTypeguard.setCollectionCheckCfg(myTypeguard.CollectionCheckCfg())
+
+    def use(self, spec: str):
+        myTypeguard.setCollectionCheckCfg(myTypeguard.parseCollectionCheckCfg(spec))
+
+    def test_parse(self):
+        parse = myTypeguard.parseCollectionCheckCfg
+        self.assertEqual(myTypeguard.CollectionCheckCfg('budget', sampleSize=5), parse('budget:5'))
+        self.assertEqual(myTypeguard.CollectionCheckCfg('adaptive', sampleSize=7, fullChecks=3),
+                         parse('adaptive:3:7'))
+        for s in ['foo', 'all:1', 'stride:x', 'budget:0', 'adaptive:1:2:3']:
+            with self.assertRaises(ValueError):
+                parse(s)
+
+    def test_budget(self):
+        self.use('budget:3')
+        ns = Namespaces.empty()
+        self.assertIs(True, matchesTy([1, 2, 3, 'x'], list[int], ns))
+        self.assertIs(False, matchesTy([1, 'x', 3, 4], list[int], ns))
+        # the budget is shared by nested collections
+        self.assertIs(True, matchesTy([[1, 2], [3, 'x']], list[list[int]], ns))
+
+    def test_stride(self):
+        self.use('stride:3')
+        ns = Namespaces.empty()
+        xs = list(range(10))
+        self.assertIs(True, matchesTy(xs[:3] + ['x'] + xs[4:], list[int], ns))
+        self.assertIs(False, matchesTy(xs + ['x'], list[int], ns))
+        self.assertIs(False, matchesTy(['x'] + xs, list[int], ns))
+
+    def test_samplerPerThread(self):
+        # A check in another thread does not use the sampler of the check in progress here
+        state = myTypeguard._state
+        old = state.samples
+        state.samples = myTypeguard._budget(0)
+        res = []
+        try:
+            t = threading.Thread(target=lambda: res.append(matchesTy([1, 'x'], list[int],
+                                                                     Namespaces.empty())))
+            t.start()
+            t.join()
+        finally:
+            state.samples = old
+        self.assertEqual([False], res)
+
+    def test_adaptive(self):
+        self.use('adaptive:2:2')
+        ns = Namespaces.empty()
+        site = myTypeguard.CheckSite()
+        bad = [1, 'x', 3, 4]
+        self.assertIs(False, matchesTy(bad, list[int], ns, site))
+        self.assertIs(False, matchesTy(bad, list[int], ns, site))
+        self.assertIs(True, matchesTy(bad, list[int], ns, site))
+        self.assertIs(False, matchesTy(bad, list[int], ns, myTypeguard.CheckSite()))
@@ -1,7 +1,11 @@
+import os
+import shutil
+import tempfile
 import unittest
-import parsecache
-from parsecache import FunMatcher
-import ast
+import wypp.location as location
+import wypp.parsecache as parsecache
+import wypp.sourceIndex as sourceIndex
+from wypp.parsecache import FunMatcher
 
 class TestParseCache(unittest.TestCase):
 
@@ -19,11 +23,7 @@ class TestParseCache(unittest.TestCase):
         defSpam = a.getFunDef(FunMatcher('spam', 22))
         assert(defSpam is not None)
         self.assertEqual(defSpam.lineno, 22)
-        match defSpam.body[1]:
-            case ast.Return(ast.Constant(2)):
-                pass
-            case stmt:
-                self.fail(f'Invalid first statement of spam: {stmt}')
+        self.assertEqual(defSpam.returns, (22, 14, 22, 17))
         x = a.getFunDef(FunMatcher('egg'))
         self.assertIsNone(x)
 
@@ -73,3 +73,68 @@ class TestParseCache(unittest.TestCase):
 
 
 
+
+    def test_parseCacheParams(self):
+        a = parsecache.AST('tests/parsecacheTestData.py')
+        defFoo = a.getMethodDef('D', FunMatcher('foo'))
+        assert(defFoo is not None)
+        self.assertEqual(defFoo.param('self'), (16, 12, 16, 16))
+        self.assertIsNone(defFoo.param('x'))
+        self.assertFalse(defFoo.isAsync)
+
+class TestAstCache(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.cache = parsecache.AstCache(2, None)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def mkFile(self, name: str) -> str:
+        path = os.path.join(self.dir, name)
+        with open(path, 'w') as f:
+            f.write(f'def {name[:-3]}(): pass\n')
+        return path
+
+    def test_lru(self):
+        (a, b, c) = [self.mkFile(n) for n in ['a.py', 'b.py', 'c.py']]
+        astA = self.cache.get(a)
+        self.cache.get(b)
+        self.assertIs(astA, self.cache.get(a))
+        self.cache.get(c) # evicts b
+        self.assertIs(astA, self.cache.get(a))
+        self.cache.get(b)
+        s = self.cache.stats
+        self.assertEqual((2, 4, 2, 2), (s.hits, s.misses, s.evictions, s.entries))
+
+    def test_bytes(self):
+        (a, b) = [self.mkFile(n) for n in ['a.py', 'b.py']]
+        self.cache.get(a).getFunDef(FunMatcher('a'))
+        n = self.cache.stats.bytes
+        self.assertGreater(n, 0)
+        self.cache.maxBytes = n
+        self.cache.get(b).getFunDef(FunMatcher('b'))
+        self.assertEqual((1, 1), (self.cache.stats.entries, self.cache.stats.evictions))
+
+    def test_invalidate(self):
+        a = self.mkFile('a.py')
+        astA = self.cache.get(a)
+        self.cache.invalidate(a)
+        self.assertEqual((0, 0, 1), (self.cache.stats.entries, self.cache.stats.bytes,
+                                     self.cache.stats.invalidations))
+        self.assertIsNot(astA, self.cache.get(a))
+
+    def test_getlineAccounted(self):
+        a = self.mkFile('a.py')
+        self.addCleanup(parsecache.invalidate, a)
+        before = parsecache.cacheStats()
+        self.assertEqual(b'def a(): pass', location.getline(a, 1).bytes)
+        after = parsecache.cacheStats()
+        self.assertEqual(before.entries + 1, after.entries)
+        self.assertGreaterEqual(after.bytes - before.bytes, os.path.getsize(a))
+        self.addCleanup(parsecache.configureCache, parsecache._cache.maxEntries,
+                        parsecache._cache.maxBytes)
+        parsecache.configureCache(1, None)
+        location.getline(self.mkFile('b.py'), 1) # evicts a, including its source
+        self.assertNotIn(sourceIndex.normPath(a), sourceIndex._index)
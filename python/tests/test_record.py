@@ -3,8 +3,9 @@ from wypp.writeYourProgram import *
 import sys
 import traceback
 import dataclasses
+import weakref
 import wypp.stacktrace as stacktrace
-from typing import Literal
+from typing import Literal, Optional
 
 initModule()
 
@@ -27,6 +28,17 @@ class Name:
 class Box:
     x: int
 
+@record(mutable=True)
+class Cell:
+    value: float
+    box: Optional[Box]
+
+@record
+class Named:
+    name: str
+    def __repr__(self):
+        return 'Named:' + super().__repr__()
+
 class TestRecords(unittest.TestCase):
 
     def setUp(self):
@@ -123,6 +135,19 @@ class TestRecords(unittest.TestCase):
         b.x = 5
         self.assertEqual(b.x, 5)
 
+    def test_mutableFieldTypes(self):
+        c = Cell(1.0, None)
+        c.value = 2
+        c.box = Box(3)
+        self.assertEqual(c.value, 2)
+        self.assertEqual(c.box.x, 3)
+        try:
+            c.value = 'foo'
+            self.fail('Expected WyppTypeError')
+        except WyppTypeError:
+            pass
+        self.assertEqual(c.value, 2)
+
     def test_addField(self):
         b = Box(5)
         try:
@@ -136,3 +161,21 @@ class TestRecords(unittest.TestCase):
             self.fail('Expected FrozenInstanceError')
         except dataclasses.FrozenInstanceError:
             pass
+
+    def test_slots(self):
+        p = Point(1, 2)
+        self.assertFalse(hasattr(p, '__dict__'))
+        self.assertEqual(Point.__slots__, ('x', 'y', '__weakref__'))
+        self.assertEqual(weakref.ref(p)(), p)
+        b = Box(1)
+        self.assertFalse(hasattr(b, '__dict__'))
+        try:
+            del p.x
+            self.fail('Expected FrozenInstanceError')
+        except dataclasses.FrozenInstanceError:
+            pass
+
+    def test_noSlotsForSuper(self):
+        n = Named('x')
+        self.assertTrue(hasattr(n, '__dict__'))
+        self.assertTrue(repr(n).startswith('Named:<'))
@@ -0,0 +1,68 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import wypp.location as location
+import wypp.parsecache as parsecache
+import wypp.sourceIndex as sourceIndex
+
+class TestSourceIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.file = os.path.join(self.dir, 'm.py')
+
+    def tearDown(self):
+        sourceIndex.invalidate()
+        shutil.rmtree(self.dir)
+
+    def write(self, content: bytes, mtime: int):
+        with open(self.file, 'wb') as f:
+            f.write(content)
+        os.utime(self.file, ns=(mtime, mtime))
+
+    def test_lines(self):
+        self.write(b'x = 1\n\ny = "\xc3\xa4"\n', 1_000_000_000)
+        sf = sourceIndex.get(self.file)
+        assert sf is not None
+        self.assertEqual(3, sf.lineCount())
+        self.assertEqual(b'x = 1', sf.line(1))
+        self.assertEqual(b'', sf.line(2))
+        self.assertEqual(b'', sf.line(4))
+        self.assertEqual('y = "ä"', location.getline(self.file, 3).decoded())
+        self.assertIs(sf, sourceIndex.get(self.file))
+
+    def test_encoding(self):
+        self.write(b'# -*- coding: latin-1 -*-\ns = "\xe4"', 1_000_000_000)
+        line = location.getline(self.file, 2)
+        self.assertEqual('iso-8859-1', line.encoding)
+        self.assertEqual('s = "ä"', line.decoded())
+
+    def test_invalidation(self):
+        self.write(b'def f(): pass\n', 1_000_000_000)
+        sf = sourceIndex.get(self.file)
+        a = parsecache.getAST(self.file)
+        self.assertIsNotNone(a.getFunDef(parsecache.FunMatcher('f')))
+        self.assertIs(a, parsecache.getAST(self.file))
+        # Same size, different mtime
+        self.write(b'def g(): pass\n', 2_000_000_000)
+        self.assertIsNot(sf, sourceIndex.get(self.file))
+        a = parsecache.getAST(self.file)
+        self.assertIsNone(a.getFunDef(parsecache.FunMatcher('f')))
+        self.assertIsNotNone(a.getFunDef(parsecache.FunMatcher('g')))
+
+    def test_truncatedAfterLoad(self):
+        self.write(b'a = 1\nb = 2\n', 1_000_000_000)
+        sf = sourceIndex.get(self.file)
+        assert sf is not None
+        with open(self.file, 'wb'):
+            pass
+        # The loaded content stays valid until the index notices the change
+        self.assertEqual(b'b = 2', sf.line(2))
+        self.assertIsNotNone(sf.parse())
+        self.assertIsNot(sf, sourceIndex.get(self.file))
+
+    def test_missingFile(self):
+        self.assertIsNone(sourceIndex.get(self.file))
+        self.assertEqual(b'', location.getline(self.file, 1).bytes)
@@ -3,6 +3,7 @@ import sys
 import wypp.stacktrace as stacktrace
 from stacktraceTestData import *
 import os
+import gc
 
 class TestReturnTracker(unittest.TestCase):
 
@@ -32,3 +33,90 @@ class TestReturnTracker(unittest.TestCase):
         tracker = stacktrace.installProfileHook(1)
         f3()
         self.assertReturnFrame(tracker, f3ReturnLine)
+
+class TestReturnMonitor(unittest.TestCase):
+
+    def setUp(self):
+        for f in [f1, f2, f3]:
+            stacktrace.watchReturns(f.__code__)
+        monitor = stacktrace.installReturnMonitor()
+        assert monitor is not None
+        self.monitor = monitor
+
+    def tearDown(self):
+        stacktrace.uninstallReturnMonitor()
+
+    def assertReturnFrame(self, line: int):
+        frame = self.monitor.getReturnFrame(0)
+        assert(frame is not None)
+        self.assertEqual(os.path.basename(frame.filename), 'stacktraceTestData.py')
+        self.assertEqual(frame.lineno, line)
+
+    def test_returnMonitor1(self):
+        f1()
+        self.assertReturnFrame(f1ReturnLine)
+
+    def test_returnMonitor2(self):
+        f2()
+        self.assertReturnFrame(f2ReturnLine)
+
+    def test_returnMonitor3(self):
+        f3()
+        self.assertReturnFrame(f3ReturnLine)
+
+    def test_closuresShareCode(self):
+        def mk():
+            def g(x):
+                return x
+            return g
+        (g1, g2) = (mk(), mk())
+        self.assertIs(g1.__code__, g2.__code__)
+        class Owner:
+            pass
+        (o1, o2) = (Owner(), Owner())
+        stacktrace.watchReturns(g1.__code__, lambda r: isinstance(r, int), o1)
+        stacktrace.watchReturns(g2.__code__, lambda r: isinstance(r, str), o2)
+        g1(1)
+        self.assertIsNotNone(self.monitor.getReturnFrameType(0))
+        # Forgetting the predicate of o1 must keep the predicate of o2
+        del o1
+        g2('a')
+        self.assertIsNone(self.monitor.getReturnFrameType(0))
+        g2(1)
+        self.assertIsNotNone(self.monitor.getReturnFrameType(0))
+        del o2
+        self.assertNotIn(g1.__code__, stacktrace._acceptReturn)
+
+    def test_uninstall(self):
+        stacktrace.uninstallReturnMonitor()
+        self.assertIsNone(sys.monitoring.get_tool(self.monitor.toolId))
+
+class TestCallerOutsideWypp(unittest.TestCase):
+
+    def test_callerOutsideWypp(self):
+        import wypp.utils as utils
+        def viaWypp():
+            # the frame of utils is skipped because utils is a wypp module
+            return (utils._call_with_frames_removed(stacktrace.callerOutsideWypp),
+                    sys._getframe().f_lineno - 1)
+        (fi, line) = viaWypp()
+        assert fi is not None
+        self.assertEqual('viaWypp', fi.function)
+        self.assertEqual(line, fi.lineno)
+        self.assertIsNotNone(fi.positions)
+
+    def test_isWyppFrameCached(self):
+        frame = sys._getframe()
+        self.assertFalse(stacktrace.isWyppFrame(frame))
+        self.assertIn(frame.f_code, stacktrace._isWyppCode)
+
+    def test_isWyppFrameCacheIsWeak(self):
+        src = 'import sys\ndef f():\n    return sys._getframe()\n'
+        g: dict = {}
+        exec(compile(src, '<dynamic>', 'exec'), g)
+        frame = g['f']()
+        self.assertFalse(stacktrace.isWyppFrame(frame))
+        n = len(stacktrace._isWyppCode)
+        del frame, g
+        gc.collect()
+        self.assertEqual(n - 1, len(stacktrace._isWyppCode))
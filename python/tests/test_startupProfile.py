@@ -0,0 +1,45 @@
+import builtins
+import io
+import sys
+import unittest
+import wypp.cmdlineArgs as cmdlineArgs
+import wypp.startupProfile as startupProfile
+
+class TestStartupProfile(unittest.TestCase):
+
+    def test_report(self):
+        sys.modules.pop('colorsys', None)
+        startupProfile.install()
+        try:
+            import colorsys
+        finally:
+            out = io.StringIO()
+            startupProfile.report(out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual('import time: self [us] | cumulative | imported package', lines[0])
+        self.assertTrue(any(l.endswith('| colorsys') for l in lines))
+        self.assertTrue(lines[-1].startswith('Startup: '))
+        self.assertIs(startupProfile._originalImport, builtins.__import__)
+
+    def test_requested(self):
+        self.assertTrue(startupProfile.requested(['--startup-profile', 'p.py']))
+        self.assertTrue(startupProfile.requested(['--lang', 'de', '--startup-profile', 'p.py', '-x']))
+        self.assertFalse(startupProfile.requested(['p.py', '--startup-profile']))
+        self.assertFalse(startupProfile.requested(['--test-file', 't.py', 'p.py', 'a', '--startup-profile']))
+        self.assertFalse(startupProfile.requested(['--', 'p.py', '--startup-profile']))
+        self.assertTrue(startupProfile.requested(['--repl', 'a.py', 'b.py', '--startup-profile']))
+
+    def test_startupProfileOfProgram(self):
+        (args, restArgs) = cmdlineArgs.parseCmdlineArgs(
+            ['--quiet', 'p.py', 'a', '--startup-profile', '--lang', 'en', 'b'])
+        self.assertEqual(('p.py', 'en', False), (args.file, args.lang, args.startupProfile))
+        self.assertEqual(['a', '--startup-profile', 'b'], restArgs)
+        (args, restArgs) = cmdlineArgs.parseCmdlineArgs(['--startup-profile', 'p.py', '--startup-profile'])
+        self.assertTrue(args.startupProfile)
+        self.assertEqual(['--startup-profile'], restArgs)
+
+    def test_optionsWithValueInSync(self):
+        for action in cmdlineArgs.mkParser()._actions:
+            for o in action.option_strings:
+                takesValue = action.nargs not in [0, '+']
+                self.assertEqual(takesValue, o in startupProfile._OPTIONS_WITH_VALUE, o)
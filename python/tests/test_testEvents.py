@@ -0,0 +1,36 @@
+import contextlib
+import io
+import json
+import os
+import unittest
+import wypp.testEvents as testEvents
+import wypp.writeYourProgram as w
+
+class TestTestEvents(unittest.TestCase):
+
+    def test_checkEvents(self):
+        (r, wfd) = os.pipe()
+        testEvents.openFd(wfd)
+        try:
+            with io.StringIO() as out:
+                with contextlib.redirect_stdout(out):
+                    w.check(1 + 1, 2)
+                    w.check('a', 'b')
+        finally:
+            testEvents.close()
+            os.close(wfd)
+        with os.fdopen(r) as f:
+            events = [json.loads(l) for l in f]
+        self.assertEqual(2, len(events))
+        (ok, fail) = events
+        self.assertEqual('check', ok['event'])
+        self.assertTrue(ok['ok'])
+        self.assertEqual(__file__.split(os.sep)[-1], ok['file'].split(os.sep)[-1])
+        self.assertFalse(fail['ok'])
+        self.assertEqual(ok['line'] + 1, fail['line'])
+        self.assertEqual(("'b'", "'a'"), (fail['expected'], fail['actual']))
+        self.assertGreaterEqual(fail['seconds'], 0)
+
+    def test_disabled(self):
+        self.assertFalse(testEvents.isEnabled())
+        testEvents.emit('check', ok=True)
@@ -0,0 +1,244 @@
+import unittest
+import inspect
+import functools
+from typing import Annotated, Literal, Optional
+import wypp.errors as errors
+import wypp.location as location
+import wypp.stacktrace as stacktrace
+import wypp.typecheck as typecheck
+from wypp.myTypeguard import Namespaces
+
+def fun(x: int, y: str = 'y', *rest: tuple[int, ...], z: float, **kw: dict[str, bool]) -> None:
+    pass
+
+def bareRest(*rest: tuple, **kw: dict) -> None:
+    pass
+
+def invalidRest(*rest: tuple[int], **kw: list[int]) -> None:
+    pass
+
+class C:
+    def meth(self, x: int) -> None:
+        pass
+
+def mkPlan(f, kind: location.CallableKind = 'function') -> typecheck.CheckPlan:
+    cfg = typecheck.CheckCfg(kind, Namespaces.empty())
+    info = location.StdCallableInfo(f, kind)
+    return typecheck.mkCheckPlan(inspect.signature(f), info, cfg)
+
+class TestCheckPlan(unittest.TestCase):
+
+    def test_function(self):
+        plan = mkPlan(fun)
+        self.assertEqual('function', plan.kind)
+        self.assertEqual(0, plan.offset)
+        self.assertEqual(5, plan.paramCount)
+        self.assertEqual(2, plan.mandatory)
+        self.assertEqual(['x', 'y'], [p.name for p in plan.positional])
+        self.assertEqual(['x', 'y', 'z'], list(plan.keywords))
+        assert plan.varPositional is not None
+        self.assertEqual('rest', plan.varPositional.param.name)
+        self.assertIs(int, plan.varPositional.ty)
+        self.assertTrue(plan.varPositional.checked)
+        assert plan.varKeyword is not None
+        self.assertIs(bool, plan.varKeyword.ty)
+        self.assertTrue(plan.varKeyword.checked)
+
+    def test_bareRest(self):
+        plan = mkPlan(bareRest)
+        assert plan.varPositional is not None and plan.varKeyword is not None
+        self.assertFalse(plan.varPositional.checked)
+        self.assertFalse(plan.varPositional.invalid)
+        self.assertFalse(plan.varKeyword.checked)
+        self.assertFalse(plan.varKeyword.invalid)
+
+    def test_invalidRest(self):
+        plan = mkPlan(invalidRest)
+        assert plan.varPositional is not None and plan.varKeyword is not None
+        self.assertTrue(plan.varPositional.invalid)
+        self.assertTrue(plan.varKeyword.invalid)
+
+    def test_method(self):
+        plan = mkPlan(C.meth, location.ClassMember('method', 'C'))
+        self.assertEqual('method', plan.kind)
+        self.assertEqual(1, plan.offset)
+        self.assertEqual(2, plan.mandatory)
+
+class Point:
+    pass
+
+class TestFastTypes(unittest.TestCase):
+
+    def fast(self, t):
+        return typecheck.fastTypes(t, Namespaces({'Point': Point}, {}))
+
+    def test_numericTower(self):
+        self.assertEqual({int, bool}, self.fast(int))
+        self.assertEqual({float, int, bool}, self.fast(float))
+        self.assertEqual({str}, self.fast(str))
+        self.assertEqual({type(None)}, self.fast(None))
+
+    def test_classesAndUnions(self):
+        self.assertEqual({Point}, self.fast(Point))
+        self.assertEqual({Point}, self.fast('Point'))
+        self.assertEqual({Point, type(None)}, self.fast(Optional['Point']))
+        self.assertEqual({int, bool, str}, self.fast(int | str))
+        self.assertIsNone(self.fast('Unknown'))
+
+    def test_annotated(self):
+        self.assertEqual({int, bool}, self.fast(Annotated[int, lambda i: i >= 0, 'nat']))
+
+    def test_generic(self):
+        self.assertEqual(frozenset(), self.fast(list[int]))
+        self.assertEqual(frozenset(), self.fast(Literal[1]))
+
+def inc(x: int) -> int:
+    return x + 1
+
+def badResult(x: int) -> str:
+    return x # type: ignore
+
+class TestMonitoringBackend(unittest.TestCase):
+
+    def setUp(self):
+        self.assertTrue(typecheck.enableMonitoringBackend())
+
+    def tearDown(self):
+        typecheck.disableMonitoringBackend()
+
+    def wrap(self, f):
+        cfg = {'kind': 'function', 'globals': globals(), 'locals': {}}
+        return typecheck.wrapTypecheck(cfg)(f)
+
+    def test_noWrapper(self):
+        self.assertIs(inc, self.wrap(inc))
+
+    def test_arguments(self):
+        f = self.wrap(inc)
+        self.assertEqual(2, f(1))
+        with self.assertRaises(errors.WyppTypeError):
+            f('1')
+
+    def test_result(self):
+        f = self.wrap(badResult)
+        with self.assertRaises(errors.WyppTypeError):
+            f(1)
+
+class TestQuickChecks(unittest.TestCase):
+
+    def test_quickCheckArguments(self):
+        plan = mkPlan(fun)
+        ns = Namespaces.empty()
+        self.assertTrue(typecheck.quickCheckArguments(plan, (1, 'a'), {'z': 1.0}, ns))
+        self.assertEqual([{int, bool}, {str}], plan.positionalFastTypes)
+        # Wrong types, too few arguments, unknown keyword and rest arguments
+        self.assertFalse(typecheck.quickCheckArguments(plan, ('1', 'a'), {'z': 1.0}, ns))
+        self.assertFalse(typecheck.quickCheckArguments(plan, (1,), {}, ns))
+        self.assertFalse(typecheck.quickCheckArguments(plan, (1, 'a'), {'z': 1.0, 'b': True}, ns))
+        self.assertFalse(typecheck.quickCheckArguments(plan, (1, 'a', 2), {'z': 1.0}, ns))
+
+    def test_wrapped(self):
+        self.addCleanup(stacktrace.installReturnTracking())
+        cfg = {'kind': 'function', 'globals': globals(), 'locals': {}}
+        f = typecheck.wrapTypecheck(cfg)(inc)
+        self.assertEqual(2, f(1))
+        with self.assertRaises(errors.WyppTypeError):
+            f('1')
+        g = typecheck.wrapTypecheck(cfg)(badResult)
+        with self.assertRaises(errors.WyppTypeError):
+            g(1)
+
+def kwOnly(x: int, y: str = 'y', *, z: float) -> str:
+    return y * x
+
+class TestSpecializedWrappers(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(stacktrace.installReturnTracking())
+
+    def wrap(self, f):
+        cfg = {'kind': 'function', 'globals': globals(), 'locals': {}}
+        return typecheck.wrapTypecheck(cfg)(f)
+
+    def test_signature(self):
+        f = self.wrap(kwOnly)
+        self.assertEqual(['x', 'y', '__wypp_extra', 'z', '__wypp_kw'],
+                         list(inspect.signature(f).parameters))
+        self.assertEqual('kwOnly', f.__qualname__)
+        self.assertEqual('yy', f(2, z=1.0))
+        self.assertEqual('aaa', f(x=3, y='a', z=1))
+
+    def test_errors(self):
+        f = self.wrap(kwOnly)
+        for (args, kwargs) in [(('1',), {'z': 1.0}), ((1, 'a', 2), {'z': 1.0}),
+                               ((1,), {}), ((1,), {'z': 1.0, 'w': 2})]:
+            with self.assertRaises(errors.WyppTypeError):
+                f(*args, **kwargs)
+
+    def test_shadowedNames(self):
+        # Parameter and function names must not shadow the names used by the wrapper
+        def f(utils: int, stacktrace: int, type: int, _quickChecks: int) -> int:
+            return utils + stacktrace + type + _quickChecks
+        def isFastMatch(checkReturn: int) -> int:
+            return checkReturn
+        g = self.wrap(f)
+        self.assertEqual(10, g(1, 2, 3, 4))
+        with self.assertRaises(errors.WyppTypeError):
+            g(1, 2, 'x', 4)
+        h = self.wrap(isFastMatch)
+        self.assertEqual(1, h(1))
+        with self.assertRaises(errors.WyppTypeError):
+            h('x')
+
+    def test_indirectCall(self):
+        # The caller outside wypp is the call of list, not the call of f
+        def two(x: int, y: int) -> int:
+            return x + y
+        f = self.wrap(two)
+        self.assertEqual([2, 4], list(map(f, [1, 2], [1, 2])))
+        with self.assertRaises(errors.WyppTypeError) as cm:
+            list(map(f, [1, 'a'], [1, 2]))
+        self.assertIn('1st argument', str(cm.exception))
+
+    def test_wrapperFactoryCached(self):
+        def mk(n: int):
+            def add(x: int, y: int = 1) -> int:
+                return x + y + n
+            return add
+        (f, g) = (self.wrap(mk(1)), self.wrap(mk(2)))
+        self.assertIs(f.__code__, g.__code__)
+        self.assertEqual((3, 5), (f(1), g(1, 2)))
+        with self.assertRaises(errors.WyppTypeError):
+            g('1')
+
+    def test_exactArguments(self):
+        # The values must reach the generic wrapper exactly as passed, even if the call site
+        # does not tell how
+        def three(x: int, y: str = 'a', z: int = 0) -> int:
+            return x + z
+        f = self.wrap(three)
+        self.assertEqual(3, functools.partial(f, 1)('b', 2))
+        args = [1, 'a', 'b']
+        kw = {'y': 2}
+        for (call, msg) in [(lambda: functools.partial(f, 1)('a', 'b'), '3rd argument'),
+                            (lambda: f(*args), '3rd argument'),
+                            (lambda: f(1, **kw), 'argument `y`'),
+                            (lambda: f(*args[:1], z='b', **{'y': 'a'}), 'argument `z`')]:
+            with self.assertRaises(errors.WyppTypeError) as cm:
+                call()
+            self.assertIn(msg, str(cm.exception))
+
+    def test_callArguments(self):
+        plan = mkPlan(kwOnly)
+        m = typecheck._MISSING
+        noCaller = lambda: None
+        self.assertEqual(((1, 'a'), {'z': 2.0}),
+                         typecheck.callArguments(plan, (1, 'a', 2.0), (), {}, noCaller))
+        # Default values are not passed
+        self.assertEqual(((1,), {'z': 2.0}),
+                         typecheck.callArguments(plan, (1, 'y', 2.0), (), {}, noCaller))
+        self.assertEqual(((), {'y': 'a', 'z': 2.0}),
+                         typecheck.callArguments(plan, (m, 'a', 2.0), (), {}, noCaller))
+        # Superfluous and unknown arguments
+        self.assertEqual(((1, 'a', 3), {'w': 4}),
+                         typecheck.callArguments(plan, (1, 'a', m), (3,), {'w': 4}, noCaller))